@@ -0,0 +1,50 @@
+""" Measure how long it takes to import circuitpainter
+
+Importing circuitpainter should not import pcbnew (which takes several
+seconds); that is deferred until the first board is created. This script
+checks that, and that the import time stays below a threshold.
+
+Usage:
+
+    python benchmarks/import_time.py [--runs N] [--limit SECONDS]
+"""
+
+import sys
+import statistics
+import subprocess
+from argparse import ArgumentParser
+
+CHECK = """
+import sys, time
+start = time.perf_counter()
+import circuitpainter
+print(time.perf_counter() - start, 'pcbnew' in sys.modules)
+"""
+
+
+def measure():
+    """ Import circuitpainter in a fresh interpreter
+
+    returns: import time (s), and whether pcbnew was imported
+    """
+    output = subprocess.check_output([sys.executable, "-c", CHECK], text=True)
+    seconds, pcbnew_imported = output.split()
+    return float(seconds), pcbnew_imported == 'True'
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="circuitpainter import time benchmark")
+    parser.add_argument('--runs', type=int, default=5, help="Number of runs")
+    parser.add_argument('--limit', type=float, default=0.5,
+                        help="Maximum allowed median import time (s)")
+    args = parser.parse_args()
+
+    results = [measure() for _ in range(args.runs)]
+    median = statistics.median(seconds for seconds, _ in results)
+
+    print(f"import circuitpainter: {median * 1000:.1f} ms (median of {args.runs})")
+
+    if any(pcbnew_imported for _, pcbnew_imported in results):
+        sys.exit("FAIL: importing circuitpainter also imported pcbnew")
+    if median > args.limit:
+        sys.exit(f"FAIL: import time exceeds {args.limit * 1000:.0f} ms")
@@ -1,19 +1,20 @@
 from circuitpainter import CircuitPainter
 from argparse import ArgumentParser
 import math
+import numpy
 
-def UntentedVia(painter,x,y,d,w):
+def UntentedVias(painter,points,d,w):
     painter.layer('F_Cu')
-    painter.via(x,y,d=d,w=w)
+    painter.vias(points,d=d,w=w)
 
     painter.fill()
     # By default, vias are tented (covered). Draw circlular openings
     # in the soldermask layers to make them untented, instead of
     # changing the board-level setting.
     painter.layer('F_Mask')
-    painter.circle(x,y,w/2)
+    painter.circles(points,w/2)
     painter.layer('B_Mask')
-    painter.circle(x,y,w/2)
+    painter.circles(points,w/2)
 
 def HexPerfboard(count,spacing,hole_d,ring_d):
     painter = CircuitPainter()
@@ -37,23 +38,24 @@ def HexPerfboard(count,spacing,hole_d,ring_d):
     painter.width(0.05)
     painter.fill()
 
-    # Center via
-    UntentedVia(painter,0,0,hole_d,ring_d)
-
-    # Draw the hex grid, 1/6th at a time:
+    # Compute the hex grid positions for 1/6th of the board, then rotate
+    # copies of them to fill in the rest. The whole grid is then placed
+    # in one go.
+    sector = []
+    for y in range(0, count):
+        for x in range(0,count-y):
+            sector.append([spacing + x*spacing + y*spacing*math.cos(math.radians(60)),
+                           -y*spacing*math.sin(math.radians(60))])
+    sector = numpy.array(sector).reshape(-1,2)
+
+    points = [numpy.zeros((1,2))] # Center via
     for rotation in range(0,360,60):
-        painter.push_matrix();
-        painter.rotate(rotation)
-        painter.translate(spacing,0)
-        for y in range(0, count):
-            for x in range(0,count-y):
-                UntentedVia(painter, x*spacing,0,hole_d,ring_d)
-
-            painter.translate(spacing*math.cos(math.radians(60)),-spacing*math.sin(math.radians(60)))
-
-        painter.pop_matrix();
-
+        r = math.radians(rotation)
+        rotation_matrix = numpy.array([[math.cos(r), math.sin(r)],
+                                       [-math.sin(r), math.cos(r)]])
+        points.append(sector @ rotation_matrix)
 
+    UntentedVias(painter, numpy.concatenate(points), hole_d, ring_d)
 
     return painter
 
@@ -1,6 +1,6 @@
 import math
 import argparse
-from circuitpainter import CircuitPainter
+from circuitpainter import CircuitPainter, Block
 
 def rotate(x,y,angle):
     """ Rotate a vector around the origin
@@ -59,89 +59,88 @@ def lotus_leds(radius, leds,led_radius_percent):
     resistor_angle = 270-arc_angle/3
     led_angle = 270+arc_angle/3
 
-    for angle in range(0,360,anglular_step):
-        painter.push_matrix()
-
-        # Rotate the reference plane to the starting angle for this arc
-        painter.rotate(angle)
-
-        # Switch to the top copper layer, and set the track width to 0.3mm
-        painter.layer('F_Cu')
-        painter.width(.3)
-
-        painter.push_matrix()
-        # Change the drawing origin to the center of the component arc
-        painter.translate(lerp(arc_start_x,radius_outer,.5),lerp(-arc_start_y,0,.5))
-        painter.rotate(-line_angle)
-        painter.translate(0,arc_offset)
-
-        # Translate from the center of the componet arc to the center of the
-        # resistor, and then place it
-        painter.push_matrix()
-        painter.rotate(resistor_angle)
-        painter.translate(radius_arc,0)
-        painter.rotate(90)
-        painter.footprint(0,0,"Resistor_SMD","R_0805_2012Metric",nets=['gnd',f'led_{angle}'])
-        painter.pop_matrix()
-
-        # Translate from the center of the componet arc to the center of the
-        # LED, and then place it
-        painter.push_matrix()
-        painter.rotate(led_angle)
-        painter.translate(radius_arc,0)
-        painter.rotate(90)
-        painter.footprint(0,0,"LED_SMD","LED_0805_2012Metric",nets=[f'led_{angle}','vcc'])
-        painter.pop_matrix()
-
-        # Draw three arc tracks from the resistor to a via, from the resistor
-        # to the LED, and from the LED to a via. Note that we don't need to
-        # specify the track names here- KiCad will automatically detect that
-        # the track overlaps a footprint, and assign the track to the same
-        # net as the footprint. If you have a more complex board, then it
-        # might be a better strategy to specify the net names explicitly.
-        painter.arc_track(0,0,radius_arc,270+arc_angle,led_angle+3)
-        painter.arc_track(0,0,radius_arc,led_angle-3,resistor_angle+3)
-        painter.arc_track(0,0,radius_arc,resistor_angle-3,270-arc_angle)
-
-        # Create the vias to connect the track ends to the copper fills on the
-        # bottom of the board. We don't need to specify the net names here,
-        # either, because KiCad will automatically figure them out based on
-        # the tracks that the via overlaps.
-        painter.push_matrix()
-        painter.rotate(270-arc_angle)
-        painter.translate(radius_arc,0)
-        painter.via(0,0)
-        painter.pop_matrix()
-
-        painter.push_matrix()
-        painter.rotate(270+arc_angle)
-        painter.translate(radius_arc,0)
-        painter.via(0,0)
-        painter.pop_matrix()
-
-        painter.pop_matrix()
-
-        # Draw arcs on the silkscreen
-        painter.layer('F_SilkS')
-        painter.width(.3)
-
-        # The first silkscreen arc follows the component arc
-        painter.push_matrix()
-        painter.translate(lerp(arc_start_x,radius_outer,.5),lerp(-arc_start_y,0,.5))
-        painter.rotate(-line_angle)
-        painter.translate(0,arc_offset)
-        painter.arc(0,0,radius_arc,270-arc_angle,270+arc_angle)
-        painter.pop_matrix()
-
-        # The second silkscreen arc is a mirror image
-        painter.push_matrix()
-        painter.translate(lerp(arc_start_x,radius_outer,.5),lerp(arc_start_y,0,.5))
-        painter.rotate(line_angle)
-        painter.translate(0,-arc_offset)
-        painter.arc(0,0,radius_arc,90-arc_angle,90+arc_angle)
-        painter.pop_matrix()
-
-        painter.pop_matrix()
+    # Draw a single petal into a block. The block is placed once for each
+    # petal below, rotated to the starting angle for that petal. The {angle}
+    # in the net names is filled in with the rotation of each petal.
+    petal = Block()
+
+    # Switch to the top copper layer, and set the track width to 0.3mm
+    petal.layer('F_Cu')
+    petal.width(.3)
+
+    petal.push_matrix()
+    # Change the drawing origin to the center of the component arc
+    petal.translate(lerp(arc_start_x,radius_outer,.5),lerp(-arc_start_y,0,.5))
+    petal.rotate(-line_angle)
+    petal.translate(0,arc_offset)
+
+    # Translate from the center of the componet arc to the center of the
+    # resistor, and then place it
+    petal.push_matrix()
+    petal.rotate(resistor_angle)
+    petal.translate(radius_arc,0)
+    petal.rotate(90)
+    petal.footprint(0,0,"Resistor_SMD","R_0805_2012Metric",nets=['gnd','led_{angle}'])
+    petal.pop_matrix()
+
+    # Translate from the center of the componet arc to the center of the
+    # LED, and then place it
+    petal.push_matrix()
+    petal.rotate(led_angle)
+    petal.translate(radius_arc,0)
+    petal.rotate(90)
+    petal.footprint(0,0,"LED_SMD","LED_0805_2012Metric",nets=['led_{angle}','vcc'])
+    petal.pop_matrix()
+
+    # Draw three arc tracks from the resistor to a via, from the resistor
+    # to the LED, and from the LED to a via. Note that we don't need to
+    # specify the track names here- KiCad will automatically detect that
+    # the track overlaps a footprint, and assign the track to the same
+    # net as the footprint. If you have a more complex board, then it
+    # might be a better strategy to specify the net names explicitly.
+    petal.arc_track(0,0,radius_arc,270+arc_angle,led_angle+3)
+    petal.arc_track(0,0,radius_arc,led_angle-3,resistor_angle+3)
+    petal.arc_track(0,0,radius_arc,resistor_angle-3,270-arc_angle)
+
+    # Create the vias to connect the track ends to the copper fills on the
+    # bottom of the board. We don't need to specify the net names here,
+    # either, because KiCad will automatically figure them out based on
+    # the tracks that the via overlaps.
+    petal.push_matrix()
+    petal.rotate(270-arc_angle)
+    petal.translate(radius_arc,0)
+    petal.via(0,0)
+    petal.pop_matrix()
+
+    petal.push_matrix()
+    petal.rotate(270+arc_angle)
+    petal.translate(radius_arc,0)
+    petal.via(0,0)
+    petal.pop_matrix()
+
+    petal.pop_matrix()
+
+    # Draw arcs on the silkscreen
+    petal.layer('F_SilkS')
+    petal.width(.3)
+
+    # The first silkscreen arc follows the component arc
+    petal.push_matrix()
+    petal.translate(lerp(arc_start_x,radius_outer,.5),lerp(-arc_start_y,0,.5))
+    petal.rotate(-line_angle)
+    petal.translate(0,arc_offset)
+    petal.arc(0,0,radius_arc,270-arc_angle,270+arc_angle)
+    petal.pop_matrix()
+
+    # The second silkscreen arc is a mirror image
+    petal.push_matrix()
+    petal.translate(lerp(arc_start_x,radius_outer,.5),lerp(arc_start_y,0,.5))
+    petal.rotate(line_angle)
+    petal.translate(0,-arc_offset)
+    petal.arc(0,0,radius_arc,90-arc_angle,90+arc_angle)
+    petal.pop_matrix()
+
+    painter.repeat_polar(petal, len(range(0,360,anglular_step)), step=anglular_step)
 
     # Fill the back of the board with a copper zone, and assign it to the 'vcc' net
     painter.layer('B_Cu')
@@ -155,8 +154,10 @@ def lotus_leds(radius, leds,led_radius_percent):
     painter.layer('B_SilkS')
     painter.text(0,12,"Made with CircuitPainter",mirrored=True)
 
-    # Make the board shape a circle
+    # Make the board shape a circle. The petals set their track width in the
+    # block, so the painter's width has to be set here.
     painter.layer("Edge_Cuts")
+    painter.width(.3)
     painter.circle(0,0,radius)
 
     return painter
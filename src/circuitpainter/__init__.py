@@ -2,4 +2,13 @@
 
 __version__ = "0.1.0"
 
-from .circuitpainter import CircuitPainter
+from .circuitpainter import CircuitPainter, clear_footprint_cache, \
+    set_async_export_limit
+from .export_cache import ExportCache
+from .sexpr_painter import SexprCircuitPainter
+from .streaming_painter import StreamingCircuitPainter
+from .display_list import DisplayList, RecordingCircuitPainter
+from .sweep import sweep
+from .daemon import GenerationDaemon, DaemonClient
+from .block import Block
+from .registry import ItemRegistry
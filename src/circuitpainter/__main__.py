@@ -0,0 +1,4 @@
+import sys
+from circuitpainter.cli import main
+
+sys.exit(main())
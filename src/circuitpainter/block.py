@@ -0,0 +1,227 @@
+import copy
+from array import array
+import numpy
+from circuitpainter.display_list import DisplayList, \
+    RecordingCircuitPainter, KINDS, FLAG_DESIGNATORS
+
+_POINT_OFFSETS = {
+    'track': (0, 2),
+    'arc_track': (0,),
+    'via': (0,),
+    'circle_zone': (0,),
+    'line': (0, 2),
+    'arc': (0,),
+    'circle': (0,),
+    'text': (0,),
+    'footprint': (0,),
+    'dimension': (0, 2),
+}
+""" Positions of the x, y points in the values of each command type. All of
+the values of zones and polygons are points. """
+
+_ANGLE_OFFSETS = {
+    'arc_track': ((3, 4), -1),
+    'arc': ((3, 4), -1),
+    'text': ((2,), 1),
+    'footprint': ((2,), 1),
+}
+""" Positions of the angles in the values of each command type, and the
+direction that they turn in as the transform rotates """
+
+
+class Block(RecordingCircuitPainter):
+    """ Group of drawing commands that can be placed many times
+
+    A block is drawn in the same way as a painter, but the commands are only
+    recorded, in the block's own (local) coordinates. The block can then be
+    placed on any painter, as many times as needed, using place_block(),
+    repeat_polar() or repeat_grid(). Placing a block transforms the points
+    of all of the copies in one step, then creates the items using the
+    painter's list drawing functions, so a large symmetric design costs
+    little more than drawing a single copy.
+
+    Net names (including footprint nets) and footprint references can
+    contain fields, which are filled in for each copy using str.format().
+    For example, 'led_{i}' becomes 'led_0', 'led_1', and so on. Footprint
+    references ending in '?' are numbered by the painter the block is
+    placed on.
+
+    A block has no board, so it can't be saved or exported.
+    """
+
+    def __init__(self):
+        """ Create an empty block """
+        # pylint: disable=super-init-not-called
+        # A block doesn't have a board, so only the drawing state is needed
+        self._init_draw_state()
+        self.display_list = DisplayList()
+        self.recording = True
+        self.materialized = 0
+
+        # Value positions used by instantiate(), and the number of commands
+        # that they were computed for
+        self._layout = None
+
+    def materialize(self):
+        raise TypeError(
+            "A block can't be materialized; place it on a painter instead")
+
+    def fork(self):
+        """ Create an independent copy of the block
+
+        :return: New block
+        """
+        clone = copy.copy(self)
+        clone.transform = self.transform.copy()
+        clone.display_list = self.display_list.copy()
+        return clone
+
+    def footprint(
+            self,
+            x,
+            y,
+            library,
+            name=None,
+            reference='P?',
+            angle=0,
+            nets=None,
+            library_path=None):
+        """ Record a footprint, see CircuitPainter.footprint()
+
+        The footprint is looked up, and its reference designator assigned,
+        when the block is placed.
+        """
+        x, y = self.transform.project(x, y)
+        flags = FLAG_DESIGNATORS if self.show_reference_designators else 0
+        self.display_list.add(
+            'footprint', self.draw_layer, self.draw_width, None,
+            (x, y, angle + self.transform.get_angle()), flags,
+            (library, name, reference,
+             list(nets) if nets is not None else None, library_path))
+
+    def _get_layout(self):
+        """ Find the positions of the points and angles in the values
+
+        :return: Tuple of arrays: x positions, y positions, angle positions,
+             and angle directions
+        """
+        count = len(self.display_list)
+        if self._layout is not None and self._layout[0] == count:
+            return self._layout[1]
+
+        kinds = numpy.frombuffer(self.display_list.kinds, dtype='B')
+        offsets = numpy.frombuffer(self.display_list.offsets, dtype='q')
+
+        points = []
+        angles = []
+        directions = []
+        for kind_index, kind in enumerate(KINDS):
+            commands = numpy.flatnonzero(kinds == kind_index)
+            if len(commands) == 0:
+                continue
+
+            starts = offsets[commands][:, numpy.newaxis]
+            if kind in _POINT_OFFSETS:
+                points.append(
+                    (starts + _POINT_OFFSETS[kind]).ravel())
+            else:
+                points.extend(numpy.arange(offsets[command],
+                                           offsets[command + 1], 2)
+                              for command in commands.tolist())
+
+            if kind in _ANGLE_OFFSETS:
+                positions, direction = _ANGLE_OFFSETS[kind]
+                angles.append((starts + positions).ravel())
+                directions.append(numpy.full(len(commands) * len(positions),
+                                             direction, dtype=float))
+
+        x_positions = numpy.concatenate(points) if len(points) > 0 \
+            else numpy.zeros(0, dtype=numpy.int64)
+        layout = (x_positions,
+                  x_positions + 1,
+                  numpy.concatenate(angles) if len(angles) > 0
+                  else numpy.zeros(0, dtype=numpy.int64),
+                  numpy.concatenate(directions) if len(directions) > 0
+                  else numpy.zeros(0))
+
+        self._layout = (count, layout)
+        return layout
+
+    def instantiate(self, transforms, fields):
+        """ Get the drawing commands for a list of copies of the block
+
+        :param transforms: List of TransformMatrix, one per copy, that
+             convert block coordinates to board coordinates
+        :param fields: List of dictionaries, one per copy, with the values
+             to fill in to the net names and footprint references
+        :return: DisplayList, in board coordinates
+        """
+        # pylint: disable=protected-access
+        source = self.display_list
+        count = len(source)
+        copies = len(transforms)
+        x_positions, y_positions, angle_positions, directions = \
+            self._get_layout()
+
+        # Transform the values of every copy at once
+        values = numpy.frombuffer(source.values, dtype=numpy.float64)
+        size = len(values)
+        a, b, c, d, e, f = (column[:, numpy.newaxis] for column in numpy.array(
+            [transform.coefficients for transform in transforms],
+            dtype=numpy.float64).reshape(-1, 6).T)
+        rotations = numpy.array([transform.get_angle()
+                                 for transform in transforms])
+
+        x = values[x_positions]
+        y = values[y_positions]
+        placed = numpy.tile(values, (copies, 1))
+        placed[:, x_positions] = a * x + c * y + e
+        placed[:, y_positions] = b * x + d * y + f
+        placed[:, angle_positions] += rotations[:, numpy.newaxis] * directions
+
+        result = DisplayList()
+        for layer in source.layer_names:
+            result._layer_index(layer)
+
+        result.kinds = source.kinds * copies
+        result.layers = source.layers * copies
+        result.widths = source.widths * copies
+        result.flags = source.flags * copies
+        result.values = array('d', placed.tobytes())
+
+        offsets = numpy.frombuffer(source.offsets, dtype='q')[1:]
+        result.offsets.frombytes(
+            (offsets + size * numpy.arange(copies)[:, numpy.newaxis])
+            .astype('q').tobytes())
+
+        # Each copy gets its own net names, filled in from its fields
+        nets = numpy.frombuffer(source.nets, dtype='i')
+        if len(source.net_names) > 0:
+            names = numpy.array(
+                [[result._net_index(name.format_map(instance))
+                  for name in source.net_names]
+                 for instance in fields], dtype='i')
+            nets = numpy.where(nets >= 0,
+                               names[:, numpy.maximum(nets, 0)],
+                               -1)
+        else:
+            nets = numpy.tile(nets, (copies, 1))
+        result.nets = array('i', nets.astype('i').tobytes())
+
+        for index, extra in source.extras.items():
+            is_footprint = KINDS[source.kinds[index]] == 'footprint'
+            for instance_index, instance in enumerate(fields):
+                placed_extra = extra
+                if is_footprint:
+                    library, name, reference, footprint_nets, library_path = \
+                        extra
+                    if footprint_nets is not None:
+                        footprint_nets = [
+                            net.format_map(instance) if net is not None
+                            else None for net in footprint_nets]
+                    placed_extra = (library, name,
+                                    reference.format_map(instance),
+                                    footprint_nets, library_path)
+                result.extras[instance_index * count + index] = placed_extra
+
+        return result
@@ -1,16 +1,82 @@
 #!/usr/bin/env python
 
 import math
+import copy
+import asyncio
+import weakref
+import functools
 import subprocess
 import glob
 import os
 import shutil
 import platform
+import time
+import uuid
+import collections
+import warnings
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import zipfile
-import pcbnew
+import io
+import importlib
+import collections.abc
+import numpy
 from circuitpainter.transform_matrix import TransformMatrix
+from circuitpainter.footprint_library import get_library_index
+from circuitpainter.export_cache import ExportCache
+from circuitpainter.registry import ItemRegistry
+
+
+class _LazyModule():
+    """Module proxy, that imports the module the first time it is used
+
+    Importing pcbnew takes several seconds, so it is deferred until it is
+    actually needed (typically, when the first board is created).
+    """
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        # Only called for attributes that haven't been copied from the module
+        # yet; after the first call, lookups are plain attribute accesses.
+        module = importlib.import_module(self._name)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+pcbnew = _LazyModule('pcbnew')
+
+
+class _LayerTable(collections.abc.Mapping):
+    """Mapping of layer names to pcbnew layer IDs, resolved on first use"""
+
+    def __init__(self, names):
+        self._names = names
+        self._ids = None
+        self._names_by_id = None
+
+    def _resolve(self):
+        if self._ids is None:
+            self._ids = {name: getattr(pcbnew, name) for name in self._names}
+        return self._ids
+
+    def __getitem__(self, name):
+        return self._resolve()[name]
+
+    def name(self, layer_id):
+        """Get the name of a pcbnew layer ID"""
+        if self._names_by_id is None:
+            self._names_by_id = {layer: name
+                                 for name, layer in self._resolve().items()}
+        return self._names_by_id[layer_id]
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
 
 
 # References:
@@ -19,6 +85,13 @@ from circuitpainter.transform_matrix import TransformMatrix
 # https://github.com/cooked/kimotor/blob/master/kimotor_action.py
 
 
+_UUID_NAMESPACE = uuid.UUID('6c1b3a52-9f7e-4d8e-a0c5-3c2f5e0d9b41')
+""" Namespace used to derive deterministic item UUIDs from a seed """
+
+EXPORT_FORMATS = ('gerber', 'svg', 'step', 'pos')
+""" Formats supported by CircuitPainter.export_all() """
+
+
 def _guess_footprint_library_path():
     """Attempt to find the KiCad footprint library"""
 
@@ -27,7 +100,11 @@ def _guess_footprint_library_path():
     if system == "Linux":
         footprint_path = "/usr/share/kicad/footprints"
     elif system == "Windows":
-        kicad_path = Path(shutil.which('kicad'))
+        kicad = shutil.which('kicad')
+        if kicad is None:
+            raise OSError(
+                'Could not find KiCad to guess the footprint library location, please specify manually')
+        kicad_path = Path(kicad)
         footprint_path = f"{kicad_path.parents[1]}\\share\\kicad\\footprints"
     else:
         raise OSError(
@@ -40,95 +117,340 @@ def _guess_footprint_library_path():
     return footprint_path
 
 
-def _make_zip(output_name, filenames):
+@functools.lru_cache(maxsize=256)
+def _load_footprint_template(library_path, library, name):
+    """Load a footprint from a library, caching the result
+
+    The returned footprint is shared, and must not be modified or placed on a
+    board; use _load_footprint() to get a copy instead.
+
+    library_path: Path to the footprint libraries
+    library: Library name, for example: 'LED_SMD'
+    name: Footprint name, for example: 'LED_1210_3225Metric'
+    """
+    # TODO: This creates DRC warinings; possibly the footprint needs to be loaded through
+    # library that's already linked to the project?
+    footprint = pcbnew.FootprintLoad(f"{library_path}/{library}.pretty", name)
+    if footprint is None:
+        raise IOError(
+            f"Footprint {name} in library:{library_path}/{library}.pretty not found")
+
+    return footprint
+
+
+def _load_footprint(library_path, library, name):
+    """Get a new copy of a footprint from a library
+
+    Each footprint is only read from disk once; subsequent requests are
+    duplicated from an in-memory template.
+
+    library_path: Path to the footprint libraries
+    library: Library name, for example: 'LED_SMD'
+    name: Footprint name, for example: 'LED_1210_3225Metric'
+    """
+    template = _load_footprint_template(library_path, library, name)
+    return pcbnew.Cast_to_FOOTPRINT(template.Duplicate())
+
+
+def clear_footprint_cache():
+    """Discard all cached footprint templates and library indexes
+
+    Use this if the footprint library files have changed on disk.
+    """
+    _load_footprint_template.cache_clear()
+    get_library_index.cache_clear()
+
+
+def _make_zip(output, filenames, compresslevel=5):
     """Create a zip file
 
     Create a zip file containing the given files. The files will be written to
     the root directory of the zip, with any relative paths stripped.
 
-    output_name: Name of the output zip file (will be overwritten if exists)
+    The zip is written sequentially, so the output can be a stream that
+    doesn't support seeking.
+
+    output: Name of the output zip file (will be overwritten if exists), or
+            a writable file-like object
     filenames: Full paths of files to write to the zip file
+    compresslevel: Deflate compression level, from 0 (none) to 9 (best)
     """
-    with zipfile.ZipFile(output_name, 'w') as of:
+    with zipfile.ZipFile(output, 'w') as of:
         for filename in filenames:
             path = Path(filename)
             of.write(filename,
                      arcname=path.name,
                      compress_type=zipfile.ZIP_DEFLATED,
-                     compresslevel=5)
+                     compresslevel=compresslevel)
+
+
+def _is_file_object(output):
+    """Check if an output is a file-like object, rather than a file name"""
+    return hasattr(output, 'write')
+
+
+def _mm_to_nm_many(values, count):
+    """Convert a scalar or per-item list of sizes in mm, to board units
+
+    values: Size (mm), or list of sizes with one entry per item
+    count: Number of items
+    returns: List of sizes (nm), one per item
+    """
+    values = numpy.broadcast_to(numpy.asarray(values, dtype=float), (count,))
+    return numpy.rint(values * 1e6).astype(numpy.int64).tolist()
+
+
+def _arc_points(centers, radii, starts, ends):
+    """Compute the start, middle, and end points of a list of arcs
+
+    centers: Nx2 array (or list of x,y pairs) of arc centers (mm)
+    radii: Arc radius (mm), or list of radii with one entry per arc
+    starts: Starting angle (degrees), or list with one entry per arc
+    ends: Ending angle (degrees), or list with one entry per arc
+    returns: Tuple of three Nx2 numpy arrays: start, middle, end points (mm)
+    """
+    centers = numpy.asarray(centers, dtype=float).reshape(-1, 2)
+    count = len(centers)
+
+    radii = numpy.broadcast_to(numpy.asarray(radii, dtype=float), (count,))
+    starts = numpy.broadcast_to(numpy.asarray(starts, dtype=float), (count,))
+    ends = numpy.broadcast_to(numpy.asarray(ends, dtype=float), (count,))
+
+    def points(angles):
+        angles = numpy.radians(angles)
+        return centers + numpy.column_stack((radii * numpy.cos(angles),
+                                             radii * numpy.sin(angles)))
+
+    return points(starts), points((ends - starts) / 2 + starts), points(ends)
+
+
+def _segment_bboxes(starts, ends, widths):
+    """Compute the bounding boxes of a list of line segments
+
+    starts: Nx2 array of starting points (mm)
+    ends: Nx2 array of ending points (mm)
+    widths: Line width (mm), or list of widths with one entry per segment
+    returns: Nx4 array of left, top, right, bottom (mm)
+    """
+    starts = numpy.asarray(starts, dtype=float).reshape(-1, 2)
+    ends = numpy.asarray(ends, dtype=float).reshape(-1, 2)
+    margin = numpy.broadcast_to(numpy.asarray(widths, dtype=float),
+                                (len(starts),))[:, numpy.newaxis] / 2
+    return numpy.hstack((numpy.minimum(starts, ends) - margin,
+                         numpy.maximum(starts, ends) + margin))
+
+
+def _arc_bboxes(centers, radii, starts, ends, widths):
+    """Compute the bounding boxes of a list of arcs
+
+    The arcs run from the starting angle to the ending angle, through the
+    angle half way between them (see _arc_points()).
+
+    centers: Nx2 array (or list of x,y pairs) of arc centers (mm)
+    radii: Arc radius (mm), or list of radii with one entry per arc
+    starts: Starting angle (degrees), or list with one entry per arc
+    ends: Ending angle (degrees), or list with one entry per arc
+    widths: Line width (mm), or list of widths with one entry per arc
+    returns: Nx4 array of left, top, right, bottom (mm)
+    """
+    arc_starts, _, arc_ends = _arc_points(centers, radii, starts, ends)
+    count = len(arc_starts)
+    centers = numpy.asarray(centers, dtype=float).reshape(-1, 2)
+    radii = numpy.broadcast_to(numpy.asarray(radii, dtype=float), (count,))
+    starts = numpy.broadcast_to(numpy.asarray(starts, dtype=float), (count,))
+    ends = numpy.broadcast_to(numpy.asarray(ends, dtype=float), (count,))
+
+    low = numpy.minimum(starts, ends)
+    high = numpy.maximum(starts, ends)
+
+    def crosses(angle):
+        # Check if the arc passes through an angle, or a turn of it
+        return low + (angle - low) % 360 <= high
+
+    bboxes = _segment_bboxes(arc_starts, arc_ends, 0)
+    bboxes[:, 0] = numpy.where(crosses(180), centers[:, 0] - radii,
+                               bboxes[:, 0])
+    bboxes[:, 1] = numpy.where(crosses(270), centers[:, 1] - radii,
+                               bboxes[:, 1])
+    bboxes[:, 2] = numpy.where(crosses(0), centers[:, 0] + radii,
+                               bboxes[:, 2])
+    bboxes[:, 3] = numpy.where(crosses(90), centers[:, 1] + radii,
+                               bboxes[:, 3])
+
+    margin = numpy.broadcast_to(numpy.asarray(widths, dtype=float),
+                                (count,))[:, numpy.newaxis] / 2
+    return bboxes + numpy.hstack((-margin, -margin, margin, margin))
+
+
+def _circle_segments(radius, max_error, min_segments, max_segments):
+    """Calculate the number of segments needed to approximate a circle
+
+    radius: Circle radius (mm)
+    max_error: Maximum distance between the circle and a segment (mm)
+    min_segments: Minimum number of segments to use
+    max_segments: Maximum number of segments to use
+    """
+    if radius <= max_error:
+        return min_segments
+
+    # Each segment subtends 2*theta, with a chord error of r*(1-cos(theta))
+    segments = math.ceil(math.pi / math.acos(1 - max_error / radius))
+    return max(min_segments, min(segments, max_segments))
+
+
+_async_export_limit = os.cpu_count() or 1
+_async_export_semaphores = weakref.WeakKeyDictionary()
+_async_save_locks = weakref.WeakKeyDictionary()
+
+
+def set_async_export_limit(limit):
+    """Set the maximum number of kicad-cli processes run by async exports
+
+    The limit is shared by all CircuitPainter instances, and applies to
+    exports started after it is changed.
+
+    limit: Maximum number of kicad-cli processes to run at the same time
+    """
+    global _async_export_limit  # pylint: disable=global-statement
+    _async_export_limit = limit
+    _async_export_semaphores.clear()
+
+
+def _get_async_export_semaphore():
+    """Get the semaphore limiting kicad-cli processes in this event loop"""
+    loop = asyncio.get_running_loop()
+    semaphore = _async_export_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(_async_export_limit)
+        _async_export_semaphores[loop] = semaphore
+    return semaphore
+
+
+def _get_async_save_lock():
+    """Get the lock that serializes board saves by async exports in this
+    event loop"""
+    loop = asyncio.get_running_loop()
+    lock = _async_save_locks.get(loop)
+    if lock is None:
+        lock = asyncio.Lock()
+        _async_save_locks[loop] = lock
+    return lock
+
+
+async def _run_async(command, cwd):
+    """Run a command in a subprocess, without blocking the event loop
+
+    If the task is cancelled (or times out), the process is killed.
+
+    command: Command to run
+    cwd: Working directory for the command
+    """
+    async with _get_async_export_semaphore():
+        process = await asyncio.create_subprocess_exec(*command, cwd=cwd)
+        try:
+            returncode = await process.wait()
+        except BaseException:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command)
+
+
+async def _run_all_async(commands, cwd):
+    """Run several commands in parallel, without blocking the event loop
+
+    If any of the commands fail, or the task is cancelled, the remaining
+    processes are killed.
+
+    commands: List of commands to run
+    cwd: Working directory for the commands
+    """
+    tasks = [asyncio.ensure_future(_run_async(command, cwd))
+             for command in commands]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
 
 
 class CircuitPainter:
 
-    layers = {
-        "Edge_Cuts": pcbnew.Edge_Cuts,  # Board outline
-
-        "F_Cu": pcbnew.F_Cu,            # Front copper
-        "F_SilkS": pcbnew.F_SilkS,      # Front silkscreen
-        "F_Mask": pcbnew.F_Mask,        # Front soldermask
-        "F_Paste": pcbnew.F_Paste,      # Front solder paste
-        "F_Adhes": pcbnew.F_Adhes,      # Front glue
-        "F_CrtYd": pcbnew.F_CrtYd,      # Front component courtyards
-        "F_Fab": pcbnew.F_Fab,          # Front fabrication notes
-
-        "B_Cu": pcbnew.B_Cu,            # Bottom copper
-        "B_SilkS": pcbnew.B_SilkS,      # Bottom silkscreen
-        "B_Mask": pcbnew.B_Mask,        # Bottom soldermask
-        "B_Paste": pcbnew.B_Paste,      # Bottom solder paste
-        "B_Adhes": pcbnew.B_Adhes,      # Bottom glue
-        "B_CrtYd": pcbnew.B_CrtYd,      # Bottom component courtyards
-        "B_Fab": pcbnew.B_Fab,          # Bottom fabrication notes
+    layers = _LayerTable([
+        "Edge_Cuts",  # Board outline
+
+        "F_Cu",       # Front copper
+        "F_SilkS",    # Front silkscreen
+        "F_Mask",     # Front soldermask
+        "F_Paste",    # Front solder paste
+        "F_Adhes",    # Front glue
+        "F_CrtYd",    # Front component courtyards
+        "F_Fab",      # Front fabrication notes
+
+        "B_Cu",       # Bottom copper
+        "B_SilkS",    # Bottom silkscreen
+        "B_Mask",     # Bottom soldermask
+        "B_Paste",    # Bottom solder paste
+        "B_Adhes",    # Bottom glue
+        "B_CrtYd",    # Bottom component courtyards
+        "B_Fab",      # Bottom fabrication notes
 
         # User drawings: Use for dimensions, etc.
-        "Dwgs_User": pcbnew.Dwgs_User,
-        "Cmts_User": pcbnew.Cmts_User,
-        "Eco1_User": pcbnew.Eco1_User,
-        "Eco2_User": pcbnew.Eco2_User,
-        "Margin": pcbnew.Margin,
-        "Rescue": pcbnew.Rescue,
-
-        "User_1": pcbnew.User_1,
-        "User_2": pcbnew.User_2,
-        "User_3": pcbnew.User_3,
-        "User_4": pcbnew.User_4,
-        "User_5": pcbnew.User_5,
-        "User_6": pcbnew.User_6,
-        "User_7": pcbnew.User_7,
-        "User_8": pcbnew.User_8,
-        "User_9": pcbnew.User_9,
-
-        "In1_Cu": pcbnew.In1_Cu,
-        "In2_Cu": pcbnew.In2_Cu,
-        "In3_Cu": pcbnew.In3_Cu,
-        "In4_Cu": pcbnew.In4_Cu,
-        "In5_Cu": pcbnew.In5_Cu,
-        "In6_Cu": pcbnew.In6_Cu,
-        "In7_Cu": pcbnew.In7_Cu,
-        "In8_Cu": pcbnew.In8_Cu,
-        "In9_Cu": pcbnew.In9_Cu,
-        "In10_Cu": pcbnew.In10_Cu,
-        "In11_Cu": pcbnew.In11_Cu,
-        "In12_Cu": pcbnew.In12_Cu,
-        "In13_Cu": pcbnew.In13_Cu,
-        "In14_Cu": pcbnew.In14_Cu,
-        "In15_Cu": pcbnew.In15_Cu,
-        "In16_Cu": pcbnew.In16_Cu,
-        "In17_Cu": pcbnew.In17_Cu,
-        "In18_Cu": pcbnew.In18_Cu,
-        "In19_Cu": pcbnew.In19_Cu,
-        "In20_Cu": pcbnew.In20_Cu,
-        "In21_Cu": pcbnew.In21_Cu,
-        "In22_Cu": pcbnew.In22_Cu,
-        "In23_Cu": pcbnew.In23_Cu,
-        "In24_Cu": pcbnew.In24_Cu,
-        "In25_Cu": pcbnew.In25_Cu,
-        "In26_Cu": pcbnew.In26_Cu,
-        "In27_Cu": pcbnew.In27_Cu,
-        "In28_Cu": pcbnew.In28_Cu,
-        "In29_Cu": pcbnew.In29_Cu,
-        "In30_Cu": pcbnew.In30_Cu,
-    }
-    """ Board layers, from pcbnew
+        "Dwgs_User",
+        "Cmts_User",
+        "Eco1_User",
+        "Eco2_User",
+        "Margin",
+        "Rescue",
+
+        "User_1",
+        "User_2",
+        "User_3",
+        "User_4",
+        "User_5",
+        "User_6",
+        "User_7",
+        "User_8",
+        "User_9",
+
+        "In1_Cu",
+        "In2_Cu",
+        "In3_Cu",
+        "In4_Cu",
+        "In5_Cu",
+        "In6_Cu",
+        "In7_Cu",
+        "In8_Cu",
+        "In9_Cu",
+        "In10_Cu",
+        "In11_Cu",
+        "In12_Cu",
+        "In13_Cu",
+        "In14_Cu",
+        "In15_Cu",
+        "In16_Cu",
+        "In17_Cu",
+        "In18_Cu",
+        "In19_Cu",
+        "In20_Cu",
+        "In21_Cu",
+        "In22_Cu",
+        "In23_Cu",
+        "In24_Cu",
+        "In25_Cu",
+        "In26_Cu",
+        "In27_Cu",
+        "In28_Cu",
+        "In29_Cu",
+        "In30_Cu",
+    ])
+    """ Board layers, from pcbnew. The layer IDs are looked up the first time
+    the table is used.
 
     see: https://gitlab.com/kicad/code/kicad/-/blob/master/include/layer_ids.h
     """
@@ -137,7 +459,9 @@ class CircuitPainter:
             self,
             filename=None,
             library_path=None,
-            preserve_origin=False):
+            preserve_origin=False,
+            export_cache=None,
+            seed=None):
         """ Create a Circuit Builder context
 
         :param filename: (optional) If specified, load the given PCB. If not
@@ -146,40 +470,95 @@ class CircuitPainter:
         :param preserve_origin: By default, Circuit Painter translates the
              board origin to (40,40), so that the board will be inside of the
              title block. Set this to false to keep the origin at (0,0).
+        :param export_cache: (optional) ExportCache, or directory to use as an
+             export cache. If specified, exporting a board that hasn't
+             changed since it was last exported copies the output from the
+             cache instead of running kicad-cli again.
+        :param seed: (optional) If specified, the UUIDs of all generated items
+             are derived from the seed and the order in which the items are
+             created, instead of being random. Running the same script with
+             the same seed will then produce identical board files.
         """
 
         if library_path is None:
-            library_path = _guess_footprint_library_path()
+            library_path = self._default_library_path()
 
         self.tempdir = TemporaryDirectory()
 
-        if filename is not None:
-            self.filename = filename
-            self.pcb = pcbnew.LoadBoard(filename)
+        self.library_path = library_path
+
+        if export_cache is not None and not isinstance(
+                export_cache, ExportCache):
+            export_cache = ExportCache(export_cache)
+        self.export_cache = export_cache
+
+        self._init_draw_state()
+        self.next_designators = {}
+
+        # Keep a list of all components added to the board, and a count of
+        # the UUIDs generated so far (if in deterministic mode). The count
+        # goes into the keys the UUIDs are derived from.
+        self.uuids = []
+        self.uuid_count = 0
+
+        if seed is not None:
+            self.uuid_namespace = uuid.uuid5(_UUID_NAMESPACE, str(seed))
         else:
-            # Note: Use NewBoard here because CreateEmptyBoard is buggy, see:
-            # https://gitlab.com/kicad/code/kicad/-/issues/15619
-            self.filename = f"{self.tempdir.name}/board.kicad_pcb"
-            self.pcb = pcbnew.NewBoard(self.filename)
+            self.uuid_namespace = None
 
-        self.library_path = library_path
+        # Lookup tables for nets, footprints and pads, so that they don't
+        # have to be searched for on the board.
+        self.nets = {}
+        self.footprints = {}
+        self.pads = {}
+
+        # Number of items on each layer, used to skip empty layers on export
+        self.layer_counts = collections.Counter()
+
+        # Types, layers, nets and extents of the generated items
+        self.registry = ItemRegistry()
 
+        self._init_board(filename)
+
+        # Start drawing at position 50, 50 on the circuit board canvas, so that it
+        # fits in the sheet nicely.
+        if not preserve_origin:
+            self.translate(50, 50)
+
+    def _init_draw_state(self):
+        """ Set the transform and the draw settings to their defaults """
         self.transform = TransformMatrix()
-        self.next_designators = {}
 
-        # Default draw settings
         self.draw_width = 0.1
         self.draw_layer = "F_Cu"
         self.draw_fill = False
         self.show_reference_designators = False
+        self.arc_max_error = 0.01
+        self.arc_min_segments = 12
+        self.arc_max_segments = 1024
+
+    def _init_board(self, filename):
+        """ Create or load the pcbnew board
+
+        :param filename: Board file to load, or None to create a new board
+        """
+        if filename is not None:
+            self.filename = filename
+            self.pcb = pcbnew.LoadBoard(filename)
+        else:
+            # Note: Use NewBoard here because CreateEmptyBoard is buggy, see:
+            # https://gitlab.com/kicad/code/kicad/-/issues/15619
+            self.filename = f"{self.tempdir.name}/board.kicad_pcb"
+            self.pcb = pcbnew.NewBoard(self.filename)
 
         # Put all generated items into a group, to make them easier to
         # identify.
         self.group = pcbnew.PCB_GROUP(self.pcb)
+        if self.uuid_namespace is not None:
+            self._set_uuid(self.group, 'group')
         self.pcb.Add(self.group)
 
-        # Keep a list of all components added to the board
-        self.uuids = []
+        self._index_board()
 
         # Workaround for another issue: https://gitlab.com/kicad/code/kicad/-/issues/14901
         # We can only run DRC once, but if any DRC settings are updated with
@@ -189,10 +568,105 @@ class CircuitPainter:
         # once before the _fill_zones command is called.
         self.is_drc_run = False
 
-        # Start drawing at position 50, 50 on the circuit board canvas, so that it
-        # fits in the sheet nicely.
-        if not preserve_origin:
-            self.translate(50, 50)
+        # Items added since the zones were last filled. Only zones that
+        # overlap these items need to be re-filled.
+        self.unfilled_items = []
+        self.zones_filled = False
+
+        # Number of items on the board when the zones were last filled, used
+        # to notice items that were added or removed through the pcbnew API
+        self.filled_item_count = 0
+
+    @staticmethod
+    def _default_library_path():
+        """ Get the footprint library path to use if none was specified
+
+        returns: Path to the KiCad footprint library
+        """
+        return _guess_footprint_library_path()
+
+    def fork(self):
+        """ Create an independent copy of the painter
+
+        The copy starts with the same board, transform stack, draw settings,
+        reference designator counters and lookup tables as this painter, but
+        anything drawn on it afterwards doesn't affect this painter (and the
+        reverse). Use this to build a shared base design (outline, mounting
+        holes, connectors, ...) once, then branch each variant from it.
+
+        pcbnew can't copy a board in memory, so the board is saved to a file
+        and loaded back with LoadBoard(). This takes about as long as saving
+        the board does. The copy's filename points to the new board file.
+
+        If the painter has a seed, the copy keeps generating the same UUIDs
+        that the original would, so forks of the same design are
+        reproducible.
+
+        :return: New painter
+        """
+        clone = copy.copy(self)
+        clone.tempdir = TemporaryDirectory()
+        clone.filename = f"{clone.tempdir.name}/board.kicad_pcb"
+        clone.transform = self.transform.copy()
+        clone.next_designators = dict(self.next_designators)
+        clone.uuids = list(self.uuids)
+        clone.nets = dict(self.nets)
+        clone.footprints = dict(self.footprints)
+        clone.pads = dict(self.pads)
+        clone.layer_counts = collections.Counter(self.layer_counts)
+        clone.registry = self.registry.copy()
+
+        # pylint: disable-next=protected-access
+        clone._fork_board()
+        return clone
+
+    def _fork_board(self):
+        """ Replace the board with a copy of itself
+
+        This is called on the new painter created by fork(), which starts
+        out sharing the board of the original painter.
+        """
+        # pcbnew can't copy a board in memory, so go through a board file in
+        # the new painter's temporary directory. The design settings are
+        # saved to the project file next to it.
+        group_uuid = self.group.m_Uuid.AsString()
+        self.pcb.Save(self.filename)
+        self.pcb = pcbnew.LoadBoard(self.filename)
+
+        # Empty groups aren't saved, so it might need to be re-created
+        for group in self.pcb.Groups():
+            if group.m_Uuid.AsString() == group_uuid:
+                self.group = group
+                break
+        else:
+            self.group = pcbnew.PCB_GROUP(self.pcb)
+            self.group.m_Uuid.Clone(pcbnew.KIID(group_uuid))
+            self.pcb.Add(self.group)
+        items = {item.m_Uuid.AsString(): item.Cast()
+                 for item in self.group.GetItems()}
+
+        # Keep the items in the order that they were created, rather than
+        # the order of the group, so that the saved group is the same
+        self.uuids = [items[key].m_Uuid
+                      for key in (kiid.AsString() for kiid in self.uuids)
+                      if key in items]
+        self.registry.objects = [
+            items[item.m_Uuid.AsString()] if item is not None else None
+            for item in self.registry.objects]
+
+        # The lookup tables have to point to the items on the new board
+        self.nets = {}
+        self.footprints = {}
+        self.pads = {}
+        self.layer_counts = collections.Counter()
+        self._index_board()
+
+        # The zone fills are copied, but the list of items that haven't been
+        # filled can't be, so re-fill everything if it isn't up to date.
+        self.is_drc_run = False
+        if len(self.unfilled_items) > 0:
+            self.zones_filled = False
+        self.unfilled_items = []
 
     def width(self, width):
         """ Set the width to use for drawing commands
@@ -210,6 +684,22 @@ class CircuitPainter:
         """
         self.draw_layer = layer
 
+    def arc_resolution(self, max_error, min_segments=12, max_segments=1024):
+        """ Set the resolution used to approximate curves with line segments
+
+        This is used by drawing commands such as circle_zone(), that build
+        curved shapes out of straight line segments. The number of segments is
+        chosen so that the approximation is never further than max_error from
+        the true curve.
+
+        :param max_error: Maximum approximation error (mm)
+        :param min_segments: (optional) Minimum segments to use for a circle
+        :param max_segments: (optional) Maximum segments to use for a circle
+        """
+        self.arc_max_error = max_error
+        self.arc_min_segments = min_segments
+        self.arc_max_segments = max_segments
+
     def fill(self):
         """ Enable fills for drawing commands
 
@@ -263,21 +753,265 @@ class CircuitPainter:
         xp, yp = self.transform.project(x, y)
         return pcbnew.VECTOR2I_MM(round(xp, 3), round(yp, 3))
 
+    def _local_to_world_nm(self, points):
+        """ Convert an array of local coordinates in mm, to board units
+
+        Coordinates are rounded to 1um, matching _local_to_world().
+
+        :param points: Nx2 array (or list of x,y pairs) of coordinates (mm)
+        :return: Nx2 numpy array of board coordinates (nm)
+        """
+        world = self.transform.project_many(points)
+        return numpy.rint(numpy.round(world, 3) * 1e6).astype(numpy.int64)
+
+    def _local_to_world_many(self, points):
+        """ Convert a list of local coordinates in mm, to board coordinates
+
+        All points are transformed in a single array operation.
+
+        :param points: Nx2 array (or list of x,y pairs) of coordinates (mm)
+        :return: List of board coordinates
+        """
+        return self._vectors(self._local_to_world_nm(points))
+
+    @staticmethod
+    def _vectors(points):
+        """ Convert an array of board coordinates to pcbnew vectors
+
+        :param points: Nx2 array of board coordinates (nm)
+        :return: List of board coordinates
+        """
+        return [pcbnew.VECTOR2I(x, y) for x, y in points.tolist()]
+
     def _world_to_local(self, x, y):
         """ Convert a board coordinate, to a local coordinate in mm """
         absolute = pcbnew.ToMM(pcbnew.VECTOR2I(x, y))
         return self.transform.inverse_project(*absolute)
 
-    def _add_item(self, item):
+    def _add_item(self, item, flip_layer=None):
         """ Add an item to the PCB
 
         item: Item to add
+        flip_layer: (optional) Name of the layer to flip a footprint to, once
+            it is on the board but before it is recorded
         """
+        if self.uuid_namespace is not None:
+            self._assign_uuid(item)
+
         self.pcb.Add(item)
         self.group.AddItem(item)
+        if flip_layer is not None:
+            item.SetLayerAndFlip(self.layers[flip_layer])
         self.uuids.append(item.m_Uuid)
+        self.unfilled_items.append(item)
+        self.layer_counts.update(self._item_layers(item))
+        self.registry.add(item, *self._item_record(item))
+        if isinstance(item, pcbnew.FOOTPRINT):
+            self._index_footprint(item)
         return item
 
+    def _add_items(self, items, kind, layer, nets, bboxes):
+        """ Add a list of items of the same type and layer to the PCB
+
+        This is equivalent to calling _add_item() for each item, but the
+        layer counts and registry are updated once for the whole list, using
+        the geometry that the caller already computed.
+
+        items: List of items to add
+        kind: Item type, as used by select()
+        layer: Layer name
+        nets: Net name (or None) for all of the items, or list of net names
+            with one entry per item
+        bboxes: Nx4 array of the item bounding boxes (mm)
+        """
+        if len(items) == 0:
+            return items
+
+        pcb = self.pcb
+        group = self.group
+        assign_uuids = self.uuid_namespace is not None
+        for item in items:
+            if assign_uuids:
+                self._assign_uuid(item)
+            pcb.Add(item)
+            group.AddItem(item)
+
+        self.uuids.extend(item.m_Uuid for item in items)
+        self.unfilled_items.extend(items)
+
+        # Items of the same type on the same layer all draw on the same
+        # layers
+        for layer_id in self._item_layers(items[0]):
+            self.layer_counts[layer_id] += len(items)
+
+        self.registry.add_many(items, kind, layer, nets, bboxes)
+        return items
+
+    @staticmethod
+    def _item_kind(item):
+        """ Get the type of an item, as used by select()
+
+        item: Item to get the type of
+        """
+        # Note: Vias and arcs are also tracks, so check for them first
+        if isinstance(item, pcbnew.PCB_VIA):
+            return 'via'
+        if isinstance(item, pcbnew.PCB_ARC):
+            return 'arc_track'
+        if isinstance(item, pcbnew.PCB_TRACK):
+            return 'track'
+        if isinstance(item, pcbnew.ZONE):
+            return 'zone'
+        if isinstance(item, pcbnew.FOOTPRINT):
+            return 'footprint'
+        if isinstance(item, pcbnew.PCB_TEXT):
+            return 'text'
+        if isinstance(item, pcbnew.PCB_SHAPE):
+            shape = item.GetShape()
+            if shape == pcbnew.SHAPE_T_SEGMENT:
+                return 'line'
+            if shape == pcbnew.SHAPE_T_ARC:
+                return 'arc'
+            if shape == pcbnew.SHAPE_T_CIRCLE:
+                return 'circle'
+            return 'poly'
+        return 'dimension'
+
+    @staticmethod
+    def _item_bbox(item):
+        """ Get the bounding box of an item
+
+        item: Item to measure
+        returns: Tuple of left, top, right, bottom (mm)
+        """
+        box = item.GetBoundingBox()
+        return (pcbnew.ToMM(box.GetLeft()), pcbnew.ToMM(box.GetTop()),
+                pcbnew.ToMM(box.GetRight()), pcbnew.ToMM(box.GetBottom()))
+
+    def _item_record(self, item):
+        """ Describe an item for the registry
+
+        item: Item to describe
+        returns: Tuple of the item type, layer name, net name (or None), and
+            bounding box
+        """
+        net = None
+        if isinstance(item, pcbnew.BOARD_CONNECTED_ITEM):
+            net = item.GetNetname() or None
+
+        return (self._item_kind(item), self.layers.name(item.GetLayer()),
+                net, self._item_bbox(item))
+
+    @staticmethod
+    def _item_layers(item):
+        """ Get the set of layers that an item draws on
+
+        For footprints, this includes the layers of their pads and graphics.
+
+        item: Item to get the layers of
+        """
+        layers = set(item.GetLayerSet().Seq())
+
+        if isinstance(item, pcbnew.FOOTPRINT):
+            for pad in item.Pads():
+                layers.update(pad.GetLayerSet().Seq())
+            for graphic in item.GraphicalItems():
+                layers.update(graphic.GetLayerSet().Seq())
+
+        return layers
+
+    def populated_layers(self):
+        """ Get the names of the layers that contain items
+
+        Only layers that are enabled on the board are included.
+
+        :return: List of layer names, for example: ['Edge_Cuts', 'F_Cu']
+        """
+        return [name for name, layer in self.layers.items()
+                if self.layer_counts[layer] > 0
+                and self.pcb.IsLayerEnabled(layer)]
+
+    def _set_uuid(self, item, key):
+        """ Give an item a UUID derived from the seed and the given key
+
+        item: Item to set the UUID of
+        key: String that uniquely identifies the item
+        """
+        value = uuid.uuid5(self.uuid_namespace, key)
+        # Note: m_Uuid is const, but can be overwritten in-place
+        item.m_Uuid.Clone(pcbnew.KIID(str(value)))
+
+    def _assign_uuid(self, item):
+        """ Give an item (and its children) deterministic UUIDs
+
+        The UUID is derived from the item's creation order, type, layer and
+        position.
+
+        item: Item to set the UUID of
+        """
+        position = item.GetPosition()
+        key = (f"{self.uuid_count}:{item.GetClass()}:{item.GetLayer()}:"
+               f"{position.x},{position.y}")
+        self._set_uuid(item, key)
+        self.uuid_count += 1
+
+        if isinstance(item, pcbnew.FOOTPRINT):
+            children = list(item.Pads()) \
+                + list(item.GraphicalItems()) \
+                + list(item.Zones()) \
+                + [item.Reference(), item.Value()]
+            for index, child in enumerate(children):
+                self._set_uuid(child, f"{key}/{index}")
+
+    def _index_footprint(self, footprint):
+        """ Add a footprint and its pads to the lookup tables
+
+        footprint: Footprint to add
+        """
+        reference = footprint.GetReference()
+        if not self._check_reference(reference):
+            return
+
+        self.footprints[reference] = footprint
+        for pad in footprint.Pads():
+            self.pads.setdefault((reference, str(pad.GetNumber())), pad)
+
+    def _check_reference(self, reference):
+        """ Check if a footprint's reference designator can be indexed
+
+        Footprints with the same reference designator can't be told apart,
+        so only the first one is indexed, and a warning is given for the
+        rest. Pads that share a number in the same footprint are treated the
+        same way.
+
+        reference: Reference designator of the footprint
+        returns: True if the footprint should be indexed
+        """
+        if reference not in self.footprints:
+            return True
+
+        warnings.warn(
+            f"Duplicate reference designator:{reference}, get_pads() and "
+            "get_pad() will return the first footprint that uses it",
+            # Point at the call to footprint()
+            stacklevel=5)
+        return False
+
+    def _index_board(self):
+        """ Seed the lookup tables from the items already on the board """
+        for name, net in self.pcb.GetNetsByName().items():
+            self.nets[str(name)] = net
+
+        for footprint in self.pcb.GetFootprints():
+            self._index_footprint(footprint)
+
+        for items in (self.pcb.GetDrawings(),
+                      self.pcb.GetTracks(),
+                      self.pcb.GetFootprints(),
+                      self.pcb.Zones()):
+            for item in items:
+                self.layer_counts.update(self._item_layers(item))
+
     def get_object_position(self, o):
         """ Get a local coordinate for a PCB object
 
@@ -302,14 +1036,42 @@ class CircuitPainter:
         :param name: Net name (for example: gnd)
         """
 
+        net = self.nets.get(name)
+        if net is not None:
+            return net
+
         net = self.pcb.FindNet(name)
 
         if net is None:
             net = pcbnew.NETINFO_ITEM(self.pcb, name)
             self.pcb.Add(net)
 
+        self.nets[name] = net
         return net
 
+    def _find_nets(self, nets, count):
+        """ Find a list of electrical nets
+
+        Each distinct net name is only looked up once.
+
+        :param nets: Net name, or list of net names with one entry per item.
+             Names can be None, to leave the item unconnected.
+        :param count: Number of items
+        :return: List of net references (or None), one per item
+        """
+        if nets is None or isinstance(nets, str):
+            nets = [nets] * count
+        elif len(nets) != count:
+            raise ValueError(
+                f'Incorrect number of nets provided, expected:{count} got:{len(nets)}')
+
+        found = {None: None}
+        for name in nets:
+            if name not in found:
+                found[name] = self._find_net(name)
+
+        return [found[name] for name in nets]
+
     def track(self, x1, y1, x2, y2, net=None):
         """ Place a PCB track
 
@@ -330,6 +1092,44 @@ class CircuitPainter:
 
         return self._add_item(track)
 
+    def tracks(self, segments, net=None):
+        """ Place a list of PCB tracks
+
+        This is equivalent to calling track() for each segment, but
+        transforms all of the coordinates in a single step.
+
+        :param segments: Nx4 array (or list of x1,y1,x2,y2 lists) of track
+             starting and ending points (mm)
+        :param net: (optional) Net to connect tracks to, or list of net
+             names with one entry per track
+        :return: List of the created tracks
+        """
+        world = self._local_to_world_nm(numpy.reshape(segments, (-1, 2)))
+        points = self._vectors(world)
+        count = len(points) // 2
+
+        pcb = self.pcb
+        width = pcbnew.FromMM(self.draw_width)
+        layer = self.layers[self.draw_layer]
+        nets = self._find_nets(net, count)
+        tracks = []
+
+        for start, end, track_net in zip(points[0::2], points[1::2], nets):
+            track = pcbnew.PCB_TRACK(pcb)
+            track.SetWidth(width)
+            track.SetLayer(layer)
+            track.SetStart(start)
+            track.SetEnd(end)
+            if track_net is not None:
+                track.SetNet(track_net)
+
+            tracks.append(track)
+
+        world = world / 1e6
+        return self._add_items(
+            tracks, 'track', self.draw_layer, net,
+            _segment_bboxes(world[0::2], world[1::2], self.draw_width))
+
     def arc_track(self, x, y, radius, start, end, net=None):
         """ Draw an arc-shaped PCB track
 
@@ -366,6 +1166,64 @@ class CircuitPainter:
 
         return self._add_item(track)
 
+    def arc_tracks(self, centers, radii, starts, ends, net=None):
+        """ Place a list of arc-shaped PCB tracks
+
+        This is equivalent to calling arc_track() for each arc, but computes
+        and transforms all of the coordinates in a single step.
+
+        :param centers: Nx2 array (or list of x,y pairs) of arc centers (mm)
+        :param radii: arc radius (mm), or list of radii
+        :param starts: starting angle of arcs (degrees), or list of angles
+        :param ends: ending angle of arcs (degrees), or list of angles
+        :param net: (optional) Net to connect tracks to, or list of net
+             names with one entry per track
+        :return: List of the created tracks
+        """
+        arc_starts, arc_mids, arc_ends = _arc_points(
+            centers, radii, starts, ends)
+        count = len(arc_starts)
+        points = self._local_to_world_many(
+            numpy.concatenate((arc_starts, arc_mids, arc_ends)))
+
+        pcb = self.pcb
+        width = pcbnew.FromMM(self.draw_width)
+        layer = self.layers[self.draw_layer]
+        nets = self._find_nets(net, count)
+        tracks = []
+
+        for start, mid, end, track_net in zip(points[:count],
+                                              points[count:2 * count],
+                                              points[2 * count:],
+                                              nets):
+            track = pcbnew.PCB_ARC(pcb)
+            track.SetWidth(width)
+            track.SetLayer(layer)
+            track.SetStart(start)
+            track.SetMid(mid)
+            track.SetEnd(end)
+            if track_net is not None:
+                track.SetNet(track_net)
+
+            tracks.append(track)
+
+        return self._add_items(
+            tracks, 'arc_track', self.draw_layer, net,
+            self._world_arc_bboxes(centers, radii, starts, ends))
+
+    def _world_arc_bboxes(self, centers, radii, starts, ends):
+        """ Compute the board bounding boxes of a list of arcs
+
+        See _arc_bboxes(). The arcs are drawn with the current width.
+
+        :return: Nx4 array of left, top, right, bottom (mm)
+        """
+        rotation = self.transform.get_angle()
+        return _arc_bboxes(self.transform.project_many(centers), radii,
+                           numpy.subtract(starts, rotation),
+                           numpy.subtract(ends, rotation),
+                           self.draw_width)
+
     def via(self, x, y, net=None, d=.3, w=.6):
         """ Place a via
 
@@ -385,6 +1243,48 @@ class CircuitPainter:
 
         return self._add_item(via)
 
+    def vias(self, points, net=None, d=.3, w=.6):
+        """ Place a list of vias
+
+        This is equivalent to calling via() for each point, but transforms
+        all of the coordinates in a single step, and is much faster for
+        large via arrays.
+
+        :param points: Nx2 array (or list of x,y pairs) of via coordinates (mm)
+        :param net: (optional) name of net to connect vias to, or list of
+             net names with one entry per via
+        :param d: (optional) drill diameter (mm), or list of diameters with
+             one entry per via
+        :param w: (optional) annular ring diameter (mm), or list of diameters
+             with one entry per via
+        :return: List of the created vias
+        """
+        world = self._local_to_world_nm(points)
+        positions = world.tolist()
+        count = len(positions)
+
+        drills = _mm_to_nm_many(d, count)
+        widths = _mm_to_nm_many(w, count)
+        nets = self._find_nets(net, count)
+
+        pcb = self.pcb
+        vias = []
+
+        for (x, y), drill, width, via_net in zip(
+                positions, drills, widths, nets):
+            via = pcbnew.PCB_VIA(pcb)
+            via.SetPosition(pcbnew.VECTOR2I(x, y))
+            via.SetDrill(drill)
+            via.SetWidth(width)
+            if via_net is not None:
+                via.SetNet(via_net)
+
+            vias.append(via)
+
+        world = world / 1e6
+        return self._add_items(vias, 'via', 'F_Cu', net,
+                               _segment_bboxes(world, world, w))
+
     def poly_zone(self, points, net=None):
         """ Place a polygonal zone
 
@@ -393,17 +1293,25 @@ class CircuitPainter:
         :param points: List of x,y coordinates that make up the polygon (mm)
         :param net: (optional) name of net to connect zone to.
         """
-        p_world = [self._local_to_world(point[0], point[1]) for point in points]
-        v = pcbnew.VECTOR_VECTOR2I(p_world)
+        v = pcbnew.VECTOR_VECTOR2I(self._local_to_world_many(points))
+
+        zone = self._new_zone(net)
+        zone.AddPolygon(v)
 
+        return self._add_item(zone)
+
+    def _new_zone(self, net):
+        """ Create an empty zone on the current layer
+
+        :param net: name of net to connect zone to, or None
+        """
         zone = pcbnew.ZONE(self.pcb)
         zone.SetLayer(self.layers[self.draw_layer])
-        zone.AddPolygon(v)
         zone.SetIsFilled(True)
         if net is not None:
             zone.SetNet(self._find_net(net))
 
-        return self._add_item(zone)
+        return zone
 
     def rect_zone(self, x1, y1, x2, y2, net=None):
         """ Place a rectangular zone
@@ -420,28 +1328,48 @@ class CircuitPainter:
         points = [[x1, y1], [x1, y2], [x2, y2], [x2, y1]]
         return self.poly_zone(points, net)
 
-    def circle_zone(self, x, y, radius, net=None):
+    def circle_zone(self, x, y, radius, net=None, arcs=False):
         """ Place a circular zone
 
         Zones can be placed on both copper and non-copper layers
 
-        Note that the zone is made of a line segments that approximate the
-        circle.
+        Note that by default, the zone is made of a line segments that
+        approximate the circle. The number of segments is set by
+        arc_resolution().
 
         :param x: center of circle (mm)
         :param y: center of circle (mm)
         :param radius: radius of circle (mm)
         :param net: (optional) name of net to connect rectangle to
+        :param arcs: (optional) If true, make the zone outline from two arcs
+             instead of line segments. KiCad will still approximate the arcs
+             when filling the zone.
         """
 
-        resolution = 0.5  # approximation resolution, in mm
+        if arcs:
+            points = self._local_to_world_many([[x + radius, y],
+                                                [x, y + radius],
+                                                [x - radius, y],
+                                                [x, y - radius]])
+
+            chain = pcbnew.SHAPE_LINE_CHAIN()
+            chain.Append(pcbnew.SHAPE_ARC(points[0], points[1], points[2], 0))
+            chain.Append(pcbnew.SHAPE_ARC(points[2], points[3], points[0], 0))
+            chain.SetClosed(True)
+
+            zone = self._new_zone(net)
+            zone.Outline().AddOutline(chain)
 
-        c = 2 * math.pi * radius
-        segments = int(c / resolution)
+            return self._add_item(zone)
 
-        angles = [s / segments * 2 * math.pi for s in range(0, segments)]
-        points = [[x + radius * math.cos(a),
-                   y + radius * math.sin(a)] for a in angles]
+        segments = _circle_segments(radius,
+                                    self.arc_max_error,
+                                    self.arc_min_segments,
+                                    self.arc_max_segments)
+
+        angles = numpy.arange(segments) / segments * 2 * math.pi
+        points = numpy.column_stack((x + radius * numpy.cos(angles),
+                                     y + radius * numpy.sin(angles)))
 
         return self.poly_zone(points, net)
 
@@ -450,7 +1378,7 @@ class CircuitPainter:
             x,
             y,
             library,
-            name,
+            name=None,
             reference='P?',
             angle=0,
             nets=None,
@@ -464,7 +1392,11 @@ class CircuitPainter:
         :param library: Library name, relative to the system library path. To change
                  the system library path, edit the 'library_path' variable.
                  For example: 'LED_SMD'
-        :param name: Part name, for example: LED_1210_3225Metric
+        :param name: Part name, for example: LED_1210_3225Metric. If the name
+                 is not given, the library parameter is used to look up the
+                 part instead, either as 'library:name' (for example:
+                 'LED_SMD:LED_1210_3225Metric'), or as a bare part name if it
+                 is only present in one library.
         :param reference: (optional) Reference designator to assign to part. There
                    are three options:
                    1. If you don't care about the designator, leave this as
@@ -486,21 +1418,11 @@ class CircuitPainter:
               happily make connections that will damage your part.
         """
 
-        if reference.endswith('?'):
-            designator = self.next_designators.get(reference, 1)
-            self.next_designators[reference] = designator + 1
-            reference = f'{reference[:-1]}{designator}'
+        reference = self._next_reference(reference)
+        library_path, library, name = self._resolve_footprint(
+            library, name, library_path)
 
-        if library_path is None:
-            library_path = self.library_path
-
-        # TODO: This creates DRC warinings; possibly the footprint needs to be loaded through
-        # library that's already linked to the project?
-        footprint = pcbnew.FootprintLoad(
-            f"{library_path}/{library}.pretty", name)
-        if footprint is None:
-            raise IOError(
-                f"Footprint {name} in library:{library_path}/{library}.pretty not found")
+        footprint = _load_footprint(library_path, library, name)
 
         footprint.SetPosition(self._local_to_world(x, y))
         footprint.SetOrientation(
@@ -519,15 +1441,49 @@ class CircuitPainter:
             for net, pad in zip(nets, footprint.Pads()):
                 pad.SetNet(self._find_net(net))
 
-        self._add_item(footprint)
-
         # Move the footprint to the back side if we are on the B_Cu layer
         # TODO: do this based on the 'side' of the current layer?
-        if self.draw_layer == 'B_Cu':
-            footprint.SetLayerAndFlip(self.layers['B_Cu'])
+        flip_layer = 'B_Cu' if self.draw_layer == 'B_Cu' else None
+        self._add_item(footprint, flip_layer)
 
         return footprint
 
+    def _next_reference(self, reference):
+        """ Get the reference designator to use for a new footprint
+
+        :param reference: Reference designator, or prefix followed by '?' to
+             assign the next sequential designator. See footprint().
+        """
+        if reference.endswith('?'):
+            designator = self.next_designators.get(reference, 1)
+            self.next_designators[reference] = designator + 1
+            reference = f'{reference[:-1]}{designator}'
+
+        return reference
+
+    def _resolve_footprint(self, library, name, library_path):
+        """ Find a footprint in the library index
+
+        The footprint is checked against the library index, so that typos
+        are reported (with suggestions) without trying to load the file.
+
+        :param library: Library name, or library:name if name is None
+        :param name: Footprint name, or None
+        :param library_path: Path to the footprint libraries, or None to use
+             the default path
+        :return: Tuple of library path, library, and name
+        """
+        if library_path is None:
+            library_path = self.library_path
+
+        index = get_library_index(library_path)
+        if name is None:
+            library, name = index.resolve(library)
+        else:
+            index.find(library, name)
+
+        return library_path, library, name
+
     def get_pads(self, reference):
         """ Get a list of the pads in the specified footprint
 
@@ -535,11 +1491,113 @@ class CircuitPainter:
                    LED1
         """
 
-        for footprint in self.pcb.GetFootprints():
-            if reference == footprint.GetReference():
-                return footprint.Pads()
+        footprint = self.footprints.get(reference)
+        if footprint is None:
+            return None
+
+        return footprint.Pads()
+
+    def get_pad(self, reference, number):
+        """ Get a single pad from the specified footprint
+
+        :param reference: Reference designator of the footprint. For example:
+                   LED1
+        :param number: Pad number. For example: 1
+        :return: The pad, or None if it doesn't exist
+        """
+
+        return self.pads.get((reference, str(number)))
 
-        return None
+    def place_block(self, block, x=0, y=0, angle=0, **fields):
+        """ Place a copy of a block
+
+        The block's origin is placed at x, y, and the block is rotated by
+        angle.
+
+        :param block: Block to place
+        :param x: (optional) x position of the block origin (mm)
+        :param y: (optional) y position of the block origin (mm)
+        :param angle: (optional) Rotation angle (degrees)
+        :param fields: (optional) Values for the fields in the block's net
+             names and footprint references. For example, i=3 turns
+             'led_{i}' into 'led_3'.
+        """
+        self.push_matrix()
+        self.translate(x, y)
+        self.rotate(angle)
+        transform = self.transform.copy()
+        self.pop_matrix()
+
+        block.instantiate([transform], [fields]).replay(self)
+
+    def repeat_polar(self, block, n, radius=0, start=0, step=None, **fields):
+        """ Place copies of a block around the origin
+
+        Copy i is rotated by start + i * step degrees around the origin,
+        then moved by radius along its rotated x axis. Besides the given
+        fields, the fields 'i' (the copy index) and 'angle' (the copy's
+        rotation, in degrees) can be used in the block's net names and
+        footprint references.
+
+        :param block: Block to place
+        :param n: Number of copies
+        :param radius: (optional) Distance from the origin to each copy (mm)
+        :param start: (optional) Rotation of the first copy (degrees)
+        :param step: (optional) Rotation between copies (degrees). Defaults
+             to spacing the copies evenly around a full circle.
+        :param fields: (optional) Values for additional fields
+        """
+        if step is None:
+            step = 360 / n
+
+        transforms = []
+        instances = []
+        for index in range(n):
+            angle = start + index * step
+
+            self.push_matrix()
+            self.rotate(angle)
+            self.translate(radius, 0)
+            transforms.append(self.transform.copy())
+            self.pop_matrix()
+
+            instances.append(dict(fields, i=index, angle=angle))
+
+        block.instantiate(transforms, instances).replay(self)
+
+    def repeat_grid(self, block, cols, rows, pitch, **fields):
+        """ Place copies of a block in a grid
+
+        The first copy is placed at the origin, and the grid extends along
+        the positive x and y axes. Besides the given fields, the fields 'i'
+        (the copy index, row * cols + col), 'col', and 'row' can be used in
+        the block's net names and footprint references.
+
+        :param block: Block to place
+        :param cols: Number of columns
+        :param rows: Number of rows
+        :param pitch: Distance between copies (mm), or x, y pair of
+             distances between columns and rows
+        :param fields: (optional) Values for additional fields
+        """
+        if isinstance(pitch, collections.abc.Sequence):
+            pitch_x, pitch_y = pitch
+        else:
+            pitch_x, pitch_y = pitch, pitch
+
+        transforms = []
+        instances = []
+        for row in range(rows):
+            for col in range(cols):
+                self.push_matrix()
+                self.translate(col * pitch_x, row * pitch_y)
+                transforms.append(self.transform.copy())
+                self.pop_matrix()
+
+                instances.append(dict(fields, i=row * cols + col, col=col,
+                                      row=row))
+
+        block.instantiate(transforms, instances).replay(self)
 
     def line(self, x1, y1, x2, y2):
         """ Draw a line from x1,y1 to x2,y2
@@ -560,6 +1618,38 @@ class CircuitPainter:
 
         return self._add_item(line)
 
+    def lines(self, segments):
+        """ Draw a list of lines
+
+        This is equivalent to calling line() for each segment, but
+        transforms all of the coordinates in a single step.
+
+        :param segments: Nx4 array (or list of x1,y1,x2,y2 lists) of line
+             starting and ending points (mm)
+        :return: List of the created lines
+        """
+        world = self._local_to_world_nm(numpy.reshape(segments, (-1, 2)))
+        points = self._vectors(world)
+
+        pcb = self.pcb
+        width = pcbnew.FromMM(self.draw_width)
+        layer = self.layers[self.draw_layer]
+        lines = []
+
+        for start, end in zip(points[0::2], points[1::2]):
+            line = pcbnew.PCB_SHAPE(pcb, pcbnew.SHAPE_T_SEGMENT)
+            line.SetWidth(width)
+            line.SetLayer(layer)
+            line.SetStart(start)
+            line.SetEnd(end)
+
+            lines.append(line)
+
+        world = world / 1e6
+        return self._add_items(
+            lines, 'line', self.draw_layer, None,
+            _segment_bboxes(world[0::2], world[1::2], self.draw_width))
+
     def arc(self, x, y, radius, start, end):
         """ Draw an arc
 
@@ -588,6 +1678,46 @@ class CircuitPainter:
 
         return self._add_item(arc)
 
+    def arcs(self, centers, radii, starts, ends):
+        """ Draw a list of arcs
+
+        This is equivalent to calling arc() for each arc, but computes and
+        transforms all of the coordinates in a single step.
+
+        :param centers: Nx2 array (or list of x,y pairs) of arc centers (mm)
+        :param radii: arc radius (mm), or list of radii
+        :param starts: starting angle of arcs (degrees), or list of angles
+        :param ends: ending angle of arcs (degrees), or list of angles
+        :return: List of the created arcs
+        """
+        arc_starts, _, arc_ends = _arc_points(centers, radii, starts, ends)
+        count = len(arc_starts)
+        points = self._local_to_world_many(
+            numpy.concatenate((numpy.reshape(centers, (-1, 2)),
+                               arc_starts,
+                               arc_ends)))
+
+        pcb = self.pcb
+        width = pcbnew.FromMM(self.draw_width)
+        layer = self.layers[self.draw_layer]
+        arcs = []
+
+        for center, start, end in zip(points[:count],
+                                      points[count:2 * count],
+                                      points[2 * count:]):
+            arc = pcbnew.PCB_SHAPE(pcb, pcbnew.SHAPE_T_ARC)
+            arc.SetWidth(width)
+            arc.SetLayer(layer)
+            arc.SetCenter(center)
+            arc.SetStart(start)
+            arc.SetEnd(end)
+
+            arcs.append(arc)
+
+        return self._add_items(
+            arcs, 'arc', self.draw_layer, None,
+            self._world_arc_bboxes(centers, radii, starts, ends))
+
     def circle(self, x, y, radius):
         """ Draw a circle
 
@@ -609,6 +1739,49 @@ class CircuitPainter:
 
         return self._add_item(circle)
 
+    def circles(self, centers, radii):
+        """ Draw a list of circles
+
+        This is equivalent to calling circle() for each circle, but
+        transforms all of the coordinates in a single step.
+
+        :param centers: Nx2 array (or list of x,y pairs) of circle centers (mm)
+        :param radii: radius of circles (mm), or list of radii
+        :return: List of the created circles
+        """
+        centers = numpy.asarray(centers, dtype=float).reshape(-1, 2)
+        count = len(centers)
+        radii = numpy.broadcast_to(numpy.asarray(radii, dtype=float), (count,))
+
+        # Note: there isn't a SetRadius() function, so project a point on the
+        # circle edge as well
+        edges = centers + numpy.column_stack((numpy.zeros(count), radii))
+        world = self._local_to_world_nm(numpy.concatenate((centers, edges)))
+        points = self._vectors(world)
+
+        pcb = self.pcb
+        width = pcbnew.FromMM(self.draw_width)
+        layer = self.layers[self.draw_layer]
+        filled = self.draw_fill
+        circles = []
+
+        for center, edge in zip(points[:count], points[count:]):
+            circle = pcbnew.PCB_SHAPE(pcb, pcbnew.SHAPE_T_CIRCLE)
+            circle.SetWidth(width)
+            circle.SetLayer(layer)
+            circle.SetFilled(filled)
+            circle.SetCenter(center)
+            circle.SetStart(center)
+            circle.SetEnd(edge)
+
+            circles.append(circle)
+
+        world = world[:count] / 1e6
+        extent = radii[:, numpy.newaxis]
+        return self._add_items(
+            circles, 'circle', self.draw_layer, None,
+            _segment_bboxes(world - extent, world + extent, self.draw_width))
+
     def poly(self, points):
         """ Draw a polygon
 
@@ -617,11 +1790,7 @@ class CircuitPainter:
 
         :param points: List of points to add to the polygon (mm)
         """
-        points_world = [
-            self._local_to_world(
-                point[0],
-                point[1]) for point in points]
-        v = pcbnew.VECTOR_VECTOR2I(points_world)
+        v = pcbnew.VECTOR_VECTOR2I(self._local_to_world_many(points))
 
         poly = pcbnew.PCB_SHAPE(self.pcb, pcbnew.SHAPE_T_POLY)
         poly.SetWidth(pcbnew.FromMM(self.draw_width))
@@ -721,12 +1890,258 @@ class CircuitPainter:
 
         return self._add_item(dim)
 
+    def select(self, kind=None, layer=None, net=None, within=None):
+        """ Select items that were drawn by this painter
+
+        Each condition that is specified must match. For example, to select
+        all vias on the gnd net: select(kind='via', net='gnd')
+
+        :param kind: (optional) Item type, or list of types. Types are:
+             'track', 'arc_track', 'via', 'zone', 'footprint', 'line', 'arc',
+             'circle', 'poly', 'text', and 'dimension'.
+        :param layer: (optional) Layer name, or list of layer names
+        :param net: (optional) Net name, or list of net names
+        :param within: (optional) Rectangle, as left, top, right, bottom in
+             board coordinates (mm). Only items that are completely inside
+             it are selected.
+        :return: Selection (array of item indexes), for use with the other
+             selection functions
+        """
+        return self.registry.select(kind, layer, net, within)
+
+    def get_items(self, selection):
+        """ Get the items in a selection
+
+        :param selection: Selection, from select()
+        :return: List of items
+        """
+        return self.registry.get(selection)
+
+    def bounding_box(self, selection=None):
+        """ Get the bounding box of the items drawn by this painter
+
+        :param selection: (optional) Selection, from select(). If not
+             specified, all items are included.
+        :return: Tuple of left, top, right, bottom in board coordinates
+             (mm), or None if there are no items
+        """
+        return self.registry.bounding_box(selection)
+
+    def summarize(self, by='layer', selection=None):
+        """ Count the items drawn by this painter, by type, layer or net
+
+        :param by: (optional) 'kind', 'layer' or 'net'
+        :param selection: (optional) Selection, from select(). If not
+             specified, all items are included.
+        :return: Dictionary of name to a dictionary with the 'count' of
+             items, and their 'bbox' (left, top, right, bottom in board
+             coordinates, mm)
+        """
+        return self.registry.summary(by, selection)
+
+    def _selected_items(self, selection):
+        """ Get the items in a selection, so that they can be changed
+
+        :return: Tuple of the selection without deleted items, and the items
+        """
+        selection = self.registry.live(selection)
+        items = self.registry.get(selection)
+        if any(item is None for item in items):
+            raise ValueError(
+                "Selection contains items that can no longer be changed")
+        return selection, items
+
+    def delete_items(self, selection):
+        """ Remove the selected items from the board
+
+        :param selection: Selection, from select()
+        """
+        selection, items = self._selected_items(selection)
+
+        for item in items:
+            self.layer_counts.subtract(self._item_layers(item))
+        self._remove_items(items)
+        self.registry.remove(selection)
+        self.invalidate_zones()
+
+    def move_items(self, selection, x, y):
+        """ Move the selected items
+
+        The distance is given in the current (local) coordinates, so it is
+        rotated along with the drawing.
+
+        :param selection: Selection, from select()
+        :param x: Distance to move along the x axis (mm)
+        :param y: Distance to move along the y axis (mm)
+        """
+        selection, items = self._selected_items(selection)
+
+        x0, y0 = self.transform.project(0, 0)
+        x1, y1 = self.transform.project(x, y)
+        dx, dy = round(x1 - x0, 6), round(y1 - y0, 6)
+
+        self._move_items(items, dx, dy)
+        self.registry.offset(selection, dx, dy)
+        self.invalidate_zones()
+
+    def rotate_items(self, selection, angle, x=0, y=0):
+        """ Rotate the selected items around a point
+
+        The items are rotated in the same direction as rotate().
+
+        :param selection: Selection, from select()
+        :param angle: Rotation angle (degrees)
+        :param x: (optional) x position of the center of rotation (mm)
+        :param y: (optional) y position of the center of rotation (mm)
+        """
+        selection, items = self._selected_items(selection)
+
+        center = self.transform.project(x, y)
+        self._rotate_items(items, center, angle)
+        self.registry.set_bboxes(
+            selection, [self._item_bbox(item) for item in items])
+        self.invalidate_zones()
+
+    def _remove_items(self, items):
+        """ Remove items from the board
+
+        items: List of items to remove
+        """
+        removed = set(item.m_Uuid.AsString() for item in items)
+        for item in items:
+            if isinstance(item, pcbnew.FOOTPRINT):
+                self._unindex_footprint(item)
+            self.group.RemoveItem(item)
+            self.pcb.Remove(item)
+
+        self.uuids = [uuid for uuid in self.uuids
+                      if uuid.AsString() not in removed]
+        self.unfilled_items = [item for item in self.unfilled_items
+                               if item.m_Uuid.AsString() not in removed]
+
+    def _unindex_footprint(self, footprint):
+        """ Remove a footprint and its pads from the lookup tables
+
+        footprint: Footprint to remove
+        """
+        reference = footprint.GetReference()
+        if self.footprints.get(reference) is footprint:
+            del self.footprints[reference]
+        for pad in footprint.Pads():
+            key = (reference, str(pad.GetNumber()))
+            if self.pads.get(key) is pad:
+                del self.pads[key]
+
+    def _move_items(self, items, dx, dy):
+        """ Move items on the board
+
+        items: List of items to move
+        dx: Distance to move along the x axis (mm)
+        dy: Distance to move along the y axis (mm)
+        """
+        offset = pcbnew.VECTOR2I_MM(dx, dy)
+        for item in items:
+            item.Move(offset)
+
+    def _rotate_items(self, items, center, angle):
+        """ Rotate items on the board
+
+        items: List of items to rotate
+        center: x, y position of the center of rotation, in board
+            coordinates (mm)
+        angle: Rotation angle, in the direction used by rotate() (degrees)
+        """
+        # KiCad angles turn the opposite way to rotate()
+        rotation = pcbnew.EDA_ANGLE(-angle, pcbnew.DEGREES_T)
+        center = pcbnew.VECTOR2I_MM(*center)
+        for item in items:
+            item.Rotate(center, rotation)
+
+    def invalidate_zones(self):
+        """ Force all zones to be re-filled on the next save or export
+
+        Zones are only re-filled if they might be affected by items that
+        Circuit Painter added to the board since the last fill. Items that
+        are added or removed through the pcbnew API (using pcb) are noticed
+        because the number of items on the board changes, but other changes
+        made that way (for example moving an item, or changing its net or
+        the design rules) are not.
+
+        IMPORTANT: Call this after modifying the board through the pcbnew
+        API, otherwise the zones might not be re-filled.
+        """
+        self.zones_filled = False
+
+    def _count_board_items(self):
+        """ Count the items on the board that zones are filled around """
+        return len(self.pcb.GetDrawings()) + len(self.pcb.GetTracks()) \
+            + len(self.pcb.GetFootprints()) + len(self.pcb.Zones())
+
+    def _dirty_zones(self):
+        """ Find the zones that might be affected by the unfilled items
+
+        A zone is considered affected if it shares a layer with an unfilled
+        item, and their bounding boxes overlap once the zone is grown by the
+        largest clearance that could apply between them.
+        """
+        # Group the item bounding boxes by layer
+        boxes = {}
+        for item in self.unfilled_items:
+            layers = self._item_layers(item)
+
+            box = item.GetBoundingBox()
+            extent = (box.GetLeft(), box.GetTop(),
+                      box.GetRight(), box.GetBottom())
+            for layer in layers:
+                boxes.setdefault(layer, []).append(extent)
+
+        boxes = {layer: numpy.array(extents)
+                 for layer, extents in boxes.items()}
+
+        # Items further away than the clearance (or thermal relief gap) from
+        # a zone can't change its fill
+        clearance = self.pcb.GetDesignSettings().GetBiggestClearanceValue()
+
+        zones = pcbnew.ZONES()
+        for zone in self.pcb.Zones():
+            margin = max(clearance, zone.GetLocalClearance(),
+                         zone.GetThermalReliefGap())
+
+            box = zone.GetBoundingBox()
+            left, top = box.GetLeft() - margin, box.GetTop() - margin
+            right, bottom = box.GetRight() + margin, box.GetBottom() + margin
+
+            for layer in zone.GetLayerSet().Seq():
+                extents = boxes.get(layer)
+                if extents is None:
+                    continue
+
+                if numpy.any((extents[:, 0] <= right)
+                             & (extents[:, 2] >= left)
+                             & (extents[:, 1] <= bottom)
+                             & (extents[:, 3] >= top)):
+                    zones.append(zone)
+                    break
+
+        return zones
+
     def _fill_zones(self):
         """ Re-pour copper zones on the PCB
 
         This is performed automatically by the save, preview, drc, and
-        export_gerber functions.
+        export_gerber functions. Zones are only re-filled if they might have
+        been affected by items added since the last fill.
         """
+        # Items added or removed through the pcbnew API aren't tracked, so
+        # re-fill everything if the board doesn't have the expected number
+        # of items
+        if self.zones_filled and self._count_board_items() != \
+                self.filled_item_count + len(self.unfilled_items):
+            self.zones_filled = False
+
+        if self.zones_filled and len(self.unfilled_items) == 0:
+            return
+
         # Workaround to enable some hidden state. Calling WriteDRCReport()
         # fixes something, that then allows the zone_filler to properly apply
         # (at least) board clearance rules.
@@ -738,22 +2153,38 @@ class CircuitPainter:
                 False)
             self.is_drc_run = True
 
-        # Re-build connectivity, otherwise the zone filler won't connect
-        # zones to objects with the same net names
-        self.pcb.BuildConnectivity()
+        if self.zones_filled:
+            zones = self._dirty_zones()
+        else:
+            zones = self.pcb.Zones()
+
+        if len(zones) > 0:
+            # Re-build connectivity, otherwise the zone filler won't connect
+            # zones to objects with the same net names
+            self.pcb.BuildConnectivity()
 
-        filler = pcbnew.ZONE_FILLER(self.pcb)
-        zones = self.pcb.Zones()
+            filler = pcbnew.ZONE_FILLER(self.pcb)
+            filler.Fill(zones)
 
-        filler.Fill(zones)
+        self.unfilled_items = []
+        self.zones_filled = True
+        self.filled_item_count = self._count_board_items()
 
     def _auto_set_origin(self):
         # Sets the board origin at the bottom-left hand corner of the pcb
         # edge bounding box. If the edge is not well-defined, it should
         # resolve to no offset.
-        boundary = self.pcb.GetBoardEdgesBoundingBox()
-        x = boundary.GetX()
-        y = boundary.GetY() + boundary.GetHeight()
+        edges = self.registry.select(layer='Edge_Cuts')
+        if len(edges) == self.layer_counts[self.layers['Edge_Cuts']]:
+            # Every edge was drawn by this painter, so the board doesn't
+            # need to be searched
+            extent = self.registry.bounding_box(edges) or (0, 0, 0, 0)
+            x = round(extent[0] * 1e6)
+            y = round(extent[3] * 1e6)
+        else:
+            boundary = self.pcb.GetBoardEdgesBoundingBox()
+            x = boundary.GetX()
+            y = boundary.GetY() + boundary.GetHeight()
 
         settings = self.pcb.GetDesignSettings()
         settings.SetAuxOrigin(pcbnew.VECTOR2I(x, y))
@@ -768,14 +2199,28 @@ class CircuitPainter:
 
         self.pcb.Save(f"{filename}.kicad_pcb")
 
+    def save_bytes(self, output=None):
+        """ Get the board design as the contents of a KiCad board file
+
+        :param output: (optional) Writable file-like object to write the
+             board to. If not specified, the board is returned as bytes.
+        :return: The board file contents, if output was not specified
+        """
+        with TemporaryDirectory() as tmpdir:
+            self.save(f"{tmpdir}/board")
+
+            with open(f"{tmpdir}/board.kicad_pcb", 'rb') as f:
+                if output is None:
+                    return f.read()
+
+                shutil.copyfileobj(f, output)
+                return None
+
     def preview(self):
         """ Preview the output file in KiCad
 
         This saves the file to a temporary loation, then opens it using pcbnew.
         """
-        self._fill_zones()
-        self._auto_set_origin()
-
         with TemporaryDirectory() as tmpdir:
             self.save(f"{tmpdir}/preview")
             subprocess.check_call(["pcbnew", f"{tmpdir}/preview.kicad_pcb"])
@@ -793,64 +2238,366 @@ class CircuitPainter:
 #            pcbnew.EDA_UNITS_MILLIMETRES,
 #            False)
 
-    def export_gerber(self, name, output_dir='.', layers=[]):
-        """ Export the design to gerbers / drill file
-
-        This saves the file to a temporary loation, uses the kicad command
-        line interface to render gerber outputs, and finally places the
-        gerbers in a zip file.
-
-        :param name: Name of zip file to write to
-        :param directory: (optional) Directory to place the file in
-        :param layers: (optional) List of layers to export.
+    def _export_jobs(self, export_format, name, board_file, layers=None):
+        """ Get the kicad-cli commands needed to export a board
+
+        :param export_format: Export format, one of EXPORT_FORMATS
+        :param name: Name of the board (used to name the output files)
+        :param board_file: Saved board file to export from
+        :param layers: (optional) List of layers to export (gerber and svg
+             only). If not specified, only layers that contain items are
+             exported.
+        :return: Tuple of a list of (step name, command) pairs that can be run
+             in any order from an empty working directory, and the name of
+             the output file to collect from it once they are complete.
         """
-        self._fill_zones()
-        self._auto_set_origin()
+        if layers is None:
+            layers = self.populated_layers()
 
         # Map pcbnew layer names to a format recognized by kicad-cli
         # Note that if the layer list is empty, kicad-cli will choose some
         # default set automatically
         layers_csv = ','.join(layers).replace('_', '.')
 
-        output_dir = Path(output_dir).resolve()
+        if export_format == 'gerber':
+            return [
+                ('gerber', ["kicad-cli",
+                            "pcb",
+                            "export",
+                            "gerbers",
+                            "--use-drill-file-origin",
+                            "-l",
+                            layers_csv,
+                            board_file]),
+                ('drill', ["kicad-cli",
+                           "pcb",
+                           "export",
+                           "drill",
+                           "--drill-origin",
+                           "plot",
+                           board_file]),
+            ], f"{name}.zip"
+
+        if export_format == 'svg':
+            return [
+                ('svg', ["kicad-cli",
+                         "pcb",
+                         "export",
+                         "svg",
+                         "--page-size-mode",
+                         "2",
+                         "--exclude-drawing-sheet",
+                         "-l",
+                         layers_csv,
+                         board_file]),
+            ], f"{name}.svg"
+
+        if export_format == 'step':
+            return [
+                ('step', ["kicad-cli",
+                          "pcb",
+                          "export",
+                          "step",
+                          "--drill-origin",
+                          "--output", f"{name}.step",
+                          board_file]),
+            ], f"{name}.step"
+
+        if export_format == 'pos':
+            return [
+                ('pos', ["kicad-cli",
+                         "pcb",
+                         "export",
+                         "pos",
+                         "--format", "csv",
+                         "--units", "mm",
+                         "--bottom-negate-x",
+                         "--use-drill-file-origin",
+                         "--output", f"{name}_pos.csv",
+                         board_file]),
+            ], f"{name}_pos.csv"
+
+        raise ValueError(
+            f"Unknown export format:{export_format}, expected one of: {', '.join(EXPORT_FORMATS)}")
+
+    @staticmethod
+    def _collect_export(export_format, name, workdir, output_name, output,
+                        compresslevel=5):
+        """ Copy the results of an export to the output location
+
+        :param export_format: Export format, one of EXPORT_FORMATS
+        :param name: Name of the board
+        :param workdir: Directory that kicad-cli wrote the outputs to
+        :param output_name: Name of the output file, from _export_jobs()
+        :param output: File name, or writable file-like object to write the
+             output to
+        :param compresslevel: (optional) Compression level for zip outputs
+        :return: The output
+        """
+        if export_format == 'gerber':
+            # Don't copy the gbrjob file
+            if os.path.exists(f"{workdir}/{name}-job.gbrjob"):
+                os.remove(f"{workdir}/{name}-job.gbrjob")
 
-        with TemporaryDirectory() as tmpdir_kicad:
-            gerberdir = f"{tmpdir_kicad}/gerber"
+            # Zip up the gerbers
+            files = glob.glob(f"{workdir}/*")
+            _make_zip(output, files, compresslevel)
+        elif _is_file_object(output):
+            with open(f"{workdir}/{output_name}", 'rb') as f:
+                shutil.copyfileobj(f, output)
+        else:
+            shutil.copyfile(f"{workdir}/{output_name}", output)
+
+        return output
 
+    def _check_export_cache(self, board_file, jobs, output_name, output,
+                            compresslevel=5):
+        """ Look up an export in the export cache
+
+        If the export is in the cache, it is copied to the output.
+
+        :param board_file: Saved board file that is being exported
+        :param jobs: List of export steps, from _export_jobs()
+        :param output_name: Name of the output file, from _export_jobs()
+        :param output: File name, or writable file-like object to copy the
+             cached output to
+        :param compresslevel: (optional) Compression level for zip outputs,
+             which changes the output without changing the commands
+        :return: Tuple of the cache key (or None if caching is disabled), and
+             True if the output was found in the cache.
+        """
+        if self.export_cache is None:
+            return None, False
+
+        key = self.export_cache.key(
+            board_file, output_name, [command for _, command in jobs],
+            {'compresslevel': compresslevel})
+        return key, self.export_cache.get(key, output)
+
+    def _export(self, export_format, name, output_dir='.', output=None,
+                compresslevel=5, **options):
+        """ Save the board to a temporary location, then export it
+
+        :param export_format: Export format, one of EXPORT_FORMATS
+        :param name: Name of output file
+        :param output_dir: (optional) Directory to place the file in
+        :param output: (optional) Writable file-like object to write the
+             output to, instead of placing it in output_dir
+        :param compresslevel: (optional) Compression level for zip outputs
+        :return: The output file name, or file-like object
+        """
+        with TemporaryDirectory() as tmpdir_kicad:
             # Write the kicad pcb out to a temporary location
             self.save(f"{tmpdir_kicad}/{name}")
+            board_file = f"{tmpdir_kicad}/{name}.kicad_pcb"
 
-            os.mkdir(gerberdir)
-
-            # Generate gerbers to yet another location
-            # TODO: Remove empty layers?
-            subprocess.check_call(["kicad-cli",
-                                   "pcb",
-                                   "export",
-                                   "gerbers",
-                                   "--use-drill-file-origin",
-                                   "-l",
-                                   layers_csv,
-                                   f"{tmpdir_kicad}/{name}.kicad_pcb"],
-                                  cwd=gerberdir)
-            subprocess.check_call(["kicad-cli",
-                                   "pcb",
-                                   "export",
-                                   "drill",
-                                   "--drill-origin",
-                                   "plot",
-                                   f"{tmpdir_kicad}/{name}.kicad_pcb"],
-                                  cwd=gerberdir)
+            workdir = f"{tmpdir_kicad}/{export_format}"
+            os.mkdir(workdir)
 
-            # Don't copy the gbrjob file
-            if os.path.exists(f"{gerberdir}/{name}-job.gbrjob"):
-                os.remove(f"{gerberdir}/{name}-job.gbrjob")
+            jobs, output_name = self._export_jobs(
+                export_format, name, board_file, **options)
 
-            # Zip up the gerbers
-            files = glob.glob(f"{gerberdir}/*")
-            _make_zip(f"{output_dir}/{name}.zip", files)
+            if output is None:
+                output = f"{Path(output_dir).resolve()}/{output_name}"
+
+            cache_key, cached = self._check_export_cache(
+                board_file, jobs, output_name, output, compresslevel)
+            if cached:
+                return output
+
+            for _, command in jobs:
+                subprocess.check_call(command, cwd=workdir)
+
+            return self._store_export(
+                export_format, name, workdir, output_name, output,
+                compresslevel, cache_key)
+
+    def _store_export(self, export_format, name, workdir, output_name, output,
+                      compresslevel, cache_key):
+        """ Collect the results of an export, and add them to the cache
+
+        :param export_format: Export format, one of EXPORT_FORMATS
+        :param name: Name of the board
+        :param workdir: Directory that the export commands were run in
+        :param output_name: Name of the output file, from _export_jobs()
+        :param output: File name, or writable file-like object to write to
+        :param compresslevel: Compression level for zip outputs
+        :param cache_key: Cache key, or None if caching is disabled
+        :return: The output file name, or file-like object
+        """
+        if cache_key is None:
+            return self._collect_export(
+                export_format, name, workdir, output_name, output,
+                compresslevel)
+
+        # The output has to be re-read to store it in the cache, which
+        # isn't possible for a file-like object.
+        if _is_file_object(output):
+            buffer = io.BytesIO()
+            self._collect_export(
+                export_format, name, workdir, output_name, buffer,
+                compresslevel)
+            self.export_cache.put(cache_key, buffer.getvalue())
+            output.write(buffer.getvalue())
+        else:
+            self._collect_export(
+                export_format, name, workdir, output_name, output,
+                compresslevel)
+            self.export_cache.put(cache_key, output)
+
+        return output
+
+    def _export_bytes(self, export_function, output, **options):
+        """ Run an export function, writing to memory instead of a file
+
+        :param export_function: Function to run, such as self._export
+        :param output: Writable file-like object to write to, or None to
+             return the output as bytes
+        """
+        if output is not None:
+            export_function(output=output, **options)
+            return None
+
+        buffer = io.BytesIO()
+        export_function(output=buffer, **options)
+        return buffer.getvalue()
+
+    def _plot_gerbers(self, name, plotdir, layers=None):
+        """ Plot gerbers and drill files using the pcbnew plot API
+
+        This produces the same files as the kicad-cli gerber and drill export
+        commands, but works directly on the board in memory.
+
+        :param name: Name of the board (used to name the output files)
+        :param plotdir: Directory to write the files to
+        :param layers: (optional) List of layers to plot. If not specified,
+             only layers that contain items are plotted.
+        """
+        self._fill_zones()
+        self._auto_set_origin()
+
+        if layers is None:
+            layers = self.populated_layers()
+        layer_ids = [self.layers[layer] for layer in layers]
+        if len(layer_ids) == 0:
+            layer_ids = list(self.pcb.GetEnabledLayers().Seq())
+
+        # The plotter names the output files after the board file, so
+        # temporarily rename it to match the kicad-cli output.
+        filename = self.pcb.GetFileName()
+        self.pcb.SetFileName(f"{plotdir}/{name}.kicad_pcb")
+
+        try:
+            controller = pcbnew.PLOT_CONTROLLER(self.pcb)
+            options = controller.GetPlotOptions()
+            options.SetOutputDirectory(plotdir)
+            options.SetFormat(pcbnew.PLOT_FORMAT_GERBER)
+            options.SetPlotFrameRef(False)
+            options.SetUseAuxOrigin(True)
+            options.SetUseGerberProtelExtensions(True)
+            options.SetUseGerberX2format(True)
+            options.SetIncludeGerberNetlistInfo(True)
+            options.SetGerberPrecision(6)
+            options.SetSubtractMaskFromSilk(False)
+            options.SetDisableGerberMacros(False)
+
+            for layer in layer_ids:
+                controller.SetLayer(layer)
+                controller.OpenPlotfile(
+                    self.pcb.GetLayerName(layer).replace('.', '_'),
+                    pcbnew.PLOT_FORMAT_GERBER,
+                    self.pcb.GetLayerName(layer))
+                controller.PlotLayer()
+            controller.ClosePlot()
+
+            writer = pcbnew.EXCELLON_WRITER(self.pcb)
+            writer.SetOptions(
+                False,
+                False,
+                self.pcb.GetDesignSettings().GetAuxOrigin(),
+                False)
+            writer.SetFormat(True)
+            writer.CreateDrillandMapFilesSet(plotdir, True, False)
+        finally:
+            self.pcb.SetFileName(filename)
+
+    def _export_gerber(self, name, output_dir='.', output=None, layers=None,
+                       backend='kicad-cli', compresslevel=5):
+        """ Export the design to gerbers / drill file, using either backend
+
+        See export_gerber() for the parameters.
+        """
+        if backend == 'kicad-cli':
+            return self._export('gerber', name, output_dir, output,
+                                compresslevel, layers=layers)
+
+        if backend == 'pcbnew':
+            if output is None:
+                output = f"{Path(output_dir).resolve()}/{name}.zip"
+
+            with TemporaryDirectory() as plotdir:
+                self._plot_gerbers(name, plotdir, layers)
+                return self._collect_export(
+                    'gerber', name, plotdir, f"{name}.zip", output,
+                    compresslevel)
+
+        raise ValueError(
+            f"Unknown backend:{backend}, expected 'kicad-cli' or 'pcbnew'")
 
-    def export_svg(self, name, output_dir='.'):
+    def export_gerber(
+            self,
+            name,
+            output_dir='.',
+            layers=None,
+            backend='kicad-cli',
+            compresslevel=5):
+        """ Export the design to gerbers / drill file
+
+        This saves the file to a temporary loation, uses the kicad command
+        line interface to render gerber outputs, and finally places the
+        gerbers in a zip file.
+
+        :param name: Name of zip file to write to
+        :param directory: (optional) Directory to place the file in
+        :param layers: (optional) List of layers to export. By default, only
+             layers that contain items are exported.
+        :param backend: (optional) Set to 'pcbnew' to plot the gerbers using
+             the pcbnew plotting API, instead of saving the board and running
+             kicad-cli. This is faster, but doesn't use the export cache.
+        :param compresslevel: (optional) Zip compression level, from 0 (none)
+             to 9 (best)
+        """
+        self._export_gerber(name, output_dir, layers=layers, backend=backend,
+                            compresslevel=compresslevel)
+
+    def export_gerber_bytes(
+            self,
+            name='board',
+            output=None,
+            layers=None,
+            backend='kicad-cli',
+            compresslevel=5):
+        """ Export the design to a gerber / drill zip file in memory
+
+        :param name: (optional) Name of the board, used to name the files in
+             the zip
+        :param output: (optional) Writable file-like object to write the zip
+             to. If not specified, the zip is returned as bytes.
+        :param layers: (optional) List of layers to export. By default, only
+             layers that contain items are exported.
+        :param backend: (optional) 'kicad-cli' or 'pcbnew', see
+             export_gerber()
+        :param compresslevel: (optional) Zip compression level, from 0 (none)
+             to 9 (best)
+        :return: The zip file contents, if output was not specified
+        """
+        return self._export_bytes(self._export_gerber, output,
+                                  name=name,
+                                  layers=layers,
+                                  backend=backend,
+                                  compresslevel=compresslevel)
+
+    def export_svg(self, name, output_dir='.', layers=None):
         """ Export the design to an SVG
 
         This saves the file to a temporary loation, uses the kicad command
@@ -859,31 +2606,25 @@ class CircuitPainter:
 
         :param name: Name of output file
         :param directory: (optional) Directory to place the file in
+        :param layers: (optional) List of layers to draw. By default, only
+             layers that contain items are drawn.
         """
-        self._fill_zones()
-        self._auto_set_origin()
-
-        output_dir = Path(output_dir).resolve()
+        self._export('svg', name, output_dir, layers=layers)
 
-        with TemporaryDirectory() as tmpdir_kicad:
-            # Write the kicad pcb out to a temporary location
-            self.save(f"{tmpdir_kicad}/{name}")
+    def export_svg_bytes(self, name='board', output=None, layers=None):
+        """ Export the design to an SVG in memory
 
-            subprocess.check_call(["kicad-cli",
-                                   "pcb",
-                                   "export",
-                                   "svg",
-                                   "--page-size-mode",
-                                   "2",
-                                   "--exclude-drawing-sheet",
-                                   "-l",
-                                   ','.join([i.replace('_',
-                                                       '.') for i in self.layers]),
-                                   f"{tmpdir_kicad}/{name}.kicad_pcb"],
-                                  cwd=tmpdir_kicad)
-
-            shutil.copyfile(f"{tmpdir_kicad}/{name}.svg",
-                            f"{output_dir}/{name}.svg")
+        :param name: (optional) Name of the board
+        :param output: (optional) Writable file-like object to write the SVG
+             to. If not specified, the SVG is returned as bytes.
+        :param layers: (optional) List of layers to draw. By default, only
+             layers that contain items are drawn.
+        :return: The SVG contents, if output was not specified
+        """
+        return self._export_bytes(self._export, output,
+                                  export_format='svg',
+                                  name=name,
+                                  layers=layers)
 
     def export_step(self, name, output_dir="."):
         """ Export the design to an STEP file
@@ -895,26 +2636,19 @@ class CircuitPainter:
         :param name: Name of output file
         :param directory: (optional) Directory to place the file in
         """
-        self._fill_zones()
-        self._auto_set_origin()
-
-        output_dir = Path(output_dir).resolve()
+        self._export('step', name, output_dir)
 
-        with TemporaryDirectory() as tmpdir_kicad:
-            # Write the kicad pcb out to a temporary location
-            self.save(f"{tmpdir_kicad}/{name}")
+    def export_step_bytes(self, name='board', output=None):
+        """ Export the design to a STEP file in memory
 
-            subprocess.check_call(["kicad-cli",
-                                   "pcb",
-                                   "export",
-                                   "step",
-                                   "--drill-origin",
-                                   "--output", f"{name}.step",
-                                   f"{tmpdir_kicad}/{name}.kicad_pcb"],
-                                  cwd=tmpdir_kicad)
-
-            shutil.copyfile(f"{tmpdir_kicad}/{name}.step",
-                            f"{output_dir}/{name}.step")
+        :param name: (optional) Name of the board
+        :param output: (optional) Writable file-like object to write the STEP
+             file to. If not specified, it is returned as bytes.
+        :return: The STEP file contents, if output was not specified
+        """
+        return self._export_bytes(self._export, output,
+                                  export_format='step',
+                                  name=name)
 
     def export_pos(self, name, output_dir='.'):
         """ Export a pick-and-place file
@@ -926,26 +2660,338 @@ class CircuitPainter:
         :param name: Name of output file
         :param directory: (optional) Directory to place the file in
         """
-        self._fill_zones()
-        self._auto_set_origin()
+        self._export('pos', name, output_dir)
+
+    def export_pos_bytes(self, name='board', output=None):
+        """ Export a pick-and-place file in memory
+
+        :param name: (optional) Name of the board
+        :param output: (optional) Writable file-like object to write the
+             pick-and-place file to. If not specified, it is returned as bytes.
+        :return: The pick-and-place file contents, if output was not specified
+        """
+        return self._export_bytes(self._export, output,
+                                  export_format='pos',
+                                  name=name)
+
+    def export_all(
+            self,
+            name,
+            formats=EXPORT_FORMATS,
+            output_dir='.',
+            max_workers=None,
+            layers=None):
+        """ Export the design to several formats at once
+
+        The board is saved once, then all of the kicad-cli commands needed
+        for the requested formats are run in parallel. This is much faster
+        than calling each of the export functions in turn.
+
+        :param name: Name of the output files
+        :param formats: (optional) List of formats to export. Can contain
+             any of 'gerber', 'svg', 'step', and 'pos'.
+        :param output_dir: (optional) Directory to place the files in
+        :param max_workers: (optional) Maximum number of kicad-cli processes
+             to run at the same time. Defaults to the number of CPUs.
+        :param layers: (optional) List of layers to export to the gerbers
+             and svg. By default, only layers that contain items are exported.
+        :return: Dictionary containing 'outputs', a map of format to output
+             file, and 'timings', a map of each step to its run time (s)
+        """
+        formats = list(formats)
+        for export_format in formats:
+            if export_format not in EXPORT_FORMATS:
+                raise ValueError(
+                    f"Unknown export format:{export_format}, expected one of: {', '.join(EXPORT_FORMATS)}")
+        if len(set(formats)) != len(formats):
+            raise ValueError(
+                f"Duplicate export formats:{', '.join(formats)}, each format can only be exported once")
 
         output_dir = Path(output_dir).resolve()
+        timings = {}
+        outputs = {}
+
+        def run(step, command, workdir):
+            start = time.perf_counter()
+            subprocess.check_call(command, cwd=workdir)
+            return step, time.perf_counter() - start
 
         with TemporaryDirectory() as tmpdir_kicad:
-            # Write the kicad pcb out to a temporary location
+            start = time.perf_counter()
             self.save(f"{tmpdir_kicad}/{name}")
+            board_file = f"{tmpdir_kicad}/{name}.kicad_pcb"
+            timings['save'] = time.perf_counter() - start
+
+            exports = []
+            for export_format in formats:
+                workdir = f"{tmpdir_kicad}/{export_format}"
+                os.mkdir(workdir)
+
+                jobs, output_name = self._export_jobs(
+                    export_format, name, board_file, layers=layers)
+                output = f"{output_dir}/{output_name}"
+
+                start = time.perf_counter()
+                cache_key, cached = self._check_export_cache(
+                    board_file, jobs, output_name, output, compresslevel)
+                if cached:
+                    outputs[export_format] = output
+                    timings[f"{export_format}_cache"] = \
+                        time.perf_counter() - start
+                    continue
+
+                exports.append(
+                    (export_format, workdir, jobs, output_name, cache_key))
+
+            if max_workers is None:
+                max_workers = os.cpu_count() or 1
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(run, step, command, workdir)
+                           for _, workdir, jobs, _, _ in exports
+                           for step, command in jobs]
+
+                for future in as_completed(futures):
+                    step, seconds = future.result()
+                    timings[step] = seconds
+
+            for export_format, workdir, _, output_name, cache_key in exports:
+                start = time.perf_counter()
+                outputs[export_format] = self._collect_export(
+                    export_format, name, workdir, output_name,
+                    f"{output_dir}/{output_name}")
+                if cache_key is not None:
+                    self.export_cache.put(cache_key, outputs[export_format])
+                timings[f"{export_format}_collect"] = \
+                    time.perf_counter() - start
+
+        return {'outputs': outputs, 'timings': timings}
+
+    async def _export_async(self, export_format, name, output_dir='.',
+                            timeout=None, output=None, compresslevel=5,
+                            **options):
+        """ Save the board to a temporary location, then export it
+
+        This is the asyncio version of _export(). The board is saved in the
+        event loop's thread, while holding the save lock, then the kicad-cli
+        commands are run as asyncio subprocesses. pcbnew isn't thread safe,
+        so no other threads are used. The board must not be changed until
+        the export is complete.
+
+        :param export_format: Export format, one of EXPORT_FORMATS
+        :param name: Name of output file
+        :param output_dir: (optional) Directory to place the file in
+        :param timeout: (optional) Maximum time to wait for kicad-cli to
+             finish (s). If exceeded, kicad-cli is killed and
+             asyncio.TimeoutError is raised.
+        :param output: (optional) Writable file-like object to write the
+             output to, instead of placing it in output_dir
+        :param compresslevel: (optional) Compression level for zip outputs
+        :return: The output file name, or file-like object
+        """
+        with TemporaryDirectory() as tmpdir_kicad:
+            board_file = f"{tmpdir_kicad}/{name}.kicad_pcb"
+
+            workdir = f"{tmpdir_kicad}/{export_format}"
+            os.mkdir(workdir)
+
+            jobs, output_name = self._export_jobs(
+                export_format, name, board_file, **options)
+
+            if output is None:
+                output = f"{Path(output_dir).resolve()}/{output_name}"
+
+            async with _get_async_save_lock():
+                # Write the kicad pcb out to a temporary location
+                self.save(f"{tmpdir_kicad}/{name}")
+
+                cache_key, cached = self._check_export_cache(
+                    board_file, jobs, output_name, output, compresslevel)
+            if cached:
+                return output
+
+            # If this is cancelled, the kicad-cli processes are killed and
+            # waited for before the temporary directory is removed.
+            await asyncio.wait_for(
+                _run_all_async([command for _, command in jobs], workdir),
+                timeout)
 
-            subprocess.check_call(["kicad-cli",
-                                   "pcb",
-                                   "export",
-                                   "pos",
-                                   "--format", "csv",
-                                   "--units", "mm",
-                                   "--bottom-negate-x",
-                                   "--use-drill-file-origin",
-                                   "--output", f"{name}_pos.csv",
-                                   f"{tmpdir_kicad}/{name}.kicad_pcb"],
-                                  cwd=tmpdir_kicad)
-
-            shutil.copyfile(f"{tmpdir_kicad}/{name}_pos.csv",
-                            f"{output_dir}/{name}_pos.csv")
+            return self._store_export(
+                export_format, name, workdir, output_name, output,
+                compresslevel, cache_key)
+
+    async def _export_bytes_async(self, export_format, output, **options):
+        """ Run an async export, writing to memory instead of a file
+
+        :param export_format: Export format, one of EXPORT_FORMATS
+        :param output: Writable file-like object to write to, or None to
+             return the output as bytes
+        """
+        if output is not None:
+            await self._export_async(export_format, output=output, **options)
+            return None
+
+        buffer = io.BytesIO()
+        await self._export_async(export_format, output=buffer, **options)
+        return buffer.getvalue()
+
+    async def preview_async(self):
+        """ Preview the output file in KiCad, using asyncio
+
+        This works like preview(), but waits for pcbnew to close without
+        blocking the event loop. The board is saved in the event loop's
+        thread, while holding the same lock as the async exports.
+        """
+        with TemporaryDirectory() as tmpdir:
+            async with _get_async_save_lock():
+                self.save(f"{tmpdir}/preview")
+
+            command = ["pcbnew", f"{tmpdir}/preview.kicad_pcb"]
+            process = await asyncio.create_subprocess_exec(*command)
+            try:
+                returncode = await process.wait()
+            except BaseException:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+
+            if returncode != 0:
+                raise subprocess.CalledProcessError(returncode, command)
+
+    async def export_gerber_async(self, name, output_dir='.', layers=None,
+                                  timeout=None, compresslevel=5):
+        """ Export the design to gerbers / drill file, using asyncio
+
+        This works like export_gerber(), but runs kicad-cli without blocking
+        the event loop. The number of kicad-cli processes running at once is
+        limited across all painters, see set_async_export_limit(). Only the
+        kicad-cli backend is supported.
+
+        :param name: Name of zip file to write to
+        :param output_dir: (optional) Directory to place the file in
+        :param layers: (optional) List of layers to export. By default, only
+             layers that contain items are exported.
+        :param timeout: (optional) Maximum time to wait for kicad-cli (s)
+        :param compresslevel: (optional) Zip compression level, from 0 (none)
+             to 9 (best)
+        :return: The output file name
+        """
+        return await self._export_async('gerber', name, output_dir, timeout,
+                                        compresslevel=compresslevel,
+                                        layers=layers)
+
+    async def export_gerber_bytes_async(self, name='board', output=None,
+                                        layers=None, timeout=None,
+                                        compresslevel=5):
+        """ Export the design to a gerber / drill zip file in memory, using
+        asyncio
+
+        See export_gerber_async() and export_gerber_bytes() for details.
+
+        :param name: (optional) Name of the board, used to name the files in
+             the zip
+        :param output: (optional) Writable file-like object to write the zip
+             to. If not specified, the zip is returned as bytes.
+        :param layers: (optional) List of layers to export. By default, only
+             layers that contain items are exported.
+        :param timeout: (optional) Maximum time to wait for kicad-cli (s)
+        :param compresslevel: (optional) Zip compression level, from 0 (none)
+             to 9 (best)
+        :return: The zip file contents, if output was not specified
+        """
+        return await self._export_bytes_async('gerber', output,
+                                              name=name,
+                                              timeout=timeout,
+                                              compresslevel=compresslevel,
+                                              layers=layers)
+
+    async def export_svg_async(self, name, output_dir='.', layers=None,
+                               timeout=None):
+        """ Export the design to an SVG, using asyncio
+
+        See export_gerber_async() and export_svg() for details.
+
+        :param name: Name of output file
+        :param output_dir: (optional) Directory to place the file in
+        :param layers: (optional) List of layers to draw. By default, only
+             layers that contain items are drawn.
+        :param timeout: (optional) Maximum time to wait for kicad-cli (s)
+        :return: The output file name
+        """
+        return await self._export_async('svg', name, output_dir, timeout,
+                                        layers=layers)
+
+    async def export_svg_bytes_async(self, name='board', output=None,
+                                     layers=None, timeout=None):
+        """ Export the design to an SVG in memory, using asyncio
+
+        See export_gerber_async() and export_svg_bytes() for details.
+
+        :param name: (optional) Name of the board
+        :param output: (optional) Writable file-like object to write the SVG
+             to. If not specified, the SVG is returned as bytes.
+        :param layers: (optional) List of layers to draw. By default, only
+             layers that contain items are drawn.
+        :param timeout: (optional) Maximum time to wait for kicad-cli (s)
+        :return: The SVG contents, if output was not specified
+        """
+        return await self._export_bytes_async('svg', output,
+                                              name=name,
+                                              timeout=timeout,
+                                              layers=layers)
+
+    async def export_step_async(self, name, output_dir='.', timeout=None):
+        """ Export the design to a STEP file, using asyncio
+
+        See export_gerber_async() and export_step() for details.
+
+        :param name: Name of output file
+        :param output_dir: (optional) Directory to place the file in
+        :param timeout: (optional) Maximum time to wait for kicad-cli (s)
+        :return: The output file name
+        """
+        return await self._export_async('step', name, output_dir, timeout)
+
+    async def export_step_bytes_async(self, name='board', output=None,
+                                      timeout=None):
+        """ Export the design to a STEP file in memory, using asyncio
+
+        See export_gerber_async() and export_step_bytes() for details.
+
+        :param name: (optional) Name of the board
+        :param output: (optional) Writable file-like object to write the STEP
+             file to. If not specified, it is returned as bytes.
+        :param timeout: (optional) Maximum time to wait for kicad-cli (s)
+        :return: The STEP file contents, if output was not specified
+        """
+        return await self._export_bytes_async('step', output,
+                                              name=name,
+                                              timeout=timeout)
+
+    async def export_pos_async(self, name, output_dir='.', timeout=None):
+        """ Export a pick-and-place file, using asyncio
+
+        See export_gerber_async() and export_pos() for details.
+
+        :param name: Name of output file
+        :param output_dir: (optional) Directory to place the file in
+        :param timeout: (optional) Maximum time to wait for kicad-cli (s)
+        :return: The output file name
+        """
+        return await self._export_async('pos', name, output_dir, timeout)
+
+    async def export_pos_bytes_async(self, name='board', output=None,
+                                     timeout=None):
+        """ Export a pick-and-place file in memory, using asyncio
+
+        See export_gerber_async() and export_pos_bytes() for details.
+
+        :param name: (optional) Name of the board
+        :param output: (optional) Writable file-like object to write the
+             pick-and-place file to. If not specified, it is returned as bytes.
+        :param timeout: (optional) Maximum time to wait for kicad-cli (s)
+        :return: The pick-and-place file contents, if output was not specified
+        """
+        return await self._export_bytes_async('pos', output,
+                                              name=name,
+                                              timeout=timeout)
@@ -0,0 +1,170 @@
+import os
+import sys
+import json
+import argparse
+from circuitpainter.sweep import sweep, parse_param, SWEEP_FORMATS, \
+    _parse_value
+from circuitpainter.daemon import GenerationDaemon, DaemonClient
+
+
+def _sweep_command(args):
+    """Run the 'sweep' command"""
+    params = dict(parse_param(param) for param in args.param)
+
+    manifest = sweep(args.generator,
+                     params,
+                     output_dir=args.output_dir,
+                     formats=args.format or ['kicad_pcb'],
+                     max_workers=args.jobs,
+                     name=args.name)
+
+    for variant in manifest['variants']:
+        status = variant['status']
+        total = variant['timings'].get('total', 0)
+        print(f"{status:6} {total:8.2f}s  {variant['name']}")
+        if status != 'ok' and args.verbose:
+            print(variant['error'])
+
+    print(f"{len(manifest['variants'])} variants, "
+          f"{manifest['failed']} failed, "
+          f"{manifest['elapsed']:.2f}s")
+
+    if args.json:
+        print(json.dumps(manifest, indent=2))
+
+    return 1 if manifest['failed'] > 0 else 0
+
+
+def _daemon_command(args):
+    """Run the 'daemon' command"""
+    daemon = GenerationDaemon(args.socket, max_workers=args.jobs)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _submit_command(args):
+    """Run the 'submit' command"""
+    params = {}
+    for param in args.param:
+        name, separator, value = param.partition('=')
+        if separator == '' or name == '':
+            raise ValueError(f"Invalid parameter:{param}, expected name=value")
+        params[name] = _parse_value(value)
+
+    with DaemonClient(args.socket) as client:
+        result = client.generate(args.generator,
+                                 params,
+                                 formats=args.format or ['kicad_pcb'],
+                                 output_dir=args.output_dir,
+                                 name=args.name)
+
+    if result['status'] != 'ok':
+        print(result['error'])
+        return 1
+
+    for output in result['outputs'].values():
+        print(output)
+    print(f"{result['elapsed']:.2f}s")
+    return 0
+
+
+def _stop_command(args):
+    """Run the 'stop' command"""
+    with DaemonClient(args.socket) as client:
+        client.shutdown()
+    return 0
+
+
+def make_parser():
+    """Build the command line parser"""
+    parser = argparse.ArgumentParser(
+        prog='circuitpainter',
+        description="Circuit Painter command line tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    sweep_parser = commands.add_parser(
+        'sweep',
+        help="Run a board generator over a grid of parameters")
+    sweep_parser.add_argument(
+        'generator',
+        help="Generator function, as module:function or file.py:function")
+    sweep_parser.add_argument(
+        '-p', '--param', action='append', default=[],
+        help="Parameter values, as name=a,b,c or name=start..end[:step]. "
+             "Can be given more than once.")
+    sweep_parser.add_argument(
+        '-f', '--format', action='append', choices=SWEEP_FORMATS,
+        help="Output to write for each variant (default: kicad_pcb). Can be "
+             "given more than once.")
+    sweep_parser.add_argument(
+        '-o', '--output-dir', default='.',
+        help="Directory to write the outputs and manifest.json to")
+    sweep_parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help="Number of worker processes (default: number of CPUs)")
+    sweep_parser.add_argument(
+        '-n', '--name', default=None,
+        help="Base name for the output files (default: function name)")
+    sweep_parser.add_argument(
+        '-v', '--verbose', action='store_true',
+        help="Print the errors from failed variants")
+    sweep_parser.add_argument(
+        '--json', action='store_true',
+        help="Print the manifest")
+    sweep_parser.set_defaults(function=_sweep_command)
+
+    daemon_parser = commands.add_parser(
+        'daemon',
+        help="Run a server that generates boards in warm worker processes")
+    daemon_parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help="Number of worker processes (default: number of CPUs)")
+    daemon_parser.set_defaults(function=_daemon_command)
+
+    submit_parser = commands.add_parser(
+        'submit',
+        help="Generate a board using a running daemon")
+    submit_parser.add_argument(
+        'generator',
+        help="Generator function, as module:function or file.py:function")
+    submit_parser.add_argument(
+        '-p', '--param', action='append', default=[],
+        help="Parameter value, as name=value. Can be given more than once.")
+    submit_parser.add_argument(
+        '-f', '--format', action='append', choices=SWEEP_FORMATS,
+        help="Output to write (default: kicad_pcb). Can be given more than "
+             "once.")
+    submit_parser.add_argument(
+        '-o', '--output-dir', default='.',
+        help="Directory to write the outputs to")
+    submit_parser.add_argument(
+        '-n', '--name', default=None,
+        help="Base name for the output files (default: function name)")
+    submit_parser.set_defaults(function=_submit_command)
+
+    stop_parser = commands.add_parser(
+        'stop',
+        help="Stop a running daemon")
+    stop_parser.set_defaults(function=_stop_command)
+
+    for command_parser in (daemon_parser, submit_parser, stop_parser):
+        command_parser.add_argument(
+            '-s', '--socket', default=None,
+            help="Daemon socket (default: in $XDG_RUNTIME_DIR, or the temp "
+                 "directory)")
+
+    return parser
+
+
+def main(argv=None):
+    """Entry point for the circuitpainter command"""
+    args = make_parser().parse_args(argv)
+
+    # Generators are usually imported from the working directory
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+
+    return args.function(args)
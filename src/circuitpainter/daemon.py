@@ -0,0 +1,353 @@
+import os
+import json
+import stat
+import time
+import base64
+import socket
+import tempfile
+import threading
+import socketserver
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from circuitpainter.sweep import SWEEP_FORMATS, _init_worker, _run_variant
+
+
+def default_socket_path():
+    """Get the default location of the daemon socket
+
+    returns: Path in the user's runtime directory, or the temp directory
+    """
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir is not None and Path(runtime_dir).is_dir():
+        return f"{runtime_dir}/circuitpainter.sock"
+    return f"{tempfile.gettempdir()}/circuitpainter-{os.getuid()}.sock"
+
+
+def _check_socket_owner(socket_path):
+    """Check that an existing socket belongs to the current user
+
+    The fallback socket path in the temp directory is predictable, so another
+    user could have created it first.
+
+    socket_path: Path to the socket
+    """
+    try:
+        info = os.lstat(socket_path)
+    except FileNotFoundError:
+        return
+
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(
+            f"Not a socket owned by the current user:{socket_path}")
+
+
+def _read_outputs(outputs):
+    """Read the output files of a job, for sending back to the client
+
+    outputs: Dictionary of format to output filename
+    returns: Dictionary of format to base64 encoded file contents
+    """
+    data = {}
+    for output_format, filename in outputs.items():
+        with open(filename, 'rb') as f:
+            data[output_format] = base64.b64encode(f.read()).decode('ascii')
+    return data
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """ Handle requests from one client connection
+
+    Requests and responses are JSON objects, one per line.
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = self.server.generation_daemon.handle(request)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                response = {'status': 'error', 'error': str(e)}
+
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, generation_daemon):
+        self.generation_daemon = generation_daemon
+        super().__init__(socket_path, _RequestHandler)
+
+    def server_bind(self):
+        super().server_bind()
+        # Only the current user can connect, regardless of the umask
+        os.chmod(self.server_address, 0o600)
+
+
+class GenerationDaemon():
+    """ Long-running server that generates boards in warm worker processes
+
+    Starting Python, importing pcbnew, and indexing the footprint library
+    can take much longer than generating a small board. The daemon keeps a
+    pool of worker processes that have already done this, and runs
+    generation jobs sent to it by DaemonClient over a Unix socket. Each
+    worker keeps its footprint caches between jobs.
+
+    Generators are specified in the same way as for sweep(). Modules given
+    by name are imported once per worker, so restart the daemon after
+    changing them; scripts given as a .py path are re-loaded when they
+    change.
+    """
+
+    def __init__(self, socket_path=None, max_workers=None):
+        """ Create a generation daemon
+
+        :param socket_path: (optional) Unix socket to listen on. Defaults to
+             default_socket_path().
+        :param max_workers: (optional) Number of worker processes. Defaults
+             to the number of CPUs.
+        """
+        if socket_path is None:
+            socket_path = default_socket_path()
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+
+        self.socket_path = str(socket_path)
+        self.max_workers = max_workers
+        self.executor = None
+        self.executor_lock = threading.Lock()
+        self.server = None
+
+    def _make_executor(self):
+        # pcbnew isn't safe to fork, so start the workers from scratch
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker)
+
+    def _submit(self, *args):
+        """ Submit a job to the worker pool, replacing it if it crashed """
+        with self.executor_lock:
+            try:
+                return self.executor.submit(_run_variant, *args)
+            except BrokenProcessPool:
+                self.executor.shutdown(wait=False)
+                self.executor = self._make_executor()
+                return self.executor.submit(_run_variant, *args)
+
+    def _warm_up(self):
+        """ Start all of the workers, rather than waiting for the first jobs
+        """
+        futures = [self.executor.submit(os.getpid)
+                   for _ in range(self.max_workers)]
+        for future in futures:
+            future.result()
+
+    def serve_forever(self):
+        """ Start the workers, then handle requests until shut down """
+        _check_socket_owner(self.socket_path)
+        if Path(self.socket_path).exists():
+            # Only remove the socket if no other daemon is using it
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+                    s.connect(self.socket_path)
+                raise OSError(
+                    f"A daemon is already running at:{self.socket_path}")
+            except ConnectionRefusedError:
+                os.unlink(self.socket_path)
+
+        self.executor = self._make_executor()
+        self._warm_up()
+
+        self.server = _Server(self.socket_path, self)
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            os.unlink(self.socket_path)
+            self.executor.shutdown()
+
+    def shutdown(self):
+        """ Stop the daemon (from another thread) """
+        if self.server is not None:
+            self.server.shutdown()
+
+    def handle(self, request):
+        """ Handle a single request
+
+        request: Dictionary containing the request
+        returns: Dictionary containing the response
+        """
+        command = request.get('command')
+
+        if command == 'ping':
+            return {'status': 'ok', 'pid': os.getpid()}
+        if command == 'shutdown':
+            # Can't shut down from the request handler thread
+            threading.Thread(target=self.shutdown).start()
+            return {'status': 'ok'}
+        if command == 'generate':
+            return self._generate(request)
+
+        raise ValueError(f"Unknown command:{command}")
+
+    def _generate(self, request):
+        """ Run a generation job
+
+        request: Dictionary containing the job, see DaemonClient.generate()
+        returns: Job result, as returned by _run_variant()
+        """
+        target = request['target']
+        params = request.get('params', {})
+        formats = tuple(request.get('formats', ('kicad_pcb',)))
+        output_dir = request.get('output_dir')
+        name = request.get('name') or target.rpartition(':')[2]
+
+        for output_format in formats:
+            if output_format not in SWEEP_FORMATS:
+                raise ValueError(
+                    f"Unknown format:{output_format}, expected one of: {', '.join(SWEEP_FORMATS)}")
+
+        start = time.perf_counter()
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            # Jobs that only return the data don't need to keep the files
+            if output_dir is None:
+                output_dir = tempdir
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+            future = self._submit(target, name, params, output_dir, formats)
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                # The worker crashed (for example, inside pcbnew)
+                result = {
+                    'name': name,
+                    'params': params,
+                    'status': 'failed',
+                    'outputs': {},
+                    'timings': {},
+                    'error': f"Worker process crashed: {e}",
+                }
+
+            if request.get('return_data', False) and result['status'] == 'ok':
+                result['data'] = _read_outputs(result['outputs'])
+
+            if output_dir == tempdir:
+                result['outputs'] = {}
+
+        result['elapsed'] = time.perf_counter() - start
+        return result
+
+
+class DaemonClient():
+    """ Client for submitting jobs to a GenerationDaemon """
+
+    def __init__(self, socket_path=None, timeout=None):
+        """ Connect to a generation daemon
+
+        :param socket_path: (optional) Unix socket of the daemon. Defaults to
+             default_socket_path().
+        :param timeout: (optional) Timeout for each request, in seconds
+        """
+        if socket_path is None:
+            socket_path = default_socket_path()
+
+        _check_socket_owner(socket_path)
+
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        self.socket.connect(str(socket_path))
+        self.stream = self.socket.makefile('rwb')
+
+    def close(self):
+        """ Close the connection to the daemon """
+        self.stream.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _request(self, request):
+        """ Send a request to the daemon, and wait for the response """
+        self.stream.write(json.dumps(request).encode('utf-8') + b'\n')
+        self.stream.flush()
+
+        line = self.stream.readline()
+        if line == b'':
+            raise ConnectionError("Daemon closed the connection")
+
+        response = json.loads(line)
+        if response['status'] == 'error':
+            raise RuntimeError(f"Daemon error: {response['error']}")
+        return response
+
+    def ping(self):
+        """ Check that the daemon is running
+
+        :return: Process ID of the daemon
+        """
+        return self._request({'command': 'ping'})['pid']
+
+    def shutdown(self):
+        """ Stop the daemon """
+        self._request({'command': 'shutdown'})
+
+    def generate(
+            self,
+            target,
+            params=None,
+            formats=('kicad_pcb',),
+            output_dir=None,
+            name=None,
+            return_data=False):
+        """ Generate a board using the daemon
+
+        :param target: String in the form module:function. The module can be
+             a module name that the daemon can import, or the path to a .py
+             file.
+        :param params: (optional) Dictionary of keyword arguments for the
+             generator. The values must be JSON serializable.
+        :param formats: (optional) List of outputs to write, from:
+             'kicad_pcb', 'gerber', 'svg', 'step', and 'pos'
+        :param output_dir: (optional) Directory to write the outputs to. If
+             not specified, the outputs are only returned as data.
+        :param name: (optional) Base name for the output files. Defaults to
+             the generator function name.
+        :param return_data: (optional) If true, the contents of the outputs
+             are returned in the result's 'data' dictionary, as bytes.
+        :return: Dictionary describing the result, with the same fields as
+             the variants in a sweep() manifest. If the generator failed, the
+             status is 'failed' and the traceback is in 'error'.
+        """
+        if output_dir is None and not return_data:
+            raise ValueError("Specify an output_dir, or set return_data")
+
+        # The daemon might be running in a different directory
+        module_name, separator, function_name = target.partition(':')
+        if module_name.endswith('.py'):
+            target = f"{Path(module_name).resolve()}{separator}{function_name}"
+        if output_dir is not None:
+            output_dir = str(Path(output_dir).resolve())
+
+        result = self._request({
+            'command': 'generate',
+            'target': target,
+            'params': params or {},
+            'formats': list(formats),
+            'output_dir': output_dir,
+            'name': name,
+            'return_data': return_data,
+        })
+
+        if 'data' in result:
+            result['data'] = {output_format: base64.b64decode(data)
+                              for output_format, data in result['data'].items()}
+
+        return result
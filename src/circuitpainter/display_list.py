@@ -0,0 +1,676 @@
+import json
+from array import array
+import collections
+import numpy
+from circuitpainter.circuitpainter import CircuitPainter
+from circuitpainter.transform_matrix import TransformMatrix
+
+
+KINDS = ('track', 'arc_track', 'via', 'zone', 'circle_zone', 'line', 'arc',
+         'circle', 'poly', 'text', 'footprint', 'dimension')
+""" Types of drawing command that can be stored in a DisplayList """
+
+_KIND_INDEX = {kind: index for index, kind in enumerate(KINDS)}
+
+_VALUE_COUNTS = {
+    'track': 4,         # x1, y1, x2, y2
+    'arc_track': 5,     # x, y, radius, start, end
+    'via': 4,           # x, y, drill, width
+    'circle_zone': 3,   # x, y, radius
+    'line': 4,          # x1, y1, x2, y2
+    'arc': 5,           # x, y, radius, start, end
+    'circle': 3,        # x, y, radius
+    'text': 3,          # x, y, angle
+    'footprint': 3,     # x, y, angle
+    'dimension': 5,     # x1, y1, x2, y2, height
+}
+""" Number of values stored for each command type. Zones and polygons
+store a variable number of x, y pairs. """
+
+FLAG_FILL = 1
+""" Command flag: the shape is filled """
+
+FLAG_DESIGNATORS = 2
+""" Command flag: the footprint reference designator is visible """
+
+_ARRAYS = (('kinds', 'B'), ('layers', 'H'), ('widths', 'd'), ('nets', 'i'),
+           ('flags', 'B'), ('offsets', 'q'), ('values', 'd'))
+
+
+class DisplayList():
+    """ Compact record of drawing commands
+
+    Each command is stored with its coordinates already transformed to board
+    (world) coordinates, along with the layer, width, and net that were
+    active when it was drawn. The commands are kept in flat arrays, so a
+    display list takes much less memory than the equivalent pcbnew objects.
+
+    A display list can be replayed into any Circuit Painter, saved to and
+    loaded from a file, and inspected with to_arrays() or command().
+
+    Circles and circular zones are stored as a center and radius, so when
+    replayed they are identical but may start from a different point.
+    """
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.layers = array('H')
+        self.widths = array('d')
+        self.nets = array('i')
+        self.flags = array('B')
+        self.offsets = array('q', [0])
+        self.values = array('d')
+
+        self.layer_names = []
+        self.net_names = []
+        self.extras = {}
+
+        self._layer_indexes = {}
+        self._net_indexes = {}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def _layer_index(self, layer):
+        """ Get the index of a layer name, adding it if needed """
+        index = self._layer_indexes.get(layer)
+        if index is None:
+            index = len(self.layer_names)
+            self.layer_names.append(layer)
+            self._layer_indexes[layer] = index
+        return index
+
+    def _net_index(self, net):
+        """ Get the index of a net name (or -1 for None), adding it if needed """
+        if net is None:
+            return -1
+
+        index = self._net_indexes.get(net)
+        if index is None:
+            index = len(self.net_names)
+            self.net_names.append(net)
+            self._net_indexes[net] = index
+        return index
+
+    def add(self, kind, layer, width, net, values, flags=0, extra=None):
+        """ Record a single drawing command
+
+        :param kind: Command type, one of KINDS
+        :param layer: Layer name, for example 'F_Cu'
+        :param width: Line or track width (mm)
+        :param net: Net name, or None
+        :param values: List of values, in world coordinates. See
+             _VALUE_COUNTS for the values stored for each type.
+        :param flags: (optional) Combination of FLAG_FILL and FLAG_DESIGNATORS
+        :param extra: (optional) Tuple of additional (JSON serializable)
+             settings, for text and footprints
+        """
+        if extra is not None:
+            self.extras[len(self.kinds)] = extra
+
+        self.kinds.append(_KIND_INDEX[kind])
+        self.layers.append(self._layer_index(layer))
+        self.widths.append(width)
+        self.nets.append(self._net_index(net))
+        self.flags.append(flags)
+        self.values.extend(values)
+        self.offsets.append(len(self.values))
+
+    def add_many(self, kind, layer, width, nets, values, flags=0):
+        """ Record a list of drawing commands of the same type
+
+        :param kind: Command type, one of KINDS (must have a fixed number of
+             values)
+        :param layer: Layer name, for example 'F_Cu'
+        :param width: Line or track width (mm)
+        :param nets: Net name (or None), or list of net names with one entry
+             per command
+        :param values: NxM array of values, one row per command
+        :param flags: (optional) Combination of FLAG_FILL and FLAG_DESIGNATORS
+        """
+        values = numpy.ascontiguousarray(values, dtype=numpy.float64)
+        count, size = values.shape
+
+        if nets is None or isinstance(nets, str):
+            net_indexes = numpy.full(count, self._net_index(nets))
+        elif len(nets) != count:
+            raise ValueError(
+                f'Incorrect number of nets provided, expected:{count} got:{len(nets)}')
+        else:
+            net_indexes = [self._net_index(net) for net in nets]
+
+        start = len(self.values)
+        self.kinds.extend(array('B', [_KIND_INDEX[kind]]) * count)
+        self.layers.extend(array('H', [self._layer_index(layer)]) * count)
+        self.widths.extend(array('d', [width]) * count)
+        self.nets.frombytes(numpy.asarray(net_indexes, dtype='i').tobytes())
+        self.flags.extend(array('B', [flags]) * count)
+        self.values.frombytes(values.tobytes())
+        self.offsets.frombytes(
+            (start + size * numpy.arange(1, count + 1, dtype=numpy.int64))
+            .tobytes())
+
+    def to_arrays(self):
+        """ Get a copy of the commands as numpy arrays
+
+        :return: Dictionary of arrays: 'kinds', 'layers', 'widths', 'nets',
+             and 'flags' have one entry per command, and the values for
+             command i are values[offsets[i]:offsets[i + 1]].
+        """
+        # Copy the arrays, otherwise the display list couldn't be extended
+        # while they are in use
+        return {name: numpy.frombuffer(getattr(self, name), dtype=typecode)
+                .copy()
+                for name, typecode in _ARRAYS}
+
+    def command(self, index):
+        """ Get a single command
+
+        :param index: Command index
+        :return: Dictionary describing the command
+        """
+        net = self.nets[index]
+        return {
+            'kind': KINDS[self.kinds[index]],
+            'layer': self.layer_names[self.layers[index]],
+            'width': self.widths[index],
+            'net': self.net_names[net] if net >= 0 else None,
+            'flags': self.flags[index],
+            'values': self.values[self.offsets[index]:
+                                  self.offsets[index + 1]].tolist(),
+            'extra': self.extras.get(index),
+        }
+
+    def counts(self):
+        """ Count the commands of each type
+
+        :return: Dictionary of command type to count
+        """
+        return {KINDS[kind]: count
+                for kind, count in collections.Counter(self.kinds).items()}
+
+    def copy(self):
+        """ Get an independent copy of the display list
+
+        :return: DisplayList
+        """
+        display_list = DisplayList()
+        for name, typecode in _ARRAYS:
+            setattr(display_list, name, array(typecode, getattr(self, name)))
+        for layer in self.layer_names:
+            display_list._layer_index(layer)
+        for net in self.net_names:
+            display_list._net_index(net)
+        display_list.extras = dict(self.extras)
+        return display_list
+
+    def save(self, filename):
+        """ Save the display list to a file
+
+        :param filename: Name of the file to write (numpy .npz format)
+        """
+        names = json.dumps({
+            'layers': self.layer_names,
+            'nets': self.net_names,
+            'extras': list(self.extras.items()),
+        })
+        numpy.savez_compressed(filename, names=numpy.array(names),
+                               **self.to_arrays())
+
+    @classmethod
+    def load(cls, filename):
+        """ Load a display list that was written by save()
+
+        :param filename: Name of the file to read
+        :return: DisplayList
+        """
+        display_list = cls()
+        with numpy.load(filename) as data:
+            for name, typecode in _ARRAYS:
+                setattr(display_list, name,
+                        array(typecode, data[name].astype(typecode).tobytes()))
+            names = json.loads(str(data['names']))
+
+        for layer in names['layers']:
+            display_list._layer_index(layer)
+        for net in names['nets']:
+            display_list._net_index(net)
+        display_list.extras = {int(index): tuple(extra)
+                               for index, extra in names['extras']}
+
+        return display_list
+
+    def replay(self, painter, start=0):
+        """ Draw the commands into a Circuit Painter
+
+        Commands are grouped by type, layer, and width, and each group is
+        drawn with a single call to the painter's list drawing functions
+        (such as tracks() and vias()). The painter's transform and drawing
+        settings are restored afterwards.
+
+        :param painter: CircuitPainter (or SexprCircuitPainter) to draw into
+        :param start: (optional) Index of the first command to replay
+        """
+        arrays = self.to_arrays()
+        kinds = arrays['kinds'][start:]
+        layers = arrays['layers'][start:]
+        widths = arrays['widths'][start:]
+        flags = arrays['flags'][start:]
+
+        if len(kinds) == 0:
+            return
+
+        # Stable sort, so commands keep their order within each group
+        order = numpy.lexsort((flags, widths, layers, kinds))
+        keys = numpy.column_stack((kinds[order], layers[order],
+                                   widths[order], flags[order]))
+        boundaries = numpy.flatnonzero(numpy.any(keys[1:] != keys[:-1],
+                                                 axis=1)) + 1
+
+        saved = (painter.transform, painter.draw_layer, painter.draw_width,
+                 painter.draw_fill, painter.show_reference_designators)
+        painter.transform = TransformMatrix()
+
+        try:
+            for group in numpy.split(order, boundaries):
+                self._replay_group(painter, arrays, group + start)
+        finally:
+            (painter.transform, painter.draw_layer, painter.draw_width,
+             painter.draw_fill, painter.show_reference_designators) = saved
+
+    def _replay_group(self, painter, arrays, indexes):
+        """ Draw a group of commands with the same type, layer and width
+
+        :param painter: Painter to draw into
+        :param arrays: Arrays from to_arrays()
+        :param indexes: Indexes of the commands in the group
+        """
+        first = indexes[0]
+        kind = KINDS[arrays['kinds'][first]]
+        group_flags = int(arrays['flags'][first])
+
+        painter.layer(self.layer_names[arrays['layers'][first]])
+        painter.width(float(arrays['widths'][first]))
+        painter.draw_fill = bool(group_flags & FLAG_FILL)
+        painter.show_reference_designators = bool(
+            group_flags & FLAG_DESIGNATORS)
+
+        nets = [self.net_names[net] if net >= 0 else None
+                for net in arrays['nets'][indexes].tolist()]
+
+        offsets = arrays['offsets']
+        size = _VALUE_COUNTS.get(kind)
+        if size is not None:
+            values = arrays['values'][
+                offsets[indexes][:, numpy.newaxis] + numpy.arange(size)]
+
+        if kind == 'track':
+            painter.tracks(values, nets)
+        elif kind == 'arc_track':
+            painter.arc_tracks(values[:, 0:2], values[:, 2], values[:, 3],
+                               values[:, 4], nets)
+        elif kind == 'via':
+            painter.vias(values[:, 0:2], nets, values[:, 2], values[:, 3])
+        elif kind == 'line':
+            painter.lines(values)
+        elif kind == 'arc':
+            painter.arcs(values[:, 0:2], values[:, 2], values[:, 3],
+                         values[:, 4])
+        elif kind == 'circle':
+            painter.circles(values[:, 0:2], values[:, 2])
+        elif kind == 'circle_zone':
+            for (x, y, radius), net in zip(values.tolist(), nets):
+                painter.circle_zone(x, y, radius, net, arcs=True)
+        elif kind in ('zone', 'poly'):
+            for index, net in zip(indexes.tolist(), nets):
+                points = arrays['values'][offsets[index]:offsets[index + 1]]
+                if kind == 'zone':
+                    painter.poly_zone(points.reshape(-1, 2), net)
+                else:
+                    painter.poly(points.reshape(-1, 2))
+        elif kind == 'text':
+            for index, (x, y, angle) in zip(indexes.tolist(),
+                                            values.tolist()):
+                message, mirrored, bold, italic, knockout = self.extras[index]
+                painter.text(x, y, message, angle, mirrored, bold, italic,
+                             knockout)
+        elif kind == 'footprint':
+            for index, (x, y, angle) in zip(indexes.tolist(),
+                                            values.tolist()):
+                library, name, reference, footprint_nets, library_path = \
+                    self.extras[index]
+                painter.footprint(x, y, library, name, reference, angle,
+                                  footprint_nets, library_path)
+        elif kind == 'dimension':
+            for x1, y1, x2, y2, height in values.tolist():
+                painter.dimension(x1, y1, x2, y2, height)
+
+
+class RecordingCircuitPainter(CircuitPainter):
+    """ Circuit Painter that records drawing commands in a display list
+
+    Drawing commands don't create pcbnew objects straight away. Instead,
+    they are recorded in a DisplayList (available as display_list), and
+    materialized into the board in one batch, grouped by type, when the
+    board is saved, exported, or its footprints and pads are looked up.
+
+    Because of this, the drawing functions return None instead of the
+    created items. The display list can also be replayed into other
+    painters (see DisplayList.replay()), or saved for later.
+    """
+
+    def __init__(
+            self,
+            filename=None,
+            library_path=None,
+            preserve_origin=False,
+            export_cache=None,
+            seed=None):
+        """ Create a Circuit Builder context
+
+        See CircuitPainter for the parameters.
+        """
+        self.display_list = DisplayList()
+        self.recording = True
+        self.materialized = 0
+
+        super().__init__(filename, library_path, preserve_origin,
+                         export_cache, seed)
+
+    def materialize(self):
+        """ Create the board items for any commands that were recorded
+
+        This is called automatically when needed.
+        """
+        if self.materialized == len(self.display_list):
+            return
+
+        self.recording = False
+        try:
+            self.display_list.replay(self, self.materialized)
+        finally:
+            self.recording = True
+        self.materialized = len(self.display_list)
+
+    def fork(self):
+        """ Create an independent copy of the painter
+
+        See CircuitPainter.fork(). Recorded commands that haven't been
+        materialized yet are copied without being materialized.
+
+        :return: New painter
+        """
+        clone = super().fork()
+        clone.display_list = self.display_list.copy()
+        return clone
+
+    def _world_points(self, points):
+        """ Transform an array of local coordinates to world coordinates """
+        return self.transform.project_many(points)
+
+    def _world_angles(self, angles):
+        """ Convert local arc angles to world angles (degrees) """
+        return numpy.asarray(angles, dtype=float) - self.transform.get_angle()
+
+    def _record_arcs(self, kind, centers, radii, starts, ends, net):
+        """ Record a list of arcs or arc tracks """
+        centers = self._world_points(centers)
+        count = len(centers)
+        values = numpy.column_stack((
+            centers,
+            numpy.broadcast_to(numpy.asarray(radii, dtype=float), (count,)),
+            numpy.broadcast_to(self._world_angles(starts), (count,)),
+            numpy.broadcast_to(self._world_angles(ends), (count,))))
+        self.display_list.add_many(kind, self.draw_layer, self.draw_width,
+                                   net, values)
+
+    def track(self, x1, y1, x2, y2, net=None):
+        """ Record a PCB track, see CircuitPainter.track() """
+        self.tracks([[x1, y1, x2, y2]], net)
+
+    def tracks(self, segments, net=None):
+        """ Record a list of PCB tracks, see CircuitPainter.tracks() """
+        if not self.recording:
+            return super().tracks(segments, net)
+
+        values = self._world_points(
+            numpy.reshape(segments, (-1, 2))).reshape(-1, 4)
+        self.display_list.add_many('track', self.draw_layer, self.draw_width,
+                                   net, values)
+        return None
+
+    def arc_track(self, x, y, radius, start, end, net=None):
+        """ Record an arc-shaped track, see CircuitPainter.arc_track() """
+        self.arc_tracks([[x, y]], radius, start, end, net)
+
+    def arc_tracks(self, centers, radii, starts, ends, net=None):
+        """ Record a list of arc-shaped tracks, see
+        CircuitPainter.arc_tracks() """
+        if not self.recording:
+            return super().arc_tracks(centers, radii, starts, ends, net)
+
+        self._record_arcs('arc_track', centers, radii, starts, ends, net)
+        return None
+
+    def via(self, x, y, net=None, d=.3, w=.6):
+        """ Record a via, see CircuitPainter.via() """
+        self.vias([[x, y]], net, d, w)
+
+    def vias(self, points, net=None, d=.3, w=.6):
+        """ Record a list of vias, see CircuitPainter.vias() """
+        if not self.recording:
+            return super().vias(points, net, d, w)
+
+        points = self._world_points(points)
+        count = len(points)
+        values = numpy.column_stack((
+            points,
+            numpy.broadcast_to(numpy.asarray(d, dtype=float), (count,)),
+            numpy.broadcast_to(numpy.asarray(w, dtype=float), (count,))))
+        self.display_list.add_many('via', self.draw_layer, self.draw_width,
+                                   net, values)
+        return None
+
+    def poly_zone(self, points, net=None):
+        """ Record a polygonal zone, see CircuitPainter.poly_zone() """
+        if not self.recording:
+            return super().poly_zone(points, net)
+
+        self.display_list.add('zone', self.draw_layer, self.draw_width, net,
+                              self._world_points(points).ravel())
+        return None
+
+    def circle_zone(self, x, y, radius, net=None, arcs=False):
+        """ Record a circular zone, see CircuitPainter.circle_zone() """
+        if not self.recording or not arcs:
+            # Zones made of segments are recorded by poly_zone()
+            return super().circle_zone(x, y, radius, net, arcs)
+
+        x, y = self.transform.project(x, y)
+        self.display_list.add('circle_zone', self.draw_layer,
+                              self.draw_width, net, (x, y, radius))
+        return None
+
+    def footprint(
+            self,
+            x,
+            y,
+            library,
+            name=None,
+            reference='P?',
+            angle=0,
+            nets=None,
+            library_path=None):
+        """ Record a footprint, see CircuitPainter.footprint()
+
+        The footprint is checked against the library index immediately,
+        and the reference designator is assigned when it is recorded.
+        """
+        if not self.recording:
+            return super().footprint(x, y, library, name, reference, angle,
+                                     nets, library_path)
+
+        reference = self._next_reference(reference)
+        library_path, library, name = self._resolve_footprint(
+            library, name, library_path)
+
+        x, y = self.transform.project(x, y)
+        flags = FLAG_DESIGNATORS if self.show_reference_designators else 0
+        self.display_list.add(
+            'footprint', self.draw_layer, self.draw_width, None,
+            (x, y, angle + self.transform.get_angle()), flags,
+            (library, name, reference,
+             list(nets) if nets is not None else None, library_path))
+        return None
+
+    def get_pads(self, reference):
+        """ Get a list of the pads in the specified footprint
+
+        See CircuitPainter.get_pads()
+        """
+        self.materialize()
+        return super().get_pads(reference)
+
+    def get_pad(self, reference, number):
+        """ Get a single pad from the specified footprint
+
+        See CircuitPainter.get_pad()
+        """
+        self.materialize()
+        return super().get_pad(reference, number)
+
+    def line(self, x1, y1, x2, y2):
+        """ Record a line, see CircuitPainter.line() """
+        self.lines([[x1, y1, x2, y2]])
+
+    def lines(self, segments):
+        """ Record a list of lines, see CircuitPainter.lines() """
+        if not self.recording:
+            return super().lines(segments)
+
+        values = self._world_points(
+            numpy.reshape(segments, (-1, 2))).reshape(-1, 4)
+        self.display_list.add_many('line', self.draw_layer, self.draw_width,
+                                   None, values)
+        return None
+
+    def arc(self, x, y, radius, start, end):
+        """ Record an arc, see CircuitPainter.arc() """
+        self.arcs([[x, y]], radius, start, end)
+
+    def arcs(self, centers, radii, starts, ends):
+        """ Record a list of arcs, see CircuitPainter.arcs() """
+        if not self.recording:
+            return super().arcs(centers, radii, starts, ends)
+
+        self._record_arcs('arc', centers, radii, starts, ends, None)
+        return None
+
+    def circle(self, x, y, radius):
+        """ Record a circle, see CircuitPainter.circle() """
+        self.circles([[x, y]], radius)
+
+    def circles(self, centers, radii):
+        """ Record a list of circles, see CircuitPainter.circles() """
+        if not self.recording:
+            return super().circles(centers, radii)
+
+        centers = self._world_points(centers)
+        values = numpy.column_stack((centers, numpy.broadcast_to(
+            numpy.asarray(radii, dtype=float), (len(centers),))))
+        self.display_list.add_many(
+            'circle', self.draw_layer, self.draw_width, None, values,
+            FLAG_FILL if self.draw_fill else 0)
+        return None
+
+    def poly(self, points):
+        """ Record a polygon, see CircuitPainter.poly() """
+        if not self.recording:
+            return super().poly(points)
+
+        self.display_list.add('poly', self.draw_layer, self.draw_width, None,
+                              self._world_points(points).ravel(),
+                              FLAG_FILL if self.draw_fill else 0)
+        return None
+
+    def text(
+            self,
+            x,
+            y,
+            message,
+            angle=0,
+            mirrored=False,
+            bold=False,
+            italic=False,
+            knockout=False):
+        """ Record text, see CircuitPainter.text() """
+        if not self.recording:
+            return super().text(x, y, message, angle, mirrored, bold, italic,
+                                knockout)
+
+        x, y = self.transform.project(x, y)
+        self.display_list.add(
+            'text', self.draw_layer, self.draw_width, None,
+            (x, y, self.transform.get_angle() + angle), 0,
+            (message, mirrored, bold, italic, knockout))
+        return None
+
+    def dimension(self, x1, y1, x2, y2, height):
+        """ Record a dimension, see CircuitPainter.dimension() """
+        if not self.recording:
+            return super().dimension(x1, y1, x2, y2, height)
+
+        (x1, y1), (x2, y2) = self._world_points([[x1, y1], [x2, y2]])
+        self.display_list.add('dimension', self.draw_layer, self.draw_width,
+                              None, (x1, y1, x2, y2, height))
+        return None
+
+    def populated_layers(self):
+        """ Get the names of the layers that contain items
+
+        See CircuitPainter.populated_layers()
+        """
+        self.materialize()
+        return super().populated_layers()
+
+    def select(self, kind=None, layer=None, net=None, within=None):
+        """ Select items that were drawn by this painter
+
+        See CircuitPainter.select()
+        """
+        self.materialize()
+        return super().select(kind, layer, net, within)
+
+    def bounding_box(self, selection=None):
+        """ Get the bounding box of the items drawn by this painter
+
+        See CircuitPainter.bounding_box()
+        """
+        self.materialize()
+        return super().bounding_box(selection)
+
+    def summarize(self, by='layer', selection=None):
+        """ Count the items drawn by this painter, by type, layer or net
+
+        See CircuitPainter.summarize()
+        """
+        self.materialize()
+        return super().summarize(by, selection)
+
+    def save(self, filename):
+        """ Save the board design to a KiCad board file
+
+        Any recorded commands are materialized first.
+
+        :param filename: File name to write to
+        """
+        self.materialize()
+        super().save(filename)
+
+    def _plot_gerbers(self, name, plotdir, layers=None):
+        """ Plot gerbers and drill files using the pcbnew plot API
+
+        See CircuitPainter._plot_gerbers()
+        """
+        self.materialize()
+        super()._plot_gerbers(name, plotdir, layers)
@@ -0,0 +1,175 @@
+import os
+import json
+import shutil
+import hashlib
+import functools
+import subprocess
+from pathlib import Path
+
+
+@functools.lru_cache(maxsize=None)
+def _kicad_cli_version():
+    """Get the version string reported by kicad-cli"""
+    try:
+        return subprocess.check_output(
+            ["kicad-cli", "--version"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+class ExportCache():
+    """ Content-addressed cache for board exports
+
+    Export outputs are stored under a hash of the saved board file, the
+    kicad-cli commands used to create them, and the kicad-cli version. If a
+    board is exported again without changing, the output is copied from the
+    cache instead of running kicad-cli.
+
+    The cache can be shared between processes. When it grows larger than
+    max_size, the least recently used entries are removed.
+    """
+
+    def __init__(self, cache_dir, max_size=1024 * 1024 * 1024):
+        """ Open (or create) an export cache
+
+        :param cache_dir: Directory to store the cached outputs in
+        :param max_size: (optional) Maximum size of the cache (bytes)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, board_file, output_name, commands, options=None):
+        """ Compute the cache key for an export
+
+        :param board_file: Saved board file that is being exported
+        :param output_name: Name of the output file
+        :param commands: List of kicad-cli commands used to make the output
+        :param options: (optional) Dictionary of any other settings that
+             change the output, such as the zip compression level
+        :return: Cache key (hex string)
+        """
+        digest = hashlib.sha256()
+
+        with open(board_file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+
+        # The board is saved to a temporary location, so leave its path out
+        # of the commands.
+        commands = [[argument if argument != board_file else '<board>'
+                     for argument in command]
+                    for command in commands]
+
+        digest.update(json.dumps([output_name,
+                                  commands,
+                                  options or {},
+                                  _kicad_cli_version()],
+                                 sort_keys=True).encode())
+
+        return digest.hexdigest()
+
+    def _path(self, key):
+        """ Location of a cache entry """
+        return self.cache_dir / key[:2] / key
+
+    def get(self, key, output):
+        """ Copy a cached output to the given location, if it exists
+
+        :param key: Cache key, from key()
+        :param output: File name, or writable file-like object to copy the
+             cached output to
+        :return: True if the output was found in the cache
+        """
+        path = self._path(key)
+
+        try:
+            if hasattr(output, 'write'):
+                with open(path, 'rb') as f:
+                    shutil.copyfileobj(f, output)
+            else:
+                shutil.copyfile(path, output)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+
+        # Mark the entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return True
+
+    def put(self, key, output):
+        """ Store an output in the cache
+
+        :param key: Cache key, from key()
+        :param output: File name of the output to store, or its contents
+        """
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+
+        # Copy to a temporary name first, so that other processes never see
+        # a partially written entry
+        temp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        if isinstance(output, bytes):
+            temp_path.write_bytes(output)
+        else:
+            shutil.copyfile(output, temp_path)
+        os.replace(temp_path, path)
+
+        self._evict()
+
+    def _evict(self):
+        """ Remove the least recently used entries until the cache fits """
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob('*/*'):
+            if path.suffix == '.tmp':
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        while total > self.max_size and len(entries) > 0:
+            _, size, path = entries.pop(0)
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        """ Remove all entries from the cache """
+        for path in self.cache_dir.glob('*/*'):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        """ Get the cache statistics
+
+        :return: Dictionary of hit, miss and eviction counts, and the current
+             size (bytes) and number of entries in the cache
+        """
+        sizes = [path.stat().st_size for path in self.cache_dir.glob('*/*')]
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(sizes),
+            'size': sum(sizes),
+        }
@@ -0,0 +1,248 @@
+import os
+import json
+import difflib
+import functools
+import platform
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Increment this if the format of the cache file changes
+_INDEX_VERSION = 1
+
+
+def _default_cache_dir():
+    """Get the directory to store the footprint index cache in"""
+    if platform.system() == "Windows":
+        base = os.environ.get('LOCALAPPDATA', Path.home())
+    else:
+        base = os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')
+
+    return Path(base) / 'circuitpainter'
+
+
+def _scan_library(library_dir):
+    """List the footprints in a .pretty library directory
+
+    library_dir: Path to the .pretty directory
+    returns: Dictionary of footprint name to footprint file name
+    """
+    footprints = {}
+    with os.scandir(library_dir) as entries:
+        for entry in entries:
+            name, extension = os.path.splitext(entry.name)
+            if extension == '.kicad_mod':
+                footprints[name] = entry.name
+
+    return footprints
+
+
+def _library_mtimes(library_path):
+    """Get the modification time of each .pretty library directory
+
+    library_path: Path to the footprint libraries
+    returns: Dictionary of library name to directory mtime (ns)
+    """
+    mtimes = {}
+    with os.scandir(library_path) as entries:
+        for entry in entries:
+            name, extension = os.path.splitext(entry.name)
+            if extension == '.pretty' and entry.is_dir():
+                mtimes[name] = entry.stat().st_mtime_ns
+
+    return mtimes
+
+
+class FootprintLibraryIndex():
+    """ Index of the footprints available in a footprint library path
+
+    The library path is scanned once, and the index is persisted to a cache
+    file. The cache is re-used as long as the modification times of the
+    library directories haven't changed. If a footprint isn't found, the
+    index is refreshed before giving up, so footprints added while the
+    process is running are picked up.
+    """
+
+    def __init__(self, library_path, cache_dir=None, max_workers=None):
+        """ Load or build the footprint index for a library path
+
+        :param library_path: Path to the footprint libraries
+        :param cache_dir: (optional) Directory to store the index cache in.
+        :param max_workers: (optional) Number of threads to use when scanning
+        """
+        self.library_path = str(Path(library_path).resolve())
+
+        if cache_dir is None:
+            cache_dir = _default_cache_dir()
+        self.cache_dir = Path(cache_dir)
+
+        self.max_workers = max_workers
+        self.libraries = {}
+        self.locations = {}
+
+        self.refresh()
+
+    @property
+    def cache_file(self):
+        """ Name of the cache file for this library path """
+        key = self.library_path.replace(os.sep, '_').replace(':', '_')
+        return self.cache_dir / f"footprints{key}.json"
+
+    def refresh(self):
+        """ Update the index, re-scanning only libraries that changed """
+        try:
+            mtimes = _library_mtimes(self.library_path)
+        except OSError:
+            mtimes = {}
+
+        cached = self._read_cache()
+
+        libraries = {}
+        stale = []
+        for library, mtime in mtimes.items():
+            entry = cached.get(library)
+            if entry is not None and entry['mtime'] == mtime:
+                libraries[library] = entry['footprints']
+            else:
+                stale.append(library)
+
+        if len(stale) > 0:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                scanned = executor.map(
+                    _scan_library,
+                    [f"{self.library_path}/{library}.pretty" for library in stale])
+                libraries.update(zip(stale, scanned))
+
+        if len(stale) > 0 or len(cached) != len(libraries):
+            self._write_cache({library: {'mtime': mtimes[library],
+                                         'footprints': libraries[library]}
+                               for library in libraries})
+
+        self.libraries = libraries
+
+        # Reverse map, for looking up footprints without a library name
+        self.locations = {}
+        for library, footprints in sorted(libraries.items()):
+            for name in footprints:
+                self.locations.setdefault(name, []).append(library)
+
+    def _read_cache(self):
+        """ Read the cached index, or an empty index if it isn't valid """
+        try:
+            with open(self.cache_file, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if data.get('version') != _INDEX_VERSION \
+                or data.get('library_path') != self.library_path:
+            return {}
+
+        return data.get('libraries', {})
+
+    def _write_cache(self, libraries):
+        """ Write the index to the cache file
+
+        Failing to write the cache isn't an error, it just means that the
+        library will be scanned again next time.
+        """
+        data = {
+            'version': _INDEX_VERSION,
+            'library_path': self.library_path,
+            'libraries': libraries,
+        }
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_file = self.cache_file.with_suffix(f'.{os.getpid()}.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_file, self.cache_file)
+        except OSError:
+            pass
+
+    def _suggest(self, library, name):
+        """ Build a hint listing footprints with similar names """
+        candidates = []
+
+        if library in self.libraries:
+            candidates += [f"{library}:{footprint}"
+                           for footprint in difflib.get_close_matches(
+                               name, self.libraries[library].keys())]
+        elif library is not None:
+            candidates += [f"{match}:{name}"
+                           for match in difflib.get_close_matches(
+                               library, self.libraries.keys())
+                           if name in self.libraries[match]]
+
+        candidates += [f"{location}:{footprint}"
+                       for footprint in difflib.get_close_matches(
+                           name, self.locations.keys())
+                       for location in self.locations[footprint]]
+
+        # Remove duplicates, but keep the best matches first
+        candidates = list(dict.fromkeys(candidates))[:5]
+
+        if len(candidates) == 0:
+            return ''
+
+        return f", did you mean: {', '.join(candidates)}?"
+
+    def find(self, library, name):
+        """ Get the path to a footprint file
+
+        :param library: Library name, for example: 'LED_SMD'
+        :param name: Footprint name, for example: 'LED_1210_3225Metric'
+        :return: Path to the footprint file
+        """
+        filename = self.libraries.get(library, {}).get(name)
+        if filename is None:
+            # The library might have changed since it was scanned
+            self.refresh()
+            filename = self.libraries.get(library, {}).get(name)
+        if filename is None:
+            raise IOError(
+                f"Footprint {name} in library:{self.library_path}/{library}.pretty not found"
+                + self._suggest(library, name))
+
+        return f"{self.library_path}/{library}.pretty/{filename}"
+
+    def resolve(self, footprint):
+        """ Find the library containing a footprint
+
+        :param footprint: Footprint name, either including the library
+             (for example: 'LED_SMD:LED_1210_3225Metric'), or on its own (for
+             example: 'LED_1210_3225Metric').
+        :return: Tuple of library, footprint name
+        """
+        if ':' in footprint:
+            library, name = footprint.split(':', 1)
+            self.find(library, name)
+            return library, name
+
+        locations = self.locations.get(footprint, [])
+        if len(locations) == 0:
+            self.refresh()
+            locations = self.locations.get(footprint, [])
+        if len(locations) == 0:
+            raise IOError(
+                f"Footprint {footprint} not found in:{self.library_path}"
+                + self._suggest(None, footprint))
+        if len(locations) > 1:
+            raise ValueError(
+                f"Footprint {footprint} is ambiguous, specify one of: "
+                + ', '.join(f"{library}:{footprint}" for library in locations))
+
+        return locations[0], footprint
+
+
+@functools.lru_cache(maxsize=16)
+def get_library_index(library_path):
+    """Get the (shared) footprint index for a library path
+
+    The indexes are kept for the life of the process; use
+    clear_footprint_cache() to discard them.
+
+    library_path: Path to the footprint libraries
+    """
+    return FootprintLibraryIndex(library_path)
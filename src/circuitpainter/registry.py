@@ -0,0 +1,310 @@
+from array import array
+import numpy
+
+
+class ItemRegistry():
+    """ Columnar record of the items drawn by a painter
+
+    Each item is stored with its type, layer, net, and bounding box (in
+    board coordinates, mm) in typed arrays, along with a reference to the
+    item itself. Adding an item only appends to the arrays, and queries view
+    them as numpy arrays, so large numbers of items can be selected,
+    summarized, and edited without searching the board.
+
+    Types, layers and nets are stored as indexes into name tables (nets use
+    -1 for items that aren't connected). Deleted items stay in the arrays,
+    so that existing selections stay valid, but are left out of any new
+    selections.
+
+    Each item takes 40 bytes in the arrays. Once the references to the items
+    are released, that is all the memory that they use.
+    """
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.layers = array('h')
+        self.nets = array('i')
+        self.alive = array('b')
+        self.bboxes = array('d')
+
+        # References to the items, starting from the first one that hasn't
+        # been released
+        self.objects = []
+        self.released = 0
+
+        self.kind_names = []
+        self.layer_names = []
+        self.net_names = []
+
+        self._indexes = ({}, {}, {})
+
+    def __len__(self):
+        """ Number of items that haven't been deleted """
+        return int(numpy.count_nonzero(self._column('alive')))
+
+    def _column(self, name):
+        """ View a column as a numpy array """
+        column = getattr(self, name)
+        if name == 'bboxes':
+            return numpy.frombuffer(column, dtype=numpy.float64).reshape(-1, 4)
+        if name == 'alive':
+            return numpy.frombuffer(column, dtype=numpy.bool_)
+        return numpy.frombuffer(column, dtype=column.typecode)
+
+    @staticmethod
+    def _name_index(names, indexes, name):
+        """ Get the index of a name in a name table, adding it if needed """
+        index = indexes.get(name)
+        if index is None:
+            index = len(names)
+            names.append(name)
+            indexes[name] = index
+        return index
+
+    def add(self, item, kind, layer, net, bbox):
+        """ Record an item
+
+        :param item: The item (pcbnew object or BoardItem)
+        :param kind: Item type, for example 'track' or 'via'
+        :param layer: Layer name, for example 'F_Cu'
+        :param net: Net name, or None if the item isn't connected
+        :param bbox: Bounding box, as left, top, right, bottom (mm)
+        :return: Index of the item in the registry
+        """
+        kind_indexes, layer_indexes, net_indexes = self._indexes
+
+        index = kind_indexes.get(kind)
+        if index is None:
+            index = self._name_index(self.kind_names, kind_indexes, kind)
+        self.kinds.append(index)
+
+        index = layer_indexes.get(layer)
+        if index is None:
+            index = self._name_index(self.layer_names, layer_indexes, layer)
+        self.layers.append(index)
+
+        if net is None:
+            self.nets.append(-1)
+        else:
+            index = net_indexes.get(net)
+            if index is None:
+                index = self._name_index(self.net_names, net_indexes, net)
+            self.nets.append(index)
+
+        self.alive.append(1)
+        self.bboxes.extend(bbox)
+        self.objects.append(item)
+        return self.released + len(self.objects) - 1
+
+    def add_many(self, items, kind, layer, nets, bboxes):
+        """ Record a list of items that have the same type and layer
+
+        This is equivalent to calling add() for each item, but the columns
+        are extended in a single step.
+
+        :param items: List of items
+        :param kind: Item type, for example 'track' or 'via'
+        :param layer: Layer name, for example 'F_Cu'
+        :param nets: Net name (or None) for all of the items, or list of net
+             names with one entry per item
+        :param bboxes: Nx4 array of bounding boxes, as left, top, right,
+             bottom (mm)
+        :return: Index of the first item in the registry
+        """
+        count = len(items)
+        kind_indexes, layer_indexes, net_indexes = self._indexes
+
+        self.kinds.extend(array('B', [self._name_index(
+            self.kind_names, kind_indexes, kind)]) * count)
+        self.layers.extend(array('h', [self._name_index(
+            self.layer_names, layer_indexes, layer)]) * count)
+
+        if nets is None or isinstance(nets, str):
+            nets = [nets] * count
+        found = {None: -1}
+        for net in nets:
+            if net not in found:
+                found[net] = self._name_index(self.net_names, net_indexes, net)
+        self.nets.extend(array('i', [found[net] for net in nets]))
+
+        self.alive.extend(array('b', [1]) * count)
+        self.bboxes.frombytes(numpy.ascontiguousarray(
+            numpy.reshape(bboxes, (count, 4)), dtype=numpy.float64).tobytes())
+
+        start = self.released + len(self.objects)
+        self.objects.extend(items)
+        return start
+
+    def copy(self):
+        """ Get a copy of the registry, that refers to the same items
+
+        :return: ItemRegistry
+        """
+        registry = ItemRegistry()
+        for name in ('kinds', 'layers', 'nets', 'alive', 'bboxes'):
+            column = getattr(self, name)
+            setattr(registry, name, array(column.typecode, column))
+        registry.objects = list(self.objects)
+        registry.released = self.released
+
+        registry.kind_names = list(self.kind_names)
+        registry.layer_names = list(self.layer_names)
+        registry.net_names = list(self.net_names)
+        registry._indexes = tuple(dict(indexes) for indexes in self._indexes)
+        return registry
+
+    @staticmethod
+    def _match(column, indexes, values):
+        """ Find the rows where a column matches any of a list of names """
+        if isinstance(values, str):
+            values = [values]
+        wanted = [indexes[value] for value in values if value in indexes]
+        return numpy.isin(column, wanted)
+
+    def select(self, kind=None, layer=None, net=None, within=None):
+        """ Select items by type, layer, net, and position
+
+        Each condition that is specified must match.
+
+        :param kind: (optional) Item type, or list of types. Types are:
+             'track', 'arc_track', 'via', 'zone', 'footprint', 'line', 'arc',
+             'circle', 'poly', 'text', and 'dimension'.
+        :param layer: (optional) Layer name, or list of layer names
+        :param net: (optional) Net name, or list of net names
+        :param within: (optional) Rectangle, as left, top, right, bottom in
+             board coordinates (mm). Only items that are completely inside
+             it are selected.
+        :return: Array of item indexes
+        """
+        mask = self._column('alive').copy()
+        kind_indexes, layer_indexes, net_indexes = self._indexes
+
+        if kind is not None:
+            mask &= self._match(self._column('kinds'), kind_indexes, kind)
+        if layer is not None:
+            mask &= self._match(self._column('layers'), layer_indexes, layer)
+        if net is not None:
+            mask &= self._match(self._column('nets'), net_indexes, net)
+        if within is not None:
+            x1, y1, x2, y2 = within
+            bboxes = self._column('bboxes')
+            mask &= (bboxes[:, 0] >= min(x1, x2)) \
+                & (bboxes[:, 1] >= min(y1, y2)) \
+                & (bboxes[:, 2] <= max(x1, x2)) \
+                & (bboxes[:, 3] <= max(y1, y2))
+
+        return numpy.flatnonzero(mask)
+
+    def live(self, selection=None):
+        """ Remove deleted items from a selection
+
+        :param selection: (optional) Array of item indexes. If not specified,
+             all items are selected.
+        :return: Array of item indexes
+        """
+        alive = self._column('alive')
+        if selection is None:
+            return numpy.flatnonzero(alive)
+
+        selection = numpy.asarray(selection, dtype=numpy.int64).reshape(-1)
+        return selection[alive[selection]]
+
+    def get(self, selection):
+        """ Get the selected items
+
+        :param selection: Array of item indexes
+        :return: List of items. Items that have been released are None.
+        """
+        released = self.released
+        return [self.objects[index - released] if index >= released else None
+                for index in self.live(selection).tolist()]
+
+    def bounding_box(self, selection=None):
+        """ Get the bounding box of the selected items
+
+        :param selection: (optional) Array of item indexes. If not specified,
+             all items are included.
+        :return: Tuple of left, top, right, bottom, in board coordinates
+             (mm), or None if no items are selected
+        """
+        selection = self.live(selection)
+        if len(selection) == 0:
+            return None
+
+        bboxes = self._column('bboxes')[selection]
+        left, top = bboxes[:, :2].min(axis=0)
+        right, bottom = bboxes[:, 2:].max(axis=0)
+        return float(left), float(top), float(right), float(bottom)
+
+    def summary(self, by='layer', selection=None):
+        """ Count the selected items, grouped by type, layer, or net
+
+        :param by: (optional) Column to group by: 'kind', 'layer' or 'net'.
+             Items that aren't connected are grouped under the net None.
+        :param selection: (optional) Array of item indexes. If not specified,
+             all items are included.
+        :return: Dictionary of name to a dictionary with the 'count' of
+             items, and their 'bbox' (left, top, right, bottom, mm)
+        """
+        columns = {'kind': ('kinds', self.kind_names),
+                   'layer': ('layers', self.layer_names),
+                   'net': ('nets', self.net_names)}
+        if by not in columns:
+            raise ValueError(
+                f"Unknown summary:{by}, expected one of: kind, layer, net")
+        column, names = columns[by]
+
+        selection = self.live(selection)
+        groups, inverse = numpy.unique(self._column(column)[selection],
+                                       return_inverse=True)
+        counts = numpy.bincount(inverse, minlength=len(groups))
+
+        bboxes = self._column('bboxes')[selection]
+        lower = numpy.full((len(groups), 2), numpy.inf)
+        upper = numpy.full((len(groups), 2), -numpy.inf)
+        numpy.minimum.at(lower, inverse, bboxes[:, :2])
+        numpy.maximum.at(upper, inverse, bboxes[:, 2:])
+
+        return {(names[group] if group >= 0 else None): {
+            'count': int(count),
+            'bbox': (float(low[0]), float(low[1]),
+                     float(high[0]), float(high[1]))}
+            for group, count, low, high in zip(groups.tolist(),
+                                               counts.tolist(), lower, upper)}
+
+    def remove(self, selection):
+        """ Mark items as deleted
+
+        :param selection: Array of item indexes
+        """
+        selection = numpy.asarray(selection, dtype=numpy.int64).reshape(-1)
+        for index in selection.tolist():
+            if index >= self.released:
+                self.objects[index - self.released] = None
+        self._column('alive')[selection] = False
+
+    def offset(self, selection, dx, dy):
+        """ Move the bounding boxes of items
+
+        :param selection: Array of item indexes
+        :param dx: Distance to move along the x axis (mm)
+        :param dy: Distance to move along the y axis (mm)
+        """
+        self._column('bboxes')[selection] += (dx, dy, dx, dy)
+
+    def set_bboxes(self, selection, bboxes):
+        """ Replace the bounding boxes of items
+
+        :param selection: Array of item indexes
+        :param bboxes: Nx4 array of bounding boxes (mm)
+        """
+        self._column('bboxes')[selection] = numpy.reshape(bboxes, (-1, 4))
+
+    def release(self):
+        """ Drop the references to all of the items recorded so far
+
+        Their types, layers, nets and bounding boxes are kept, but they can't
+        be changed or deleted any more.
+        """
+        self.released += len(self.objects)
+        self.objects = []
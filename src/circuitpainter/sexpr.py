@@ -0,0 +1,111 @@
+""" Reader and writer for the s-expression format used by KiCad files """
+
+import re
+
+
+class QuotedString(str):
+    """ String that is written in quotes
+
+    KiCad distinguishes between bare symbols (such as 'segment' or 'smd') and
+    quoted strings (such as layer or net names). Parsed strings keep track of
+    this, so that they are written back out the same way.
+    """
+
+    __slots__ = ()
+
+
+_TOKENS = re.compile(r'''\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|([^\s()"]+))''',
+                     re.DOTALL)
+
+_ESCAPES = re.compile(r'\\(.)', re.DOTALL)
+
+_ESCAPE_CHARS = {'n': '\n', 'r': '\r', 't': '\t'}
+
+
+def parse(text):
+    """Parse an s-expression
+
+    Lists are returned as Python lists, quoted strings as QuotedString,
+    and everything else (symbols and numbers) as plain strings.
+
+    text: s-expression to parse
+    returns: The first expression in the text
+    """
+    stack = [[]]
+    position = 0
+    end = len(text.rstrip())
+
+    while position < end:
+        match = _TOKENS.match(text, position)
+        if match is None:
+            raise ValueError(f"Invalid s-expression at offset {position}")
+        position = match.end()
+
+        opening, closing, quoted, symbol = match.groups()
+        if opening is not None:
+            stack.append([])
+        elif closing is not None:
+            if len(stack) < 2:
+                raise ValueError(f"Unbalanced ')' at offset {position}")
+            expression = stack.pop()
+            stack[-1].append(expression)
+        elif quoted is not None:
+            stack[-1].append(QuotedString(_ESCAPES.sub(
+                lambda m: _ESCAPE_CHARS.get(m.group(1), m.group(1)), quoted)))
+        else:
+            stack[-1].append(symbol)
+
+    if len(stack) != 1 or len(stack[0]) == 0:
+        raise ValueError("Unbalanced or empty s-expression")
+
+    return stack[0][0]
+
+
+def format_number(value):
+    """Format a number the way KiCad does: up to 6 decimals, no trailing 0s"""
+    if isinstance(value, int):
+        return str(value)
+
+    text = f"{value:.6f}".rstrip('0').rstrip('.')
+    if text == '-0':
+        return '0'
+    return text
+
+
+def _quote(value):
+    escaped = value.replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+    return f'"{escaped}"'
+
+
+def dumps(expression):
+    """Convert an expression to an s-expression string
+
+    Lists are written as s-expression lists, QuotedString values are quoted,
+    numbers are formatted with format_number(), and other values are written
+    as-is.
+
+    expression: Expression to convert
+    """
+    if isinstance(expression, list):
+        return '(' + ' '.join(dumps(item) for item in expression) + ')'
+    if isinstance(expression, QuotedString):
+        return _quote(expression)
+    if isinstance(expression, bool):
+        return 'yes' if expression else 'no'
+    if isinstance(expression, (int, float)):
+        return format_number(expression)
+    return str(expression)
+
+
+def find(expression, key):
+    """Find the first child list of an expression that starts with a key
+
+    expression: List to search
+    key: First element of the child to find, for example 'at'
+    returns: The child list, or None if not found
+    """
+    for item in expression:
+        if isinstance(item, list) and len(item) > 0 and item[0] == key:
+            return item
+    return None
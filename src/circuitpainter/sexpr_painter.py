@@ -0,0 +1,1492 @@
+import copy
+import math
+import uuid
+import functools
+import numpy
+from circuitpainter.circuitpainter import CircuitPainter, pcbnew, \
+    _guess_footprint_library_path, _arc_points, _circle_segments, \
+    _segment_bboxes
+from circuitpainter.sexpr import QuotedString, parse, dumps, find, \
+    format_number
+
+
+def _kicad_layer_ids():
+    """Get the KiCad (version 7) layer IDs, by pcbnew layer name"""
+    ids = {'F_Cu': 0}
+    ids.update({f'In{index}_Cu': index for index in range(1, 31)})
+    ids['B_Cu'] = 31
+
+    for index, name in enumerate([
+            'B_Adhes', 'F_Adhes', 'B_Paste', 'F_Paste', 'B_SilkS', 'F_SilkS',
+            'B_Mask', 'F_Mask', 'Dwgs_User', 'Cmts_User', 'Eco1_User',
+            'Eco2_User', 'Edge_Cuts', 'Margin', 'B_CrtYd', 'F_CrtYd', 'B_Fab',
+            'F_Fab']):
+        ids[name] = 32 + index
+
+    ids.update({f'User_{index}': 49 + index for index in range(1, 10)})
+    ids['Rescue'] = 59
+
+    return ids
+
+
+_LAYER_IDS = _kicad_layer_ids()
+
+_LAYER_USER_NAMES = {
+    'B_Adhes': 'B.Adhesive',
+    'F_Adhes': 'F.Adhesive',
+    'B_SilkS': 'B.Silkscreen',
+    'F_SilkS': 'F.Silkscreen',
+    'Dwgs_User': 'User.Drawings',
+    'Cmts_User': 'User.Comments',
+    'Eco1_User': 'User.Eco1',
+    'Eco2_User': 'User.Eco2',
+    'B_CrtYd': 'B.Courtyard',
+    'F_CrtYd': 'F.Courtyard',
+}
+""" Descriptive names that KiCad writes for some of the technical layers """
+
+_FILE_VERSION = 20221018
+""" Board file format version written by SexprCircuitPainter (KiCad 7) """
+
+_HEADER_KEYS = ('general', 'paper', 'title_block', 'layers', 'setup')
+""" Top-level sections of a board file that come before the nets """
+
+_FOOTPRINT_DROP = ('version', 'generator', 'layer', 'tstamp', 'at')
+""" Footprint file fields that are replaced when placing a footprint """
+
+_FOOTPRINT_BODY = 5
+""" Index of the first copied field in a placed footprint expression """
+
+_COORDINATE_KEYS = ('start', 'mid', 'end', 'center', 'xy')
+
+# Default zone settings, matching a new pcbnew ZONE
+_ZONE_CLEARANCE = 0.508
+_ZONE_MIN_THICKNESS = 0.254
+
+# Default text size, matching a new pcbnew PCB_TEXT
+_TEXT_SIZE = 1.27
+
+# Default dimension settings, matching a new pcbnew PCB_DIM_ALIGNED
+_DIMENSION_THICKNESS = 0.2
+_DIMENSION_ARROW_LENGTH = 1.27
+_DIMENSION_TEXT_THICKNESS = 0.15
+
+
+def _file_layer(name):
+    """Convert a pcbnew layer name (F_Cu) to a file layer name (F.Cu)"""
+    return name.replace('_', '.')
+
+
+def _layer_names(file_layer):
+    """Convert a layer name from a board or footprint file to pcbnew names
+
+    Wildcard layers such as '*.Cu' and 'F&B.Cu' are expanded to the front and
+    back layers.
+
+    file_layer: Layer name from the file, for example 'F.SilkS'
+    returns: List of pcbnew layer names, for example ['F_SilkS']
+    """
+    name = file_layer.replace('.', '_')
+    if name.startswith('*_') or name.startswith('F&B_'):
+        suffix = name.split('_', 1)[1]
+        return [f'F_{suffix}', f'B_{suffix}']
+    if name in _LAYER_IDS:
+        return [name]
+    return []
+
+
+def _expression_layers(expression):
+    """Find all of the layers that an expression (or its children) use"""
+    layers = set()
+    if len(expression) > 0 and expression[0] in ('layer', 'layers'):
+        for name in expression[1:]:
+            if isinstance(name, str):
+                layers.update(_layer_names(name))
+
+    for child in expression:
+        if isinstance(child, list):
+            layers.update(_expression_layers(child))
+
+    return layers
+
+
+def _copy_expression(expression):
+    """Copy an expression, so that it can be modified"""
+    return [_copy_expression(item) if isinstance(item, list) else item
+            for item in expression]
+
+
+def _flip_expression(expression):
+    """Mirror the contents of a footprint to the other side of the board
+
+    Y coordinates are negated, and front and back layers are swapped. This
+    matches flipping a footprint top to bottom in pcbnew.
+    """
+    if len(expression) > 2 and expression[0] in _COORDINATE_KEYS:
+        expression[2] = -float(expression[2])
+    elif len(expression) > 0 and expression[0] in ('layer', 'layers'):
+        for index, name in enumerate(expression[1:], 1):
+            if isinstance(name, QuotedString) and name[:2] in ('F.', 'B.'):
+                side = 'B.' if name[0] == 'F' else 'F.'
+                expression[index] = QuotedString(side + name[2:])
+
+    for child in expression:
+        if isinstance(child, list):
+            _flip_expression(child)
+
+
+@functools.lru_cache(maxsize=256)
+def _read_footprint(path):
+    """Parse a footprint file, caching the result
+
+    The returned expression is shared, and must be copied with
+    _copy_expression() before it is modified.
+
+    path: Path to the .kicad_mod file
+    """
+    with open(path, encoding='utf-8') as f:
+        return parse(f.read())
+
+
+def _fill_board_zones(filename, workdir):
+    """Fill the zones in a saved board file, using pcbnew
+
+    filename: Board file to fill the zones of. The file is overwritten.
+    workdir: Directory to write temporary files to
+    """
+    board = pcbnew.LoadBoard(filename)
+
+    # See CircuitPainter._fill_zones() for why this is needed
+    pcbnew.WriteDRCReport(
+        board,
+        f"{workdir}/.drc",
+        pcbnew.EDA_UNITS_MILLIMETRES,
+        False)
+
+    board.BuildConnectivity()
+    filler = pcbnew.ZONE_FILLER(board)
+    filler.Fill(board.Zones())
+
+    board.Save(filename)
+
+
+class BoardItem():
+    """ Record of an item placed on a SexprCircuitPainter board
+
+    Coordinates are stored in board (world) coordinates, in mm.
+    """
+
+    __slots__ = ('kind', 'uuid', 'layer', 'net', 'points', 'width',
+                 'options')
+
+    def __init__(self, kind, layer, net, points, width=0, options=None):
+        """ Create an item record
+
+        :param kind: Item type, for example 'segment', 'via' or 'footprint'
+        :param layer: Layer name, for example 'F_Cu'
+        :param net: Net code, or 0 if the item isn't connected
+        :param points: List of x,y points that define the item (mm)
+        :param width: (optional) Line or track width (mm)
+        :param options: (optional) Dictionary of type-specific settings
+        """
+        self.kind = kind
+        self.uuid = None
+        self.layer = layer
+        self.net = net
+        self.points = points
+        self.width = width
+        self.options = options
+
+    def __repr__(self):
+        return f"BoardItem({self.kind}, {self.layer}, {self.points[0]})"
+
+
+class SexprCircuitPainter(CircuitPainter):
+    """ Circuit Painter that writes KiCad board files directly
+
+    This has the same drawing API as CircuitPainter, but records items as
+    lightweight Python objects instead of creating pcbnew objects, and
+    writes the .kicad_pcb s-expression file itself. This is much faster for
+    boards with many items, and works without KiCad installed.
+
+    Footprints are copied from the .kicad_mod library files (KiCad 7
+    format). pcbnew is only needed to fill zones (see the fill_zones
+    parameter), and for the gerber backend='pcbnew' option. The kicad-cli
+    exports work as they do for CircuitPainter.
+    """
+
+    layers = {name: _LAYER_IDS[name] for name in CircuitPainter.layers}
+    """ Board layers, and their KiCad layer IDs """
+
+    def __init__(
+            self,
+            filename=None,
+            library_path=None,
+            preserve_origin=False,
+            export_cache=None,
+            seed=None,
+            fill_zones=False):
+        """ Create a Circuit Builder context
+
+        See CircuitPainter for the common parameters.
+
+        :param fill_zones: If true, zones are filled using pcbnew when the
+             board is saved. Otherwise, zones are saved unfilled, and will be
+             filled when the board is opened in the KiCad PCB editor.
+        """
+        self.fill_zones = fill_zones
+
+        super().__init__(filename, library_path, preserve_origin,
+                         export_cache, seed)
+
+    @staticmethod
+    def _default_library_path():
+        """ Get the footprint library path to use if none was specified
+
+        Footprints can't be placed without a library, but everything else
+        still works, so a missing library isn't an error.
+
+        returns: Path to the KiCad footprint library, or None if it couldn't
+            be found
+        """
+        try:
+            return _guess_footprint_library_path()
+        except OSError:
+            return None
+
+    def _init_board(self, filename):
+        """ Create or load the board
+
+        Items in a loaded board are kept as-is, and written back out
+        unchanged when the board is saved.
+
+        :param filename: Board file to load, or None to create a new board
+        """
+        self.items = []
+        self.header = []
+        self.net_names = {0: ''}
+        self.nets[''] = 0
+        self.next_net = 1
+        self.aux_origin = (0, 0)
+
+        if filename is not None:
+            self.filename = filename
+            with open(filename, encoding='utf-8') as f:
+                self._load(parse(f.read()))
+        else:
+            self.filename = f"{self.tempdir.name}/board.kicad_pcb"
+
+        if self.uuid_namespace is not None:
+            self.group_uuid = str(uuid.uuid5(self.uuid_namespace, 'group'))
+        else:
+            self.group_uuid = str(uuid.uuid4())
+
+    def _fork_board(self):
+        """ Replace the board with a copy of itself
+
+        See CircuitPainter._fork_board(). Unlike CircuitPainter, the item
+        records are copied in memory, without saving the board. Footprints
+        are copied along with their pads, and the other items share their
+        (unchanging) geometry with the original.
+        """
+        self.header = list(self.header)
+        self.net_names = dict(self.net_names)
+
+        memo = {}
+        copies = {}
+        items = []
+        for item in self.items:
+            copied = copy.deepcopy(item, memo) if item.kind == 'footprint' \
+                else copy.copy(item)
+            copies[id(item)] = copied
+            items.append(copied)
+        self.items = items
+
+        # Point the lookup tables to the copied footprints and pads
+        self.footprints = {reference: memo.get(id(footprint), footprint)
+                           for reference, footprint in self.footprints.items()}
+        self.pads = {key: memo.get(id(pad), pad)
+                     for key, pad in self.pads.items()}
+        self.registry.objects = [copies.get(id(item))
+                                 for item in self.registry.objects]
+
+    def _load(self, board):
+        """ Seed the board from a parsed board file
+
+        :param board: Parsed board file
+        """
+        for expression in board[1:]:
+            if not isinstance(expression, list) or len(expression) == 0:
+                continue
+
+            key = expression[0]
+            if key in _HEADER_KEYS:
+                self.header.append(expression)
+                origin = find(expression, 'aux_axis_origin')
+                if key == 'setup' and origin is not None:
+                    self.aux_origin = (float(origin[1]), float(origin[2]))
+            elif key == 'net':
+                code = int(expression[1])
+                self.nets[str(expression[2])] = code
+                self.net_names[code] = str(expression[2])
+                self.next_net = max(self.next_net, code + 1)
+            elif key == 'footprint':
+                # Footprints are indexed so that their pads can be found,
+                # but are otherwise written back out unchanged
+                item = self._loaded_footprint(expression)
+                self.items.append(item)
+                self.layer_counts.update(item.options['layers'])
+                self._index_footprint(item)
+            elif key not in ('version', 'generator'):
+                layers = _expression_layers(expression)
+                item = BoardItem('raw', None, 0, [(0, 0)], options={
+                    'expression': expression,
+                    'layers': layers})
+                self.items.append(item)
+                self.layer_counts.update(layers)
+
+    def _loaded_footprint(self, expression):
+        """ Make a record of a footprint from a loaded board
+
+        :param expression: Footprint expression from the board file
+        :return: BoardItem
+        """
+        at = find(expression, 'at')
+        position = (float(at[1]), float(at[2]))
+        orientation = float(at[3]) if len(at) > 3 \
+            and at[3] != 'unlocked' else 0
+
+        layer = find(expression, 'layer')
+        layer = _layer_names(str(layer[1]))[0] if layer is not None \
+            else 'F_Cu'
+
+        # KiCad 7 stores the reference as text, later versions as a property
+        reference = ''
+        for child in expression:
+            if isinstance(child, list) and len(child) > 2 \
+                    and ((child[0] == 'fp_text' and child[1] == 'reference')
+                         or (child[0] == 'property'
+                             and child[1] == 'Reference')):
+                reference = str(child[2])
+
+        pads = [self._pad_item(child, position, orientation, reference)
+                for child in expression
+                if isinstance(child, list) and len(child) > 0
+                and child[0] == 'pad']
+
+        return BoardItem('footprint', layer, 0, [position], options={
+            'expression': expression,
+            'reference': reference,
+            'angle': orientation,
+            'pads': pads,
+            'layers': _expression_layers(expression)})
+
+    def _local_to_world(self, x, y):
+        """ Convert a local coordinate in mm, to a board coordinate in mm """
+        xp, yp = self.transform.project(x, y)
+        return (round(xp, 3), round(yp, 3))
+
+    def _local_to_world_many(self, points):
+        """ Convert a list of local coordinates in mm, to board coordinates
+
+        :param points: Nx2 array (or list of x,y pairs) of coordinates (mm)
+        :return: List of board coordinates (mm)
+        """
+        return self._local_to_world_array(points).tolist()
+
+    def _world_to_local(self, x, y):
+        """ Convert a board coordinate in mm, to a local coordinate in mm """
+        return self.transform.inverse_project(x, y)
+
+    def _make_uuid(self, key):
+        """ Make a UUID for an item
+
+        :param key: String that uniquely identifies the item, used to derive
+             the UUID in deterministic mode
+        """
+        if self.uuid_namespace is None:
+            return str(uuid.uuid4())
+        return str(uuid.uuid5(self.uuid_namespace, key))
+
+    def _assign_uuid(self, item):
+        """ Give an item (and the children of a footprint) new UUIDs
+
+        :param item: Item to set the UUID of
+        """
+        x, y = item.points[0]
+        key = (f"{self.uuid_count}:{item.kind}:{item.layer}:"
+               f"{round(x * 1e6)},{round(y * 1e6)}")
+        if self.uuid_namespace is not None:
+            self.uuid_count += 1
+        item.uuid = self._make_uuid(key)
+
+        if item.kind == 'footprint':
+            expression = item.options['expression']
+            find(expression, 'tstamp')[1] = item.uuid
+
+            # Footprints can be placed more than once, so their children
+            # need new UUIDs as well
+            index = 0
+            for child in expression[_FOOTPRINT_BODY:]:
+                tstamp = find(child, 'tstamp') if isinstance(child, list) \
+                    else None
+                if tstamp is not None:
+                    tstamp[1] = self._make_uuid(f"{key}/{index}")
+                    index += 1
+
+            for pad in item.options['pads']:
+                pad.uuid = find(pad.options['expression'], 'tstamp')
+                if pad.uuid is not None:
+                    pad.uuid = pad.uuid[1]
+
+    def _add_item(self, item):
+        """ Add an item to the board
+
+        item: Item to add
+        """
+        self._assign_uuid(item)
+
+        self.items.append(item)
+        self.uuids.append(item.uuid)
+        self.layer_counts.update(self._item_layers(item))
+        self.registry.add(item, *self._item_record(item))
+        if item.kind == 'footprint':
+            self._index_footprint(item)
+        return item
+
+    def _add_items(self, items, kind, layer, nets, bboxes):
+        """ Add a list of items of the same type and layer to the board
+
+        See CircuitPainter._add_items()
+        """
+        if len(items) == 0:
+            return items
+
+        assign_uuid = self._assign_uuid
+        for item in items:
+            assign_uuid(item)
+
+        self.items.extend(items)
+        self.uuids.extend(item.uuid for item in items)
+        for name in self._item_layers(items[0]):
+            self.layer_counts[name] += len(items)
+        self.registry.add_many(items, kind, layer, nets, bboxes)
+        return items
+
+    def _local_to_world_array(self, points):
+        """ Convert a list of local coordinates in mm, to board coordinates
+
+        :param points: Nx2 array (or list of x,y pairs) of coordinates (mm)
+        :return: Nx2 numpy array of board coordinates (mm)
+        """
+        return numpy.round(self.transform.project_many(points), 3)
+
+    def _item_record(self, item):
+        """ Describe an item for the registry
+
+        See CircuitPainter._item_record()
+        """
+        kind = 'track' if item.kind == 'segment' else item.kind
+        net = self.net_names[item.net] if item.net != 0 else None
+        return kind, item.layer, net, self._item_bbox(item)
+
+    @classmethod
+    def _item_bbox(cls, item):
+        """ Get the bounding box of an item
+
+        Footprints are measured by their position and pads, text by its
+        position, and dimensions by their points, crossbar and text
+        position.
+
+        item: Item to measure
+        returns: Tuple of left, top, right, bottom (mm)
+        """
+        if item.kind == 'footprint':
+            points = item.points + [pad.points[0]
+                                    for pad in item.options['pads']]
+        elif item.kind == 'dimension':
+            points = item.points + list(cls._dimension_geometry(item)[:3])
+        else:
+            return cls._item_extent(item)
+
+        xs = [point[0] for point in points]
+        ys = [point[1] for point in points]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def _remove_items(self, items):
+        """ Remove items from the board
+
+        items: List of items to remove
+        """
+        removed = set(id(item) for item in items)
+        for item in items:
+            if item.kind == 'footprint':
+                self._unindex_footprint(item)
+
+        self.items = [item for item in self.items if id(item) not in removed]
+        removed_uuids = set(item.uuid for item in items)
+        self.uuids = [uuid for uuid in self.uuids
+                      if uuid not in removed_uuids]
+
+    def _unindex_footprint(self, footprint):
+        """ Remove a footprint and its pads from the lookup tables
+
+        footprint: Footprint to remove
+        """
+        reference = footprint.options['reference']
+        if self.footprints.get(reference) is footprint:
+            del self.footprints[reference]
+        for pad in footprint.options['pads']:
+            key = (reference, pad.options['number'])
+            if self.pads.get(key) is pad:
+                del self.pads[key]
+
+    @staticmethod
+    def _transform_footprint(footprint, transform, rotation):
+        """ Move the position and pads of a placed footprint
+
+        footprint: Footprint to move
+        transform: Function that converts an Nx2 array of board coordinates
+        rotation: Angle to add to the footprint orientation, using the KiCad
+            (clockwise) convention (degrees)
+        """
+        points = transform(footprint.points + [
+            pad.points[0] for pad in footprint.options['pads']])
+        footprint.points = [tuple(points[0])]
+        for pad, point in zip(footprint.options['pads'], points[1:]):
+            pad.points = [tuple(point)]
+
+        expression = footprint.options['expression']
+        at = find(expression, 'at')
+        orientation = footprint.options['angle'] + rotation
+        at[1:] = [points[0][0], points[0][1]]
+        if orientation != 0:
+            at.append(orientation)
+        footprint.options['angle'] = orientation
+
+        if rotation != 0:
+            for child in expression[_FOOTPRINT_BODY:]:
+                if isinstance(child, list) and len(child) > 0 \
+                        and child[0] in ('pad', 'fp_text'):
+                    SexprCircuitPainter._place_child(child, rotation, False)
+
+    def _move_items(self, items, dx, dy):
+        """ Move items on the board
+
+        See CircuitPainter._move_items()
+        """
+        def transform(points):
+            return numpy.round(
+                numpy.asarray(points, dtype=float) + (dx, dy), 6).tolist()
+
+        for item in items:
+            # Geometry can be shared with a forked painter, so it is replaced
+            # rather than changed
+            if item.kind == 'footprint':
+                self._transform_footprint(item, transform, 0)
+            else:
+                item.points = [tuple(point)
+                               for point in transform(item.points)]
+
+    def _rotate_items(self, items, center, angle):
+        """ Rotate items on the board
+
+        See CircuitPainter._rotate_items()
+        """
+        r = math.radians(angle)
+        rotation = numpy.array([[math.cos(r), math.sin(r)],
+                                [-math.sin(r), math.cos(r)]])
+
+        def transform(points):
+            points = numpy.asarray(points, dtype=float) - center
+            return numpy.round(points @ rotation + center, 6).tolist()
+
+        for item in items:
+            if item.kind == 'footprint':
+                # KiCad angles turn the opposite way to rotate()
+                self._transform_footprint(item, transform, -angle)
+                continue
+
+            item.points = [tuple(point) for point in transform(item.points)]
+            if item.kind == 'text':
+                item.options = dict(item.options,
+                                    angle=item.options['angle'] - angle)
+
+    @staticmethod
+    def _item_layers(item):
+        """ Get the set of layers that an item draws on
+
+        item: Item to get the layers of
+        """
+        if item.kind == 'via':
+            return ('F_Cu', 'B_Cu')
+        if item.kind in ('footprint', 'raw'):
+            return item.options['layers']
+        return (item.layer,)
+
+    def populated_layers(self):
+        """ Get the names of the layers that contain items
+
+        :return: List of layer names, for example: ['Edge_Cuts', 'F_Cu']
+        """
+        return [name for name in self.layers if self.layer_counts[name] > 0]
+
+    def _index_footprint(self, footprint):
+        """ Add a footprint and its pads to the lookup tables
+
+        footprint: Footprint to add
+        """
+        reference = footprint.options['reference']
+        if not self._check_reference(reference):
+            return
+
+        self.footprints[reference] = footprint
+        for pad in footprint.options['pads']:
+            self.pads.setdefault((reference, pad.options['number']), pad)
+
+    def get_object_position(self, o):
+        """ Get a local coordinate for a board item
+
+        Can be a pad, footprint, etc
+
+        :param o: Item to find coordinate for
+        """
+        return self._world_to_local(*o.points[0])
+
+    def _find_net(self, name):
+        """ Find an electical net, creating it if it doesn't exist
+
+        See CircuitPainter._find_net()
+
+        :param name: Net name (for example: gnd)
+        :return: Net code
+        """
+        code = self.nets.get(name)
+        if code is not None:
+            return code
+
+        code = self.next_net
+        self.next_net += 1
+        self.nets[name] = code
+        self.net_names[code] = name
+        return code
+
+    def _net_code(self, net):
+        """ Get the net code to use for an item """
+        if net is None:
+            return 0
+        return self._find_net(net)
+
+    def track(self, x1, y1, x2, y2, net=None):
+        """ Place a PCB track
+
+        :param x1: starting point (mm)
+        :param y1: starting point (mm)
+        :param x2: ending point (mm)
+        :param y2: ending point (mm)
+        :param net: (optional) Net to connect track to
+        """
+        return self._add_item(BoardItem(
+            'segment',
+            self.draw_layer,
+            self._net_code(net),
+            [self._local_to_world(x1, y1), self._local_to_world(x2, y2)],
+            self.draw_width))
+
+    def tracks(self, segments, net=None):
+        """ Place a list of PCB tracks
+
+        See CircuitPainter.tracks()
+
+        :param segments: Nx4 array (or list of x1,y1,x2,y2 lists) of track
+             starting and ending points (mm)
+        :param net: (optional) Net to connect tracks to, or list of net
+             names with one entry per track
+        :return: List of the created tracks
+        """
+        world = self._local_to_world_array(numpy.reshape(segments, (-1, 2)))
+        points = world.tolist()
+        count = len(points) // 2
+
+        layer = self.draw_layer
+        width = self.draw_width
+        nets = self._find_nets(net, count)
+
+        return self._add_items(
+            [BoardItem('segment', layer, code or 0, [start, end], width)
+             for start, end, code in zip(points[0::2], points[1::2], nets)],
+            'track', layer, net,
+            _segment_bboxes(world[0::2], world[1::2], width))
+
+    def arc_track(self, x, y, radius, start, end, net=None):
+        """ Draw an arc-shaped PCB track
+
+        See CircuitPainter.arc_track()
+
+        :param x: center of arc (mm)
+        :param y: center of arc (mm)
+        :param radius: arc radius (mm)
+        :param start: starting angle of arc (degrees)
+        :param end: ending angle of arc (degrees)
+        :param net: (optional) Net to connect track to
+        """
+        return self.arc_tracks([[x, y]], radius, start, end, net)[0]
+
+    def arc_tracks(self, centers, radii, starts, ends, net=None):
+        """ Place a list of arc-shaped PCB tracks
+
+        See CircuitPainter.arc_tracks()
+
+        :param centers: Nx2 array (or list of x,y pairs) of arc centers (mm)
+        :param radii: arc radius (mm), or list of radii
+        :param starts: starting angle of arcs (degrees), or list of angles
+        :param ends: ending angle of arcs (degrees), or list of angles
+        :param net: (optional) Net to connect tracks to, or list of net
+             names with one entry per track
+        :return: List of the created tracks
+        """
+        arc_starts, arc_mids, arc_ends = _arc_points(
+            centers, radii, starts, ends)
+        count = len(arc_starts)
+        points = self._local_to_world_many(
+            numpy.concatenate((arc_starts, arc_mids, arc_ends)))
+
+        layer = self.draw_layer
+        width = self.draw_width
+        nets = self._find_nets(net, count)
+
+        return self._add_items(
+            [BoardItem('arc_track', layer, code or 0, [start, mid, end],
+                       width)
+             for start, mid, end, code in zip(points[:count],
+                                              points[count:2 * count],
+                                              points[2 * count:],
+                                              nets)],
+            'arc_track', layer, net,
+            self._world_arc_bboxes(centers, radii, starts, ends))
+
+    def via(self, x, y, net=None, d=.3, w=.6):
+        """ Place a via
+
+        :param x: via coordinate (mm)
+        :param y: via coordinate (mm)
+        :param net: (optional) name of net to connect via to
+        :param d: (optional) drill diameter (mm)
+        :param w: (optional) annular ring diameter (mm)
+        """
+        return self._add_item(BoardItem(
+            'via', 'F_Cu', self._net_code(net),
+            [self._local_to_world(x, y)], w, {'drill': d}))
+
+    def vias(self, points, net=None, d=.3, w=.6):
+        """ Place a list of vias
+
+        See CircuitPainter.vias()
+
+        :param points: Nx2 array (or list of x,y pairs) of via coordinates (mm)
+        :param net: (optional) name of net to connect vias to, or list of
+             net names with one entry per via
+        :param d: (optional) drill diameter (mm), or list of diameters with
+             one entry per via
+        :param w: (optional) annular ring diameter (mm), or list of diameters
+             with one entry per via
+        :return: List of the created vias
+        """
+        world = self._local_to_world_array(points)
+        positions = world.tolist()
+        count = len(positions)
+
+        drills = numpy.broadcast_to(
+            numpy.asarray(d, dtype=float), (count,)).tolist()
+        widths = numpy.broadcast_to(
+            numpy.asarray(w, dtype=float), (count,)).tolist()
+        nets = self._find_nets(net, count)
+
+        return self._add_items(
+            [BoardItem('via', 'F_Cu', code or 0, [position], width,
+                       {'drill': drill})
+             for position, drill, width, code in zip(
+                 positions, drills, widths, nets)],
+            'via', 'F_Cu', net, _segment_bboxes(world, world, widths))
+
+    def poly_zone(self, points, net=None):
+        """ Place a polygonal zone
+
+        Zones can be placed on both copper and non-copper layers
+
+        :param points: List of x,y coordinates that make up the polygon (mm)
+        :param net: (optional) name of net to connect zone to.
+        """
+        return self._add_item(BoardItem(
+            'zone', self.draw_layer, self._net_code(net),
+            self._local_to_world_many(points), options={'arcs': False}))
+
+    def circle_zone(self, x, y, radius, net=None, arcs=False):
+        """ Place a circular zone
+
+        See CircuitPainter.circle_zone()
+
+        :param x: center of circle (mm)
+        :param y: center of circle (mm)
+        :param radius: radius of circle (mm)
+        :param net: (optional) name of net to connect rectangle to
+        :param arcs: (optional) If true, make the zone outline from two arcs
+             instead of line segments.
+        """
+        if arcs:
+            points = self._local_to_world_many([[x + radius, y],
+                                                [x, y + radius],
+                                                [x - radius, y],
+                                                [x, y - radius]])
+            return self._add_item(BoardItem(
+                'zone', self.draw_layer, self._net_code(net), points,
+                options={'arcs': True}))
+
+        segments = _circle_segments(radius,
+                                    self.arc_max_error,
+                                    self.arc_min_segments,
+                                    self.arc_max_segments)
+
+        angles = numpy.arange(segments) / segments * 2 * math.pi
+        points = numpy.column_stack((x + radius * numpy.cos(angles),
+                                     y + radius * numpy.sin(angles)))
+
+        return self.poly_zone(points, net)
+
+    def footprint(
+            self,
+            x,
+            y,
+            library,
+            name=None,
+            reference='P?',
+            angle=0,
+            nets=None,
+            library_path=None):
+        """ Place a footprint
+
+        See CircuitPainter.footprint() for the parameters.
+        """
+        if library_path is None and self.library_path is None:
+            raise OSError(
+                'Could not find the KiCad footprint library, please specify manually')
+
+        reference = self._next_reference(reference)
+        library_path, library, name = self._resolve_footprint(
+            library, name, library_path)
+
+        template = _read_footprint(
+            f"{library_path}/{library}.pretty/{name}.kicad_mod")
+
+        position = self._local_to_world(x, y)
+        orientation = angle + self.transform.get_angle()
+
+        # Move the footprint to the back side if we are on the B_Cu layer
+        flip = self.draw_layer == 'B_Cu'
+
+        body = [_copy_expression(child) for child in template[2:]
+                if not (isinstance(child, list) and len(child) > 0
+                        and child[0] in _FOOTPRINT_DROP)]
+        if flip:
+            for child in body:
+                if isinstance(child, list):
+                    _flip_expression(child)
+            orientation = -orientation
+
+        pads = []
+        for child in body:
+            if not isinstance(child, list) or len(child) == 0:
+                continue
+            if child[0] in ('pad', 'fp_text'):
+                self._place_child(child, orientation, flip)
+            if child[0] == 'pad':
+                pads.append(child)
+            elif child[0] == 'fp_text':
+                if flip:
+                    self._mirror_text(child)
+                if child[1] == 'reference':
+                    child[2] = QuotedString(reference)
+                    self._set_hidden(child,
+                                     not self.show_reference_designators)
+
+        if nets is not None:
+            if len(nets) != len(pads):
+                raise ValueError(
+                    f'Incorrect number of nets provided, expected:{len(pads)} got:{len(nets)}')
+
+            for net, pad in zip(nets, pads):
+                code = self._find_net(net)
+                pad[:] = [item for item in pad
+                          if not (isinstance(item, list) and item[0] == 'net')]
+                pad.append(['net', code, QuotedString(self.net_names[code])])
+
+        at = ['at', position[0], position[1]]
+        if orientation != 0:
+            at.append(orientation)
+
+        layer = 'B_Cu' if flip else 'F_Cu'
+        expression = ['footprint',
+                      QuotedString(f"{library}:{name}"),
+                      ['layer', QuotedString(_file_layer(layer))],
+                      ['tstamp', ''],
+                      at] + body
+
+        pad_items = [self._pad_item(pad, position, orientation, reference)
+                     for pad in pads]
+
+        footprint = BoardItem('footprint', layer, 0, [position], options={
+            'expression': expression,
+            'reference': reference,
+            'angle': orientation,
+            'pads': pad_items,
+            'layers': _expression_layers(expression)})
+
+        return self._add_item(footprint)
+
+    @staticmethod
+    def _place_child(child, orientation, flip):
+        """ Set the board orientation of a footprint pad or text
+
+        Pad and text angles are stored relative to the board, not to the
+        footprint.
+        """
+        at = find(child, 'at')
+        if at is None:
+            return
+
+        local_angle = float(at[3]) if len(at) > 3 \
+            and at[3] != 'unlocked' else 0
+        if flip:
+            at[2] = -float(at[2])
+            local_angle = -local_angle
+
+        at[3:] = [item for item in at[3:] if item == 'unlocked']
+        child_angle = orientation + local_angle
+        if child_angle != 0:
+            at.insert(3, child_angle)
+
+    @staticmethod
+    def _set_hidden(text, hidden):
+        """ Show or hide a footprint text """
+        text[:] = [item for item in text if item != 'hide']
+        if hidden:
+            layer = find(text, 'layer')
+            text.insert(text.index(layer) + 1 if layer is not None
+                        else len(text), 'hide')
+
+    @staticmethod
+    def _mirror_text(text):
+        """ Mirror a footprint text, for placing on the back of the board """
+        effects = find(text, 'effects')
+        if effects is None:
+            effects = ['effects']
+            text.append(effects)
+
+        justify = find(effects, 'justify')
+        if justify is None:
+            effects.append(['justify', 'mirror'])
+        elif 'mirror' not in justify:
+            justify.append('mirror')
+
+    @staticmethod
+    def _pad_item(pad, position, orientation, reference):
+        """ Make a record of a placed pad, so that it can be looked up """
+        at = find(pad, 'at')
+        x, y = float(at[1]), float(at[2])
+
+        # Rotate the pad position around the footprint, using the KiCad
+        # (clockwise) convention
+        r = math.radians(orientation)
+        world = (round(position[0] + x * math.cos(r) + y * math.sin(r), 6),
+                 round(position[1] - x * math.sin(r) + y * math.cos(r), 6))
+
+        net = find(pad, 'net')
+        return BoardItem('pad', None, int(net[1]) if net is not None else 0,
+                         [world], options={
+                             'number': str(pad[1]),
+                             'reference': reference,
+                             'expression': pad})
+
+    def get_pads(self, reference):
+        """ Get a list of the pads in the specified footprint
+
+        :param reference: Reference designator to retrieve pads from. For example:
+                   LED1
+        """
+        footprint = self.footprints.get(reference)
+        if footprint is None:
+            return None
+
+        return footprint.options['pads']
+
+    def line(self, x1, y1, x2, y2):
+        """ Draw a line from x1,y1 to x2,y2
+
+        :param x1: starting point (mm)
+        :param y1: starting point (mm)
+        :param x2: starting point (mm)
+        :param y2: eneding point (mm)
+        """
+        return self._add_item(BoardItem(
+            'line', self.draw_layer, 0,
+            [self._local_to_world(x1, y1), self._local_to_world(x2, y2)],
+            self.draw_width))
+
+    def lines(self, segments):
+        """ Draw a list of lines
+
+        See CircuitPainter.lines()
+
+        :param segments: Nx4 array (or list of x1,y1,x2,y2 lists) of line
+             starting and ending points (mm)
+        :return: List of the created lines
+        """
+        world = self._local_to_world_array(numpy.reshape(segments, (-1, 2)))
+        points = world.tolist()
+
+        layer = self.draw_layer
+        width = self.draw_width
+
+        return self._add_items(
+            [BoardItem('line', layer, 0, [start, end], width)
+             for start, end in zip(points[0::2], points[1::2])],
+            'line', layer, None,
+            _segment_bboxes(world[0::2], world[1::2], width))
+
+    def arc(self, x, y, radius, start, end):
+        """ Draw an arc
+
+        :param x: center of arc (mm)
+        :param y: center of arc (mm)
+        :param radius: arc radius (mm)
+        :param start: starting angle of arc (degrees)
+        :param end: ending angle of arc (degrees)
+        """
+        return self.arcs([[x, y]], radius, start, end)[0]
+
+    def arcs(self, centers, radii, starts, ends):
+        """ Draw a list of arcs
+
+        See CircuitPainter.arcs()
+
+        :param centers: Nx2 array (or list of x,y pairs) of arc centers (mm)
+        :param radii: arc radius (mm), or list of radii
+        :param starts: starting angle of arcs (degrees), or list of angles
+        :param ends: ending angle of arcs (degrees), or list of angles
+        :return: List of the created arcs
+        """
+        arc_starts, arc_mids, arc_ends = _arc_points(
+            centers, radii, starts, ends)
+        count = len(arc_starts)
+        points = self._local_to_world_many(
+            numpy.concatenate((arc_starts, arc_mids, arc_ends)))
+
+        layer = self.draw_layer
+        width = self.draw_width
+
+        return self._add_items(
+            [BoardItem('arc', layer, 0, [start, mid, end], width)
+             for start, mid, end in zip(points[:count],
+                                        points[count:2 * count],
+                                        points[2 * count:])],
+            'arc', layer, None,
+            self._world_arc_bboxes(centers, radii, starts, ends))
+
+    def circle(self, x, y, radius):
+        """ Draw a circle
+
+        :param x: center of circle (mm)
+        :param y: center of circle (mm)
+        :param radius: radius of circle (mm)
+        """
+        return self.circles([[x, y]], radius)[0]
+
+    def circles(self, centers, radii):
+        """ Draw a list of circles
+
+        See CircuitPainter.circles()
+
+        :param centers: Nx2 array (or list of x,y pairs) of circle centers (mm)
+        :param radii: radius of circles (mm), or list of radii
+        :return: List of the created circles
+        """
+        centers = numpy.asarray(centers, dtype=float).reshape(-1, 2)
+        count = len(centers)
+        radii = numpy.broadcast_to(numpy.asarray(radii, dtype=float), (count,))
+
+        edges = centers + numpy.column_stack((numpy.zeros(count), radii))
+        world = self._local_to_world_array(
+            numpy.concatenate((centers, edges)))
+        points = world.tolist()
+
+        layer = self.draw_layer
+        width = self.draw_width
+        options = {'fill': self.draw_fill}
+        extent = radii[:, numpy.newaxis]
+
+        return self._add_items(
+            [BoardItem('circle', layer, 0, [center, edge], width, options)
+             for center, edge in zip(points[:count], points[count:])],
+            'circle', layer, None,
+            _segment_bboxes(world[:count] - extent, world[:count] + extent,
+                            width))
+
+    def poly(self, points):
+        """ Draw a polygon
+
+        :param points: List of points to add to the polygon (mm)
+        """
+        return self._add_item(BoardItem(
+            'poly', self.draw_layer, 0, self._local_to_world_many(points),
+            self.draw_width, {'fill': self.draw_fill}))
+
+    def text(
+            self,
+            x,
+            y,
+            message,
+            angle=0,
+            mirrored=False,
+            bold=False,
+            italic=False,
+            knockout=False):
+        """ Draw text
+
+        See CircuitPainter.text() for the parameters.
+        """
+        return self._add_item(BoardItem(
+            'text', self.draw_layer, 0, [self._local_to_world(x, y)],
+            options={'text': message,
+                     'angle': self.transform.get_angle() + angle,
+                     'mirrored': mirrored,
+                     'bold': bold,
+                     'italic': italic,
+                     'knockout': knockout}))
+
+    def dimension(self, x1, y1, x2, y2, height):
+        """ Draw a linear dimension line
+
+        See CircuitPainter.dimension() for the parameters. The dimension is
+        measured in mm, to two decimal places.
+        """
+        return self._add_item(BoardItem(
+            'dimension', self.draw_layer, 0,
+            [self._local_to_world(x1, y1), self._local_to_world(x2, y2)],
+            _DIMENSION_THICKNESS, {'height': height}))
+
+    @staticmethod
+    def _dimension_geometry(item):
+        """ Lay out the crossbar and text of a dimension, as KiCad does
+
+        The crossbar is offset from the measured points by the height, and
+        the text is placed outside of it, rotated to be readable.
+
+        :param item: Dimension item
+        :return: Tuple of crossbar start and end points, text position and
+             text angle (degrees), and the text
+        """
+        (x1, y1), (x2, y2) = item.points
+        length = math.dist((x1, y1), (x2, y2))
+        height = item.options['height']
+
+        # Positive heights put the crossbar to the right of the line, when
+        # looking from the start to the end (with y pointing down)
+        if length > 0:
+            nx, ny = (y1 - y2) / length, (x2 - x1) / length
+        else:
+            nx, ny = 0, 0
+        start = (x1 + nx * height, y1 + ny * height)
+        end = (x2 + nx * height, y2 + ny * height)
+
+        # The text goes above the crossbar, or to its left if it is vertical
+        dx, dy = (end[0] - start[0]) / 2, (end[1] - start[1]) / 2
+        if dx > 0:
+            ox, oy = dy, -dx
+        elif dx < 0:
+            ox, oy = -dy, dx
+        else:
+            ox, oy = -abs(dy), 0
+        offset = (_TEXT_SIZE + _DIMENSION_TEXT_THICKNESS) / (length / 2) \
+            if length > 0 else 0
+        position = (start[0] + dx + ox * offset, start[1] + dy + oy * offset)
+
+        angle = -math.degrees(math.atan2(dy, dx)) % 360
+        if 90 < angle <= 270:
+            angle -= 180
+
+        return start, end, position, angle, f"{length:.2f} mm"
+
+    def invalidate_zones(self):
+        """ Zones are filled when saving, so there is nothing to invalidate """
+
+    def _fill_zones(self):
+        """ Zones are filled when saving, see the fill_zones parameter """
+
+    def _has_zones(self):
+        """ Check if the board contains any zones """
+        return any(item.kind == 'zone'
+                   or (item.kind == 'raw'
+                       and item.options['expression'][0] == 'zone')
+                   for item in self.items)
+
+    @staticmethod
+    def _item_extent(item):
+        """ Get the bounding box of an item, including its line width
+
+        :return: Tuple of left, top, right, bottom (mm)
+        """
+        # This is called for every item, so avoid numpy for the few points
+        # that most items have
+        margin = item.width / 2
+        if item.kind == 'circle':
+            (x, y), edge = item.points
+            margin += math.dist((x, y), edge)
+            return x - margin, y - margin, x + margin, y + margin
+
+        if len(item.points) == 1:
+            x, y = item.points[0]
+            return x - margin, y - margin, x + margin, y + margin
+        if len(item.points) == 2:
+            (x1, y1), (x2, y2) = item.points
+            return (min(x1, x2) - margin, min(y1, y2) - margin,
+                    max(x1, x2) + margin, max(y1, y2) + margin)
+
+        xs = [point[0] for point in item.points]
+        ys = [point[1] for point in item.points]
+        return (min(xs) - margin, min(ys) - margin,
+                max(xs) + margin, max(ys) + margin)
+
+    def _auto_set_origin(self):
+        # Sets the board origin at the bottom-left hand corner of the pcb
+        # edge bounding box. If the edge is not well-defined, it should
+        # resolve to no offset. Items in a loaded board aren't measured, so
+        # its origin is kept unless a new edge is drawn.
+        extent = self.registry.bounding_box(
+            self.registry.select(layer='Edge_Cuts'))
+        if extent is None:
+            return
+
+        self.aux_origin = (round(extent[0], 6), round(extent[3], 6))
+
+    def _copper_layers(self):
+        """ Get the copper layers that the board needs, front to back """
+        inner = [index for index in range(1, 31)
+                 if self.layer_counts[f'In{index}_Cu'] > 0]
+        count = max(inner, default=0)
+        count += count % 2
+        return ['F_Cu'] + [f'In{index}_Cu' for index in range(1, count + 1)] \
+            + ['B_Cu']
+
+    def _header(self):
+        """ Build the sections of the board file that come before the nets
+
+        :return: List of expressions
+        """
+        header = [_copy_expression(section) for section in self.header]
+        keys = [section[0] for section in header]
+
+        if 'general' not in keys:
+            header.insert(0, ['general', ['thickness', 1.6]])
+        if 'paper' not in keys:
+            header.insert(1, ['paper', QuotedString('A4')])
+        if 'layers' not in keys:
+            layers = ['layers']
+            for name in self._copper_layers():
+                layers.append([_LAYER_IDS[name],
+                               QuotedString(_file_layer(name)), 'signal'])
+            for name, layer_id in sorted(_LAYER_IDS.items(),
+                                         key=lambda item: item[1]):
+                if layer_id < 32 or name == 'Rescue':
+                    continue
+                layer = [layer_id, QuotedString(_file_layer(name)), 'user']
+                if name in _LAYER_USER_NAMES:
+                    layer.append(QuotedString(_LAYER_USER_NAMES[name]))
+                layers.append(layer)
+            header.append(layers)
+
+        setup = find(header, 'setup')
+        if setup is None:
+            setup = ['setup', ['pad_to_mask_clearance', 0]]
+            header.append(setup)
+        setup[:] = [item for item in setup
+                    if not (isinstance(item, list)
+                            and item[0] == 'aux_axis_origin')]
+        setup.append(['aux_axis_origin', *self.aux_origin])
+
+        return header
+
+    @staticmethod
+    def _format_item(item, net_names):
+        """ Convert an item to its board file representation
+
+        :param item: Item to convert
+        :param net_names: Dictionary of net codes to names
+        :return: s-expression string
+        """
+        kind = item.kind
+        n = format_number
+        points = [f"{n(x)} {n(y)}" for x, y in item.points]
+
+        if kind in ('raw', 'footprint'):
+            return dumps(item.options['expression'])
+
+        layer = f'(layer "{_file_layer(item.layer)}")'
+        tstamp = f"(tstamp {item.uuid})"
+        stroke = f"(stroke (width {n(item.width)}) (type solid))"
+
+        if kind == 'segment':
+            return (f"(segment (start {points[0]}) (end {points[1]}) "
+                    f"(width {n(item.width)}) {layer} (net {item.net}) "
+                    f"{tstamp})")
+        if kind == 'arc_track':
+            return (f"(arc (start {points[0]}) (mid {points[1]}) "
+                    f"(end {points[2]}) (width {n(item.width)}) {layer} "
+                    f"(net {item.net}) {tstamp})")
+        if kind == 'via':
+            return (f"(via (at {points[0]}) (size {n(item.width)}) "
+                    f"(drill {n(item.options['drill'])}) "
+                    f'(layers "F.Cu" "B.Cu") (net {item.net}) {tstamp})')
+        if kind == 'line':
+            return (f"(gr_line (start {points[0]}) (end {points[1]}) "
+                    f"{stroke} {layer} {tstamp})")
+        if kind == 'arc':
+            return (f"(gr_arc (start {points[0]}) (mid {points[1]}) "
+                    f"(end {points[2]}) {stroke} {layer} {tstamp})")
+
+        fill = '(fill solid)' if item.options and item.options.get('fill') \
+            else '(fill none)'
+
+        if kind == 'circle':
+            return (f"(gr_circle (center {points[0]}) (end {points[1]}) "
+                    f"{stroke} {fill} {layer} {tstamp})")
+        if kind == 'poly':
+            pts = ' '.join(f"(xy {point})" for point in points)
+            return f"(gr_poly (pts {pts}) {stroke} {fill} {layer} {tstamp})"
+        if kind == 'zone':
+            if item.options['arcs']:
+                pts = (f"(arc (start {points[0]}) (mid {points[1]}) "
+                       f"(end {points[2]})) "
+                       f"(arc (start {points[2]}) (mid {points[3]}) "
+                       f"(end {points[0]}))")
+            else:
+                pts = ' '.join(f"(xy {point})" for point in points)
+            net_name = dumps(QuotedString(net_names[item.net]))
+            return (f"(zone (net {item.net}) (net_name {net_name}) {layer} "
+                    f"{tstamp} (hatch edge {n(_ZONE_CLEARANCE)}) "
+                    f"(connect_pads (clearance {n(_ZONE_CLEARANCE)})) "
+                    f"(min_thickness {n(_ZONE_MIN_THICKNESS)}) "
+                    f"(filled_areas_thickness no) "
+                    f"(fill yes (thermal_gap {n(_ZONE_CLEARANCE)}) "
+                    f"(thermal_bridge_width {n(_ZONE_CLEARANCE)})) "
+                    f"(polygon (pts {pts})))")
+        if kind == 'text':
+            options = item.options
+            at = points[0]
+            if options['angle'] != 0:
+                at += f" {n(options['angle'])}"
+            knockout = ' knockout' if options['knockout'] else ''
+            font = f"(size {n(_TEXT_SIZE)} {n(_TEXT_SIZE)})"
+            if options['bold']:
+                font += ' bold'
+            if options['italic']:
+                font += ' italic'
+            justify = ' (justify mirror)' if options['mirrored'] else ''
+            return (f"(gr_text {dumps(QuotedString(options['text']))} "
+                    f'(at {at}) (layer "{_file_layer(item.layer)}"{knockout}) '
+                    f"{tstamp} (effects (font {font}){justify}))")
+        if kind == 'dimension':
+            start, end, position, angle, text = \
+                SexprCircuitPainter._dimension_geometry(item)
+            at = f"{n(position[0])} {n(position[1])}"
+            if n(angle) != '0':
+                at += f" {n(angle)}"
+            font = (f"(size {n(_TEXT_SIZE)} {n(_TEXT_SIZE)}) "
+                    f"(thickness {n(_DIMENSION_TEXT_THICKNESS)})")
+            return (f"(dimension (type aligned) {layer} {tstamp} "
+                    f"(pts (xy {points[0]}) (xy {points[1]})) "
+                    f"(height {n(item.options['height'])}) "
+                    f"(gr_text {dumps(QuotedString(text))} (at {at}) "
+                    f"{layer} {tstamp} (effects (font {font}))) "
+                    '(format (prefix "") (suffix "") (units 2) '
+                    "(units_format 1) (precision 2)) "
+                    f"(style (thickness {n(item.width)}) "
+                    f"(arrow_length {n(_DIMENSION_ARROW_LENGTH)}) "
+                    "(text_position_mode 0) (extension_height 0) "
+                    "(extension_offset 0) keep_text_aligned))")
+
+        raise ValueError(f"Unknown item type:{kind}")
+
+    def _write(self, filename):
+        """ Write the board file, without filling zones
+
+        :param filename: File name to write to
+        """
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(f"(kicad_pcb (version {_FILE_VERSION}) "
+                    "(generator circuitpainter)\n")
+
+            for section in self._header():
+                f.write(f"  {dumps(section)}\n")
+
+            for code, name in sorted(self.net_names.items()):
+                f.write(f"  (net {code} {dumps(QuotedString(name))})\n")
+
+            self._write_items(f)
+            self._write_group(f)
+
+            f.write(")\n")
+
+    def _write_items(self, f):
+        """ Write the board items to an open board file """
+        net_names = self.net_names
+        f.writelines(f"  {self._format_item(item, net_names)}\n"
+                     for item in self.items)
+
+    def _write_group(self, f):
+        """ Write the group containing the generated items to a board file """
+        if len(self.uuids) > 0:
+            members = ' '.join(self.uuids)
+            f.write(f'  (group "" (id {self.group_uuid}) '
+                    f"(members {members}))\n")
+
+    def save(self, filename):
+        """ Save the board design to a KiCad board file
+
+        If fill_zones was set, the zones are then filled using pcbnew.
+
+        :param filename: File name to write to
+        """
+        self._auto_set_origin()
+        self._write(f"{filename}.kicad_pcb")
+
+        if self.fill_zones and self._has_zones():
+            _fill_board_zones(f"{filename}.kicad_pcb", self.tempdir.name)
+
+    def to_pcbnew(self):
+        """ Convert the board to a pcbnew based CircuitPainter
+
+        The board is saved, then loaded using pcbnew. The drawing state
+        (transform and reference designators) is copied to the new painter.
+
+        :return: CircuitPainter containing the board
+        """
+        filename = f"{self.tempdir.name}/pcbnew"
+        self.save(filename)
+
+        painter = CircuitPainter(f"{filename}.kicad_pcb",
+                                 library_path=self.library_path,
+                                 preserve_origin=True,
+                                 export_cache=self.export_cache)
+        painter.transform = self.transform.copy()
+        painter.next_designators = dict(self.next_designators)
+        return painter
+
+    def _plot_gerbers(self, name, plotdir, layers=None):
+        """ Plot gerbers and drill files using the pcbnew plot API
+
+        The board is handed off to pcbnew (see to_pcbnew()) for plotting.
+        """
+        if layers is None:
+            layers = self.populated_layers()
+
+        self.to_pcbnew()._plot_gerbers(name, plotdir, layers)
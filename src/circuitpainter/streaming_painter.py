@@ -0,0 +1,195 @@
+import shutil
+from circuitpainter.sexpr_painter import SexprCircuitPainter, BoardItem
+
+
+class StreamingCircuitPainter(SexprCircuitPainter):
+    """ Circuit Painter that streams items to disk as they are drawn
+
+    This works like SexprCircuitPainter, but instead of keeping every item
+    in memory until the board is saved, items are formatted and written to a
+    temporary file in chunks of chunk_size items. When the board is saved,
+    the header and nets are written first, followed by the streamed items.
+    Memory use therefore stays bounded, no matter how many items are drawn.
+
+    Only the lookup tables for nets, footprints, and pads, and the item
+    registry, are kept in memory. Once footprints are written out, the lookup
+    tables only keep their reference, position, and pad positions and nets.
+    The registry keeps 40 bytes for each item.
+
+    Items returned by the drawing functions are written out when their chunk
+    is flushed, so changing them afterwards has no effect on the saved
+    board. For the same reason, flushed items can still be selected and
+    measured, but can't be moved or deleted.
+    """
+
+    def __init__(
+            self,
+            filename=None,
+            library_path=None,
+            preserve_origin=False,
+            export_cache=None,
+            seed=None,
+            fill_zones=False,
+            chunk_size=10000):
+        """ Create a Circuit Builder context
+
+        See SexprCircuitPainter for the common parameters.
+
+        :param chunk_size: (optional) Number of items to collect in memory
+             before writing them out
+        """
+        self.chunk_size = chunk_size
+
+        super().__init__(filename, library_path, preserve_origin,
+                         export_cache, seed, fill_zones)
+
+    def _init_board(self, filename):
+        """ Create or load the board
+
+        :param filename: Board file to load, or None to create a new board
+        """
+        super()._init_board(filename)
+
+        self.body_file = f"{self.tempdir.name}/items"
+        self.members_file = f"{self.tempdir.name}/members"
+        open(self.body_file, 'w', encoding='utf-8').close()
+        open(self.members_file, 'w', encoding='utf-8').close()
+
+        # Number of group members that have been written out
+        self.item_count = 0
+
+        # Summary of the streamed items, needed when saving
+        self.zones_added = SexprCircuitPainter._has_zones(self)
+
+    def fork(self):
+        """ Create an independent copy of the painter
+
+        See CircuitPainter.fork(). The pending items are written out first,
+        then the streamed item files are copied for the new painter.
+
+        :return: New painter
+        """
+        self.flush()
+        return super().fork()
+
+    def _fork_board(self):
+        super()._fork_board()
+
+        body_file = f"{self.tempdir.name}/items"
+        members_file = f"{self.tempdir.name}/members"
+        shutil.copyfile(self.body_file, body_file)
+        shutil.copyfile(self.members_file, members_file)
+        self.body_file = body_file
+        self.members_file = members_file
+
+    def _add_item(self, item):
+        """ Add an item to the board
+
+        The item is written out once chunk_size items are pending.
+
+        item: Item to add
+        """
+        self._assign_uuid(item)
+
+        self.items.append(item)
+        self.uuids.append(item.uuid)
+        self.layer_counts.update(self._item_layers(item))
+        self.registry.add(item, *self._item_record(item))
+
+        if item.kind == 'footprint':
+            self._index_footprint(item)
+        elif item.kind == 'zone':
+            self.zones_added = True
+
+        if len(self.items) >= self.chunk_size:
+            self.flush()
+
+        return item
+
+    def _add_items(self, items, kind, layer, nets, bboxes):
+        """ Add a list of items of the same type and layer to the board
+
+        See CircuitPainter._add_items(). The items are written out once
+        chunk_size items are pending.
+        """
+        super()._add_items(items, kind, layer, nets, bboxes)
+
+        if len(self.items) >= self.chunk_size:
+            self.flush()
+
+        return items
+
+    def flush(self):
+        """ Write the pending items to the temporary item file
+
+        This is done automatically every chunk_size items, and when saving.
+        """
+        if len(self.items) > 0:
+            with open(self.body_file, 'a', encoding='utf-8') as f:
+                super()._write_items(f)
+
+            for item in self.items:
+                if item.kind == 'footprint':
+                    self._release_footprint(item)
+            self.items = []
+            self.registry.release()
+
+        if len(self.uuids) > 0:
+            with open(self.members_file, 'a', encoding='utf-8') as f:
+                f.write(' ' + ' '.join(self.uuids))
+            self.item_count += len(self.uuids)
+            self.uuids = []
+
+    def _release_footprint(self, footprint):
+        """ Replace a written footprint in the lookup tables
+
+        The footprint's expression isn't needed after it is written out, so
+        it is replaced with a record of just its reference, position, and
+        pads.
+
+        footprint: Footprint that was written out
+        """
+        reference = footprint.options['reference']
+        if self.footprints.get(reference) is not footprint:
+            return
+
+        pads = []
+        for pad in footprint.options['pads']:
+            record = BoardItem('pad', None, pad.net, pad.points, options={
+                'number': pad.options['number'],
+                'reference': reference})
+            record.uuid = pad.uuid
+            pads.append(record)
+
+            key = (reference, pad.options['number'])
+            if self.pads.get(key) is pad:
+                self.pads[key] = record
+
+        record = BoardItem('footprint', footprint.layer, 0, footprint.points,
+                           options={'reference': reference,
+                                    'angle': footprint.options['angle'],
+                                    'pads': pads,
+                                    'layers': footprint.options['layers']})
+        record.uuid = footprint.uuid
+        self.footprints[reference] = record
+
+    def _has_zones(self):
+        """ Check if the board contains any zones """
+        return self.zones_added
+
+    def _write_items(self, f):
+        """ Copy the streamed items to an open board file """
+        self.flush()
+
+        with open(self.body_file, encoding='utf-8') as body:
+            shutil.copyfileobj(body, f)
+
+    def _write_group(self, f):
+        """ Write the group containing the generated items to a board file """
+        if self.item_count == 0:
+            return
+
+        f.write(f'  (group "" (id {self.group_uuid}) (members')
+        with open(self.members_file, encoding='utf-8') as members:
+            shutil.copyfileobj(members, f)
+        f.write('))\n')
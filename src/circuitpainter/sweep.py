@@ -0,0 +1,293 @@
+import os
+import math
+import json
+import time
+import itertools
+import importlib
+import importlib.util
+import traceback
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from circuitpainter.circuitpainter import EXPORT_FORMATS, \
+    _guess_footprint_library_path
+from circuitpainter.footprint_library import get_library_index
+
+
+SWEEP_FORMATS = ('kicad_pcb',) + EXPORT_FORMATS
+""" Output formats supported by sweep() """
+
+
+def _parse_value(text):
+    """Convert a parameter value to an int or float if possible"""
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def parse_param(text):
+    """Parse a sweep parameter from the command line
+
+    The values can be given as a list (radius=15,18,20), or as an inclusive
+    range with an optional step (leds=6..24, or percent=0.5..1:0.25).
+
+    text: Parameter definition, in the form name=values
+    returns: Tuple of the parameter name, and list of values
+    """
+    name, separator, values = text.partition('=')
+    if separator == '' or name == '':
+        raise ValueError(f"Invalid parameter:{text}, expected name=values")
+
+    if '..' not in values:
+        return name, [_parse_value(value) for value in values.split(',')]
+
+    start, _, end = values.partition('..')
+    end, _, step = end.partition(':')
+    start, end = _parse_value(start), _parse_value(end)
+    step = _parse_value(step) if step != '' else 1
+    if not all(isinstance(value, (int, float)) for value in (start, end, step)) \
+            or step <= 0:
+        raise ValueError(f"Invalid range for parameter:{text}")
+
+    if all(isinstance(value, int) for value in (start, end, step)):
+        return name, list(range(start, end + 1, step))
+
+    # Allow for rounding errors when checking if the end is included
+    count = math.floor((end - start) / step + 1e-9) + 1
+    return name, [round(start + step * index, 12) for index in range(count)]
+
+
+def parameter_grid(params):
+    """Get every combination of a set of parameters
+
+    params: Dictionary of parameter name to list of values
+    returns: List of dictionaries, one per combination
+    """
+    names = list(params)
+    return [dict(zip(names, values))
+            for values in itertools.product(*(params[name] for name in names))]
+
+
+def _load_target(target):
+    """Find a generator function
+
+    target: Function, or string in the form module:function. The module can
+        be a module name, or the path to a .py file.
+    """
+    if callable(target):
+        return target
+
+    module_name, separator, function_name = target.partition(':')
+    if separator == '' or function_name == '':
+        raise ValueError(
+            f"Invalid generator:{target}, expected module:function")
+
+    if module_name.endswith('.py'):
+        module_name = str(Path(module_name).resolve())
+
+    return getattr(_load_module(module_name), function_name)
+
+
+_loaded_scripts = {}
+""" Scripts loaded by _load_module(), as path: (mtime, module) """
+
+
+def _load_module(module_name):
+    """Import a module by name, or from a .py file
+
+    Scripts are re-loaded if they have been edited since they were last
+    used, for long-running workers. Only the latest version of each script
+    is kept.
+
+    module_name: Module name, or absolute path to a .py file
+    """
+    if not module_name.endswith('.py'):
+        return importlib.import_module(module_name)
+
+    mtime = os.path.getmtime(module_name)
+    loaded = _loaded_scripts.get(module_name)
+    if loaded is not None and loaded[0] == mtime:
+        return loaded[1]
+
+    path = Path(module_name)
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    _loaded_scripts[module_name] = (mtime, module)
+    return module
+
+
+def _variant_name(base, params):
+    """Name the outputs of a variant after its parameters"""
+    return '_'.join([base] + [f"{name}={value}"
+                              for name, value in params.items()])
+
+
+def _init_worker():
+    """Prepare a worker process
+
+    Importing pcbnew and indexing the footprint library are slow, so they are
+    done once when the worker starts, rather than by the first variant that
+    it runs. The footprint caches are then shared by all of the variants that
+    the worker runs.
+    """
+    try:
+        importlib.import_module('pcbnew')
+    except ImportError:
+        # Not needed by the s-expression painters
+        pass
+
+    try:
+        get_library_index(_guess_footprint_library_path())
+    except OSError:
+        # Generators might specify their own library path
+        pass
+
+
+def _run_variant(target, name, params, output_dir, formats):
+    """Generate one variant, and write its outputs
+
+    target: Generator function, or module:function string
+    name: Name of the output files
+    params: Keyword arguments for the generator
+    output_dir: Directory to write the outputs to
+    formats: Output formats, from SWEEP_FORMATS
+    returns: Dictionary describing the result
+    """
+    result = {
+        'name': name,
+        'params': params,
+        'status': 'ok',
+        'outputs': {},
+        'timings': {},
+        'pid': os.getpid(),
+    }
+    timings = result['timings']
+    start = time.perf_counter()
+
+    try:
+        function = _load_target(target)
+
+        step_start = time.perf_counter()
+        painter = function(**params)
+        timings['generate'] = time.perf_counter() - step_start
+
+        if 'kicad_pcb' in formats:
+            step_start = time.perf_counter()
+            painter.save(f"{output_dir}/{name}")
+            result['outputs']['kicad_pcb'] = f"{output_dir}/{name}.kicad_pcb"
+            timings['kicad_pcb'] = time.perf_counter() - step_start
+
+        export_formats = [export_format for export_format in formats
+                          if export_format != 'kicad_pcb']
+        if len(export_formats) > 0:
+            # The variants already run in parallel, so run the exports for
+            # each one in sequence
+            exported = painter.export_all(name, export_formats, output_dir,
+                                          max_workers=1)
+            result['outputs'].update(exported['outputs'])
+            timings.update(exported['timings'])
+    except Exception:  # pylint: disable=broad-exception-caught
+        result['status'] = 'failed'
+        result['error'] = traceback.format_exc()
+
+    timings['total'] = time.perf_counter() - start
+    return result
+
+
+def sweep(
+        target,
+        params,
+        output_dir='.',
+        formats=('kicad_pcb',),
+        max_workers=None,
+        name=None):
+    """ Run a board generator over a grid of parameters
+
+    Each combination of parameters (variant) is generated in a pool of
+    worker processes, and its outputs are written to output_dir. A
+    manifest.json file describing the results is written there as well.
+
+    The generator is called with the variant's parameters as keyword
+    arguments, and must return a CircuitPainter. Variants that fail are
+    recorded in the manifest, and don't stop the sweep.
+
+    :param target: Generator function, or string in the form module:function
+         (for example: 'lotus_leds:lotus_leds'). The module can also be a path
+         to a .py file. A string is needed if the generator is defined in the
+         __main__ script.
+    :param params: Dictionary of parameter names to lists of values
+    :param output_dir: (optional) Directory to write the outputs to
+    :param formats: (optional) List of outputs to write for each variant,
+         from: 'kicad_pcb', 'gerber', 'svg', 'step', and 'pos'
+    :param max_workers: (optional) Number of worker processes. Defaults to
+         the number of CPUs.
+    :param name: (optional) Base name for the output files. Defaults to the
+         generator function name.
+    :return: The manifest, as a dictionary
+    """
+    for output_format in formats:
+        if output_format not in SWEEP_FORMATS:
+            raise ValueError(
+                f"Unknown format:{output_format}, expected one of: {', '.join(SWEEP_FORMATS)}")
+
+    if name is None:
+        name = target.rpartition(':')[2] if isinstance(target, str) \
+            else target.__name__
+
+    output_dir = Path(output_dir).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    variants = parameter_grid(params)
+    results = [None] * len(variants)
+    start = time.perf_counter()
+
+    # pcbnew isn't safe to fork, so start the workers from scratch
+    with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker) as executor:
+        futures = {}
+        for index, variant in enumerate(variants):
+            variant_name = _variant_name(name, variant)
+            future = executor.submit(_run_variant, target, variant_name,
+                                     variant, str(output_dir), tuple(formats))
+            futures[future] = (index, variant_name, variant)
+
+        for future in as_completed(futures):
+            index, variant_name, variant = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                # The worker crashed (for example, inside pcbnew)
+                result = {
+                    'name': variant_name,
+                    'params': variant,
+                    'status': 'failed',
+                    'outputs': {},
+                    'timings': {},
+                    'error': traceback.format_exc(),
+                }
+            results[index] = result
+
+    manifest = {
+        'target': target if isinstance(target, str)
+        else f"{target.__module__}:{target.__qualname__}",
+        'params': params,
+        'formats': list(formats),
+        'elapsed': time.perf_counter() - start,
+        'failed': sum(1 for result in results if result['status'] != 'ok'),
+        'variants': results,
+    }
+
+    with open(output_dir / 'manifest.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
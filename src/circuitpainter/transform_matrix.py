@@ -1,20 +1,58 @@
 import math
 import numpy
 
+
 class TransformMatrix():
-    """ Matrix transform to handle translations and rotations"""
+    """ Matrix transform to handle translations and rotations
+
+    The transform is stored as the six coefficients of a 2D affine matrix:
+
+        | a c e |
+        | b d f |
+        | 0 0 1 |
+
+    Compositions are computed in closed form, and the inverse transform and
+    rotation angle are cached until the matrix is next modified.
+    """
+
+    __slots__ = ('coefficients', 'states', '_angle', '_inverse')
+
+    IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
 
     def __init__(self):
         self.reset()
 
     def reset(self):
         """ Reset the matrix transform """
-        self.matrix = [[1, 0, 0], [0, 1, 0], [0, 0, 1]]
+        self.coefficients = self.IDENTITY
         self.states = []
+        self._angle = 0.0
+        self._inverse = self.IDENTITY
+
+    def copy(self):
+        """ Get an independent copy of the transform, including its stack """
+        other = TransformMatrix.__new__(TransformMatrix)
+        other.coefficients = self.coefficients
+        other.states = list(self.states)
+        other._angle = self._angle
+        other._inverse = self._inverse
+        return other
+
+    @property
+    def matrix(self):
+        """ The transform as a 3x3 nested list """
+        a, b, c, d, e, f = self.coefficients
+        return [[a, c, e], [b, d, f], [0.0, 0.0, 1.0]]
+
+    def _set(self, coefficients):
+        """ Replace the coefficients, and invalidate the cached values """
+        self.coefficients = coefficients
+        self._angle = None
+        self._inverse = None
 
     def push(self):
         """ Save the transform state on a stack """
-        self.states.append(self.matrix)
+        self.states.append((self.coefficients, self._angle, self._inverse))
 
     def pop(self):
         """ Restore the last transform state from the stack
@@ -22,7 +60,7 @@ class TransformMatrix():
         If the stack was empty, reset the transform
         """
         if len(self.states) > 0:
-            self.matrix = self.states.pop()
+            self.coefficients, self._angle, self._inverse = self.states.pop()
         else:
             self.reset()
 
@@ -32,7 +70,10 @@ class TransformMatrix():
         We restrict the transform to translate/rotate only, so angle is well
         defined.
         """
-        return math.degrees(math.atan2(self.matrix[0][1], self.matrix[0][0]))
+        if self._angle is None:
+            a, _, c, _, _, _ = self.coefficients
+            self._angle = math.degrees(math.atan2(c, a))
+        return self._angle
 
     def translate(self, x, y):
         """ Apply a linear transformation
@@ -40,21 +81,29 @@ class TransformMatrix():
         x: x component of translation vector
         y: y component of translation vector
         """
-        m = [[1, 0, x], [0, 1, y], [0, 0, 1]]
+        a, b, c, d, e, f = self.coefficients
 
-        self.matrix = numpy.matmul(self.matrix, m)
+        # Translation doesn't change the rotation, so the angle stays valid
+        angle = self._angle
+        self._set((a, b, c, d, a * x + c * y + e, b * x + d * y + f))
+        self._angle = angle
 
     def rotate(self, angle):
         """ Apply a rotation
 
         angle: Rotation angle (degrees)
         """
-        r = numpy.radians(angle)
-        m = [[math.cos(r), -math.sin(r), 0],
-             [math.sin(r), math.cos(r), 0],
-             [0, 0, 1]]
-
-        self.matrix = numpy.matmul(self.matrix, m)
+        r = math.radians(angle)
+        cos = math.cos(r)
+        sin = math.sin(r)
+
+        a, b, c, d, e, f = self.coefficients
+        self._set((a * cos + c * sin,
+                   b * cos + d * sin,
+                   c * cos - a * sin,
+                   d * cos - b * sin,
+                   e,
+                   f))
 
     def project(self, x, y):
         """ Apply the transformation to a coordinate
@@ -63,10 +112,37 @@ class TransformMatrix():
         y: y component of point to transform
         returns: x', y' transformed coordinate
         """
-        p = [x, y, 1]
+        a, b, c, d, e, f = self.coefficients
+        return float(a * x + c * y + e), float(b * x + d * y + f)
+
+    @staticmethod
+    def _apply_many(coefficients, points):
+        """ Apply a set of affine coefficients to an array of points """
+        a, b, c, d, e, f = coefficients
+        points = numpy.asarray(points, dtype=float).reshape(-1, 2)
+        return points @ numpy.array([[a, b], [c, d]]) + numpy.array([e, f])
 
-        result = numpy.matmul(self.matrix, p)
-        return float(result[0]), float(result[1])
+    def project_many(self, points):
+        """ Apply the transformation to an array of coordinates
+
+        points: Nx2 array (or list of x,y pairs) of points to transform
+        returns: Nx2 numpy array of transformed coordinates
+        """
+        return self._apply_many(self.coefficients, points)
+
+    def _get_inverse(self):
+        """ Get the coefficients of the inverse transform """
+        if self._inverse is None:
+            a, b, c, d, e, f = self.coefficients
+            det = a * d - b * c
+            ia = d / det
+            ib = -b / det
+            ic = -c / det
+            id_ = a / det
+            self._inverse = (ia, ib, ic, id_,
+                             -(ia * e + ic * f),
+                             -(ib * e + id_ * f))
+        return self._inverse
 
     def inverse_project(self, x, y):
         """ Apply an inverse transformation to a coordinate
@@ -75,9 +151,13 @@ class TransformMatrix():
         y: y component of point to transform
         returns: x', y' transformed coordinate
         """
-        p = [x, y, 1]
+        a, b, c, d, e, f = self._get_inverse()
+        return float(a * x + c * y + e), float(b * x + d * y + f)
 
-        inv = numpy.linalg.inv(self.matrix)
+    def inverse_project_many(self, points):
+        """ Apply an inverse transformation to an array of coordinates
 
-        result = numpy.matmul(inv, p)
-        return float(result[0]), float(result[1])
+        points: Nx2 array (or list of x,y pairs) of points to transform
+        returns: Nx2 numpy array of transformed coordinates
+        """
+        return self._apply_many(self._get_inverse(), points)
@@ -0,0 +1,57 @@
+import asyncio
+import io
+import sys
+from pathlib import Path
+import pytest
+from circuitpainter.sexpr_painter import SexprCircuitPainter
+
+LIBRARY_PATH = str(Path(__file__).parent / 'data' / 'footprints')
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+
+
+@pytest.fixture
+def painter(tmp_path):
+    painter = SexprCircuitPainter(library_path=LIBRARY_PATH, seed=1,
+                                  export_cache=tmp_path / 'exports')
+    painter.layer('F_SilkS')
+    painter.circle(0, 0, 5)
+    return painter
+
+
+def test_async_export_uses_the_cache(tmp_path, painter):
+    # Store an output for the board in the cache, so that kicad-cli isn't
+    # needed to export it
+    painter.save(tmp_path / 'board')
+    board_file = f"{tmp_path}/board.kicad_pcb"
+    jobs, output_name = painter._export_jobs('svg', 'board', board_file)
+    key, _ = painter._check_export_cache(board_file, jobs, output_name,
+                                         f"{tmp_path}/unused.svg")
+    painter.export_cache.put(key, b'<svg/>')
+
+    output_dir = tmp_path / 'output'
+    output_dir.mkdir()
+    assert asyncio.run(painter.export_svg_async('board', output_dir)) == \
+        f"{output_dir}/board.svg"
+    assert (output_dir / 'board.svg').read_bytes() == b'<svg/>'
+    assert asyncio.run(painter.export_svg_bytes_async()) == b'<svg/>'
+
+    output = io.BytesIO()
+    assert asyncio.run(painter.export_svg_bytes_async(output=output)) is None
+    assert output.getvalue() == b'<svg/>'
+
+
+def test_async_export_timeout_kills_the_process(tmp_path, painter,
+                                                monkeypatch):
+    # Replace kicad-cli with a process that doesn't finish in time
+    command = [sys.executable, '-c', 'import time; time.sleep(60)']
+    monkeypatch.setattr(painter, '_export_jobs',
+                        lambda *args, **kwargs: ([('svg', command)],
+                                                 'board.svg'))
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(painter.export_svg_async('board', tmp_path, timeout=0.5))
+    assert not (tmp_path / 'board.svg').exists()
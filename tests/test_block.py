@@ -0,0 +1,132 @@
+from pathlib import Path
+import numpy
+import pytest
+from circuitpainter.block import Block
+from circuitpainter.sexpr_painter import SexprCircuitPainter
+from circuitpainter.transform_matrix import TransformMatrix
+
+LIBRARY_PATH = str(Path(__file__).parent / 'data' / 'footprints')
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+
+
+def make_transform(x, y, angle):
+    transform = TransformMatrix()
+    transform.translate(x, y)
+    transform.rotate(angle)
+    return transform
+
+
+@pytest.fixture
+def block():
+    block = Block()
+    block.layer('F_Cu')
+    block.width(.25)
+    block.translate(1, 0)
+    block.track(0, 0, 2, 0, net='led_{i}')
+    block.via(2, 0, net='gnd')
+    block.arc_track(0, 0, 1, 0, 90, net='led_{i}')
+    block.layer('F_SilkS')
+    block.poly([[0, 0], [1, 0], [1, 1]])
+    block.text(0, 1, 'D{i}', 10)
+    block.footprint(0, 0, 'LED_SMD', 'LED_1206', 'D{i}',
+                    nets=['led_{i}', 'gnd'], library_path=LIBRARY_PATH)
+    return block
+
+
+def test_instantiate_transforms_every_copy(block):
+    transforms = [make_transform(10, 0, 0), make_transform(0, 5, 90)]
+    placed = block.instantiate(transforms, [{'i': 0}, {'i': 1}])
+
+    count = len(block.display_list)
+    assert len(placed) == 2 * count
+
+    for copy, transform in enumerate(transforms):
+        for index in range(count):
+            source = block.display_list.command(index)
+            command = placed.command(copy * count + index)
+            values = source['values']
+
+            assert command['kind'] == source['kind']
+            assert command['layer'] == source['layer']
+            assert command['width'] == source['width']
+
+            if source['kind'] in ('track', 'poly'):
+                points = numpy.reshape(values, (-1, 2))
+                numpy.testing.assert_allclose(
+                    numpy.reshape(command['values'], (-1, 2)),
+                    transform.project_many(points), atol=1e-9)
+            elif source['kind'] in ('via', 'arc_track'):
+                numpy.testing.assert_allclose(
+                    command['values'][:2],
+                    transform.project(*values[:2]), atol=1e-9)
+                assert command['values'][2] == values[2]
+
+            if source['kind'] == 'arc_track':
+                # Arc angles turn the opposite way to the transform
+                numpy.testing.assert_allclose(
+                    command['values'][3:],
+                    numpy.subtract(values[3:], transform.get_angle()))
+            elif source['kind'] in ('text', 'footprint'):
+                assert command['values'][2] == pytest.approx(
+                    values[2] + transform.get_angle())
+
+
+def test_instantiate_fills_in_fields(block):
+    placed = block.instantiate([TransformMatrix()] * 2,
+                               [{'i': 3}, {'i': 4}])
+    count = len(block.display_list)
+
+    assert placed.command(0)['net'] == 'led_3'
+    assert placed.command(count)['net'] == 'led_4'
+    assert placed.command(1)['net'] == placed.command(count + 1)['net'] == \
+        'gnd'
+
+    # Text is copied as-is, but footprint references and nets are filled in
+    assert placed.command(4)['extra'][0] == 'D{i}'
+    library, name, reference, nets, _ = placed.command(count + 5)['extra']
+    assert (library, name, reference, nets) == \
+        ('LED_SMD', 'LED_1206', 'D4', ['led_4', 'gnd'])
+
+
+def test_placed_blocks_match_drawing(block):
+    placed = SexprCircuitPainter(library_path=LIBRARY_PATH, seed=1)
+    placed.repeat_polar(block, 4, radius=10)
+
+    drawn = SexprCircuitPainter(library_path=LIBRARY_PATH, seed=1)
+    for i in range(4):
+        drawn.push_matrix()
+        drawn.rotate(i * 90)
+        drawn.translate(10, 0)
+        drawn.layer('F_Cu')
+        drawn.width(.25)
+        drawn.translate(1, 0)
+        drawn.track(0, 0, 2, 0, net=f'led_{i}')
+        drawn.via(2, 0, net='gnd')
+        drawn.arc_track(0, 0, 1, 0, 90, net=f'led_{i}')
+        drawn.layer('F_SilkS')
+        drawn.poly([[0, 0], [1, 0], [1, 1]])
+        drawn.text(0, 1, 'D{i}', 10)
+        drawn.footprint(0, 0, 'LED_SMD', 'LED_1206', f'D{i}',
+                        nets=[f'led_{i}', 'gnd'], library_path=LIBRARY_PATH)
+        drawn.pop_matrix()
+
+    for by in ('kind', 'layer', 'net'):
+        summary = placed.summarize(by)
+        for name, expected in drawn.summarize(by).items():
+            assert summary[name]['count'] == expected['count']
+            numpy.testing.assert_allclose(summary[name]['bbox'],
+                                          expected['bbox'], atol=2e-3)
+    assert set(placed.footprints) == {'D0', 'D1', 'D2', 'D3'}
+    for reference in placed.footprints:
+        numpy.testing.assert_allclose(
+            [pad.points[0] for pad in placed.get_pads(reference)],
+            [pad.points[0] for pad in drawn.get_pads(reference)], atol=2e-3)
+
+
+def test_block_cannot_be_materialized(block):
+    with pytest.raises(TypeError):
+        block.materialize()
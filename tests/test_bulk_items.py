@@ -0,0 +1,74 @@
+import math
+import numpy
+import pytest
+from circuitpainter.circuitpainter import _arc_bboxes, _segment_bboxes
+from circuitpainter.sexpr_painter import SexprCircuitPainter
+
+
+@pytest.mark.parametrize('start, end, expected', [
+    (0, 90, (0, 0, 1, 1)),
+    (90, 0, (0, 0, 1, 1)),
+    (-45, 45, (math.sqrt(.5), -math.sqrt(.5), 1, math.sqrt(.5))),
+    (170, 370, (-1, -1, 1, math.sin(math.radians(10)))),
+    (0, 360, (-1, -1, 1, 1)),
+])
+def test_arc_bboxes(start, end, expected):
+    bboxes = _arc_bboxes([[0, 0]], 1, start, end, 0)
+    numpy.testing.assert_allclose(bboxes, [expected], atol=1e-12)
+
+
+def test_bboxes_include_width():
+    numpy.testing.assert_allclose(
+        _segment_bboxes([[0, 0], [5, 5]], [[2, 1], [5, 5]], [0.2, 1]),
+        [[-0.1, -0.1, 2.1, 1.1], [4.5, 4.5, 5.5, 5.5]])
+    numpy.testing.assert_allclose(
+        _arc_bboxes([[10, 10]], 2, 0, 90, 0.5),
+        [[9.75, 9.75, 12.25, 12.25]])
+
+
+def draw(painter, bulk):
+    painter.translate(20, 10)
+    painter.rotate(30)
+    painter.layer('F_Cu')
+    segments = [[0, 0, 5, 0], [5, 0, 5, 5]]
+    points = [[1, 1], [-3, 2]]
+    if bulk:
+        painter.tracks(segments, net=['a', 'b'])
+        painter.vias(points, net='gnd', w=[.6, .8])
+        painter.arc_tracks(points, 2, 0, 120, net='a')
+        painter.layer('F_SilkS')
+        painter.lines(segments)
+        painter.arcs(points, 3, -30, 60)
+        painter.circles(points, [1, 2])
+    else:
+        for segment, net in zip(segments, ['a', 'b']):
+            painter.track(*segment, net=net)
+        for point, w in zip(points, [.6, .8]):
+            painter.via(*point, net='gnd', w=w)
+        for point in points:
+            painter.arc_track(*point, 2, 0, 120, net='a')
+        painter.layer('F_SilkS')
+        for segment in segments:
+            painter.line(*segment)
+        for point in points:
+            painter.arc(*point, 3, -30, 60)
+        for point, radius in zip(points, [1, 2]):
+            painter.circle(*point, radius)
+
+
+def test_bulk_functions_register_items_like_single_items(tmp_path):
+    single = SexprCircuitPainter(library_path=str(tmp_path), seed=1)
+    draw(single, bulk=False)
+    bulk = SexprCircuitPainter(library_path=str(tmp_path), seed=1)
+    draw(bulk, bulk=True)
+
+    for by in ('kind', 'layer', 'net'):
+        expected = single.summarize(by)
+        found = bulk.summarize(by)
+        assert found.keys() == expected.keys()
+        for name, group in expected.items():
+            assert found[name]['count'] == group['count']
+            assert found[name]['bbox'] == pytest.approx(group['bbox'])
+
+    assert bulk.layer_counts == single.layer_counts
+    assert bulk.save_bytes() == single.save_bytes()
@@ -0,0 +1,154 @@
+import os
+import stat
+import time
+import threading
+from pathlib import Path
+import pytest
+from circuitpainter.cli import main, make_parser
+from circuitpainter.daemon import GenerationDaemon, DaemonClient
+
+LIBRARY_PATH = str(Path(__file__).parent / 'data' / 'footprints')
+
+GENERATOR = '''
+from circuitpainter.sexpr_painter import SexprCircuitPainter
+
+
+def board(radius, library_path):
+    painter = SexprCircuitPainter(library_path=library_path, seed=1)
+    painter.layer('F_SilkS')
+    painter.circle(0, 0, radius)
+    return painter
+'''
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+
+
+@pytest.fixture
+def target(tmp_path):
+    script = tmp_path / 'generator.py'
+    script.write_text(GENERATOR)
+    return f"{script}:board"
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    daemon = GenerationDaemon(tmp_path / 'daemon.sock', max_workers=1)
+    daemon.executor = daemon._make_executor()
+    yield daemon
+    daemon.executor.shutdown()
+
+
+@pytest.fixture
+def running_daemon(tmp_path):
+    daemon = GenerationDaemon(tmp_path / 'daemon.sock', max_workers=1)
+    thread = threading.Thread(target=daemon.serve_forever)
+    thread.start()
+
+    deadline = time.monotonic() + 60
+    while daemon.server is None and thread.is_alive():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    yield daemon
+    daemon.shutdown()
+    thread.join()
+
+
+def test_ping(daemon):
+    assert daemon.handle({'command': 'ping'}) == \
+        {'status': 'ok', 'pid': os.getpid()}
+
+
+def test_unknown_command(daemon):
+    with pytest.raises(ValueError, match='Unknown command:draw'):
+        daemon.handle({'command': 'draw'})
+
+
+def test_unknown_format(daemon, target):
+    with pytest.raises(ValueError, match='Unknown format:dxf'):
+        daemon.handle({'command': 'generate', 'target': target,
+                       'formats': ['dxf']})
+
+
+def test_generate(daemon, target, tmp_path):
+    output_dir = tmp_path / 'output'
+    result = daemon.handle({
+        'command': 'generate',
+        'target': target,
+        'params': {'radius': 5, 'library_path': LIBRARY_PATH},
+        'output_dir': str(output_dir),
+    })
+
+    assert result['status'] == 'ok', result.get('error')
+    assert result['name'] == 'board'
+    assert result['outputs'] == {'kicad_pcb': f"{output_dir}/board.kicad_pcb"}
+    assert (output_dir / 'board.kicad_pcb').read_text().startswith(
+        '(kicad_pcb')
+    assert 'data' not in result
+
+
+def test_client_round_trip(running_daemon, target, tmp_path):
+    socket_path = running_daemon.socket_path
+    assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+
+    with DaemonClient(socket_path, timeout=60) as client:
+        assert client.ping() == os.getpid()
+
+        result = client.generate(
+            target, {'radius': 5, 'library_path': LIBRARY_PATH},
+            return_data=True)
+        assert result['status'] == 'ok', result.get('error')
+        assert result['outputs'] == {}
+        assert result['data']['kicad_pcb'].startswith(b'(kicad_pcb')
+
+        result = client.generate(target, {'radius': 5}, return_data=True)
+        assert result['status'] == 'failed'
+        assert 'library_path' in result['error']
+
+        with pytest.raises(ValueError, match='output_dir'):
+            client.generate(target)
+        with pytest.raises(RuntimeError, match='Unknown format:dxf'):
+            client.generate(target, formats=['dxf'], output_dir=tmp_path)
+
+
+def test_client_checks_the_socket(tmp_path):
+    socket_path = tmp_path / 'daemon.sock'
+    socket_path.write_text('')
+
+    with pytest.raises(PermissionError, match='Not a socket'):
+        DaemonClient(socket_path)
+
+
+def test_submit_arguments():
+    args = make_parser().parse_args([
+        'submit', 'generator.py:board', '-p', 'radius=5', '-p', 'name=a',
+        '-f', 'kicad_pcb', '-s', 'daemon.sock'])
+
+    assert args.generator == 'generator.py:board'
+    assert args.param == ['radius=5', 'name=a']
+    assert args.format == ['kicad_pcb']
+    assert args.output_dir == '.'
+    assert args.socket == 'daemon.sock'
+
+
+def test_submit_checks_parameters(tmp_path):
+    # The parameters are checked before connecting to the daemon
+    with pytest.raises(ValueError, match='Invalid parameter:radius'):
+        main(['submit', 'generator.py:board', '-p', 'radius',
+              '-s', str(tmp_path / 'missing.sock')])
+
+
+def test_submit(running_daemon, target, tmp_path, capsys):
+    output_dir = tmp_path / 'output'
+
+    assert main(['submit', target, '-p', 'radius=5.5',
+                 '-p', f"library_path={LIBRARY_PATH}",
+                 '-o', str(output_dir), '-n', 'ring',
+                 '-s', running_daemon.socket_path]) == 0
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == f"{output_dir}/ring.kicad_pcb"
+    assert (output_dir / 'ring.kicad_pcb').exists()
@@ -0,0 +1,138 @@
+from pathlib import Path
+import numpy
+import pytest
+from circuitpainter.display_list import DisplayList, FLAG_FILL
+from circuitpainter.sexpr_painter import SexprCircuitPainter
+
+LIBRARY_PATH = str(Path(__file__).parent / 'data' / 'footprints')
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+
+
+@pytest.fixture
+def display_list():
+    display_list = DisplayList()
+    display_list.add_many('track', 'F_Cu', .2, ['a', 'b'],
+                          [[0, 0, 5, 0], [5, 0, 5, 5]])
+    display_list.add_many('via', 'F_Cu', .2, 'gnd',
+                          [[1, 1, .3, .6], [2, 2, .3, .8]])
+    display_list.add('zone', 'B_Cu', .1, 'gnd', [0, 0, 10, 0, 10, 10])
+    display_list.add_many('circle', 'F_SilkS', .15, None, [[3, 3, 1]],
+                          FLAG_FILL)
+    display_list.add('text', 'F_SilkS', .15, None, (4, 4, 90), 0,
+                     ('hello', False, True, False, False))
+    display_list.add('footprint', 'F_Cu', .2, None, (10, 5, 30), 0,
+                     ('LED_SMD', 'LED_1206', 'D1', ['a', 'b'], LIBRARY_PATH))
+    display_list.add('dimension', 'Dwgs_User', .1, None, (0, 0, 10, 0, -2))
+    return display_list
+
+
+def test_commands(display_list):
+    assert len(display_list) == 9
+    assert display_list.counts() == {
+        'track': 2, 'via': 2, 'zone': 1, 'circle': 1, 'text': 1,
+        'footprint': 1, 'dimension': 1}
+
+    assert display_list.command(1) == {
+        'kind': 'track', 'layer': 'F_Cu', 'width': .2, 'net': 'b',
+        'flags': 0, 'values': [5, 0, 5, 5], 'extra': None}
+    assert display_list.command(4)['values'] == [0, 0, 10, 0, 10, 10]
+    assert display_list.command(5)['flags'] == FLAG_FILL
+    assert display_list.command(6)['extra'] == \
+        ('hello', False, True, False, False)
+
+    arrays = display_list.to_arrays()
+    assert arrays['offsets'].tolist() == [0, 4, 8, 12, 16, 22, 25, 28, 31, 36]
+    assert arrays['nets'].tolist() == [0, 1, 2, 2, 2, -1, -1, -1, -1]
+
+
+def test_add_many_checks_nets():
+    with pytest.raises(ValueError, match='Incorrect number of nets'):
+        DisplayList().add_many('track', 'F_Cu', .2, ['a'],
+                               [[0, 0, 1, 1], [1, 1, 2, 2]])
+
+
+def test_save_and_load(tmp_path, display_list):
+    display_list.save(tmp_path / 'commands.npz')
+    loaded = DisplayList.load(tmp_path / 'commands.npz')
+
+    assert len(loaded) == len(display_list)
+    for index in range(len(display_list)):
+        assert loaded.command(index) == display_list.command(index)
+
+    # The loaded name tables can be extended
+    loaded.add('line', 'F_Cu', .1, None, (0, 0, 1, 1))
+    loaded.add('track', 'In1_Cu', .1, 'c', (0, 0, 1, 1))
+    assert loaded.command(10)['layer'] == 'In1_Cu'
+    assert loaded.command(10)['net'] == 'c'
+
+
+def test_copy_is_independent(display_list):
+    copied = display_list.copy()
+    copied.add('line', 'Edge_Cuts', .1, None, (0, 0, 1, 1))
+
+    assert len(display_list) == 9
+    assert len(copied) == 10
+    assert copied.command(0) == display_list.command(0)
+
+
+def draw(painter):
+    painter.layer('F_Cu')
+    painter.width(.2)
+    painter.tracks([[0, 0, 5, 0], [5, 0, 5, 5]], ['a', 'b'])
+    painter.vias([[1, 1], [2, 2]], 'gnd', .3, [.6, .8])
+    painter.layer('B_Cu')
+    painter.width(.1)
+    painter.poly_zone([[0, 0], [10, 0], [10, 10]], 'gnd')
+    painter.layer('F_SilkS')
+    painter.width(.15)
+    painter.fill()
+    painter.circle(3, 3, 1)
+    painter.no_fill()
+    painter.text(4, 4, 'hello', 90, bold=True)
+    painter.layer('F_Cu')
+    painter.width(.2)
+    painter.footprint(10, 5, 'LED_SMD', 'LED_1206', 'D1', 30, ['a', 'b'],
+                      LIBRARY_PATH)
+    painter.layer('Dwgs_User')
+    painter.width(.1)
+    painter.dimension(0, 0, 10, 0, -2)
+
+
+def test_replay_matches_drawing(display_list):
+    drawn = SexprCircuitPainter(library_path=LIBRARY_PATH,
+                                preserve_origin=True)
+    draw(drawn)
+
+    # The commands are in board coordinates, so the painter's transform
+    # isn't applied to them
+    replayed = SexprCircuitPainter(library_path=LIBRARY_PATH,
+                                   preserve_origin=True)
+    replayed.translate(50, 50)
+    replayed.layer('Edge_Cuts')
+    display_list.replay(replayed)
+
+    # The painter's drawing state is restored
+    assert replayed.draw_layer == 'Edge_Cuts'
+    assert replayed.transform.project(0, 0) == (50, 50)
+
+    for by in ('kind', 'layer', 'net'):
+        assert replayed.summarize(by) == drawn.summarize(by)
+    assert replayed.layer_counts == drawn.layer_counts
+    assert [pad.points for pad in replayed.get_pads('D1')] == \
+        [pad.points for pad in drawn.get_pads('D1')]
+
+
+def test_replay_from_start(display_list):
+    painter = SexprCircuitPainter(library_path=LIBRARY_PATH,
+                                  preserve_origin=True)
+    display_list.replay(painter, start=4)
+
+    assert {kind: summary['count'] for kind, summary
+            in painter.summarize('kind').items()} == {
+        'zone': 1, 'circle': 1, 'text': 1, 'footprint': 1, 'dimension': 1}
+    numpy.testing.assert_allclose(
+        painter.bounding_box(painter.select(kind='zone')), (0, 0, 10, 10))
@@ -0,0 +1,72 @@
+import io
+import os
+import pytest
+from circuitpainter import ExportCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ExportCache(tmp_path / 'cache', max_size=130)
+
+
+def write_board(path, contents):
+    path.write_text(contents)
+    return str(path)
+
+
+def test_key_ignores_board_location(tmp_path, cache):
+    first = write_board(tmp_path / 'a.kicad_pcb', '(kicad_pcb)')
+    second = write_board(tmp_path / 'b.kicad_pcb', '(kicad_pcb)')
+    changed = write_board(tmp_path / 'c.kicad_pcb', '(kicad_pcb (net 1))')
+
+    def key(board_file, output_name='board.svg', options=None):
+        return cache.key(board_file, output_name,
+                         [['kicad-cli', 'pcb', 'export', 'svg', board_file]],
+                         options)
+
+    assert key(first) == key(second)
+    assert key(first) != key(changed)
+    assert key(first) != key(first, 'other.svg')
+    assert key(first, options={'compresslevel': 5}) != \
+        key(first, options={'compresslevel': 9})
+
+
+def test_get_and_put(tmp_path, cache):
+    output = tmp_path / 'output'
+    assert not cache.get('abcd', str(output))
+
+    cache.put('abcd', b'contents')
+    assert cache.get('abcd', str(output))
+    assert output.read_bytes() == b'contents'
+
+    buffer = io.BytesIO()
+    assert cache.get('abcd', buffer)
+    assert buffer.getvalue() == b'contents'
+
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'evictions': 0,
+                             'entries': 1, 'size': 8}
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    for index, key in enumerate(['aa01', 'bb02', 'cc03']):
+        cache.put(key, bytes(40))
+        # Give each entry a distinct, increasing access time
+        os.utime(cache._path(key), (index, index))
+
+    # Using the oldest entry makes it the most recent
+    assert cache.get('aa01', io.BytesIO())
+
+    cache.put('dd04', bytes(40))
+    assert not cache._path('bb02').exists()
+    assert all(cache._path(key).exists() for key in ['aa01', 'cc03', 'dd04'])
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['size'] <= cache.max_size
+
+
+def test_clear(cache):
+    cache.put('aa01', b'1')
+    cache.put('bb02', b'2')
+    cache.clear()
+
+    assert cache.stats()['entries'] == 0
+    assert not cache.get('aa01', io.BytesIO())
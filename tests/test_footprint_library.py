@@ -0,0 +1,89 @@
+import pytest
+from circuitpainter import footprint_library, clear_footprint_cache
+from circuitpainter.footprint_library import FootprintLibraryIndex, \
+    get_library_index
+
+
+def add_footprint(library_path, library, name):
+    directory = library_path / f"{library}.pretty"
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"{name}.kicad_mod").write_text(f'(footprint "{name}")')
+
+
+@pytest.fixture
+def library_path(tmp_path):
+    path = tmp_path / 'footprints'
+    add_footprint(path, 'LED_SMD', 'LED_0805')
+    add_footprint(path, 'LED_SMD', 'LED_1206')
+    add_footprint(path, 'Resistor_SMD', 'R_0805')
+    add_footprint(path, 'Other', 'R_0805')
+    return path
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return tmp_path / 'cache'
+
+
+def test_find_and_resolve(library_path, cache_dir):
+    index = FootprintLibraryIndex(library_path, cache_dir)
+
+    assert index.find('LED_SMD', 'LED_1206') == \
+        f"{library_path}/LED_SMD.pretty/LED_1206.kicad_mod"
+    assert index.resolve('LED_0805') == ('LED_SMD', 'LED_0805')
+    assert index.resolve('Resistor_SMD:R_0805') == ('Resistor_SMD', 'R_0805')
+
+    with pytest.raises(ValueError, match='ambiguous'):
+        index.resolve('R_0805')
+
+
+def test_missing_footprints_suggest_alternatives(library_path, cache_dir):
+    index = FootprintLibraryIndex(library_path, cache_dir)
+
+    with pytest.raises(IOError, match='did you mean: LED_SMD:LED_1206'):
+        index.find('LED_SMD', 'LED_1207')
+    with pytest.raises(IOError, match='did you mean: LED_SMD:LED_0805'):
+        index.find('LED_SMT', 'LED_0805')
+
+
+def test_cache_is_reused_until_a_library_changes(library_path, cache_dir,
+                                                  monkeypatch):
+    FootprintLibraryIndex(library_path, cache_dir)
+
+    scanned = []
+    scan_library = footprint_library._scan_library
+
+    def counting_scan(library_dir):
+        scanned.append(library_dir)
+        return scan_library(library_dir)
+
+    monkeypatch.setattr(footprint_library, '_scan_library', counting_scan)
+
+    index = FootprintLibraryIndex(library_path, cache_dir)
+    assert scanned == []
+    assert index.resolve('LED_1206') == ('LED_SMD', 'LED_1206')
+
+    add_footprint(library_path, 'LED_SMD', 'LED_2010')
+    FootprintLibraryIndex(library_path, cache_dir)
+    assert scanned == [f"{library_path.resolve()}/LED_SMD.pretty"]
+
+
+def test_footprints_added_later_are_found(library_path, cache_dir):
+    index = FootprintLibraryIndex(library_path, cache_dir)
+
+    add_footprint(library_path, 'LED_SMD', 'LED_2010')
+    add_footprint(library_path, 'New', 'C_0402')
+
+    assert index.find('LED_SMD', 'LED_2010').endswith('LED_2010.kicad_mod')
+    assert index.resolve('C_0402') == ('New', 'C_0402')
+
+
+def test_shared_indexes_can_be_cleared(library_path, monkeypatch, tmp_path):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'xdg'))
+    get_library_index.cache_clear()
+
+    index = get_library_index(str(library_path))
+    assert get_library_index(str(library_path)) is index
+
+    clear_footprint_cache()
+    assert get_library_index(str(library_path)) is not index
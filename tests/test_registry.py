@@ -0,0 +1,108 @@
+import numpy
+import pytest
+from circuitpainter.registry import ItemRegistry
+
+
+@pytest.fixture
+def registry():
+    registry = ItemRegistry()
+    registry.add('t1', 'track', 'F_Cu', 'a', (0, 0, 1, 1))
+    registry.add('t2', 'track', 'B_Cu', 'b', (5, 5, 6, 6))
+    registry.add('l1', 'line', 'F_SilkS', None, (-1, -1, 2, 0))
+    registry.add_many(['v1', 'v2'], 'via', 'F_Cu', ['a', None],
+                      [[2, 2, 3, 3], [8, 8, 9, 9]])
+    return registry
+
+
+def test_add_many_matches_add(registry):
+    single = ItemRegistry()
+    for item, net, bbox in [('v1', 'a', (2, 2, 3, 3)),
+                            ('v2', None, (8, 8, 9, 9))]:
+        single.add(item, 'via', 'F_Cu', net, bbox)
+
+    many = ItemRegistry()
+    assert many.add_many(['v1', 'v2'], 'via', 'F_Cu', ['a', None],
+                         numpy.array([[2, 2, 3, 3], [8, 8, 9, 9]])) == 0
+    assert many.add('x', 'track', 'F_Cu', 'gnd', (0, 0, 0, 0)) == 2
+
+    for name in ('kinds', 'layers', 'nets', 'alive'):
+        assert getattr(many, name)[:2] == getattr(single, name)
+    assert many.bboxes[:8] == single.bboxes
+    assert many.net_names == ['a', 'gnd']
+
+
+def test_select(registry):
+    assert len(registry) == 5
+    assert registry.select().tolist() == [0, 1, 2, 3, 4]
+    assert registry.select(kind='track').tolist() == [0, 1]
+    assert registry.select(kind=['via', 'line']).tolist() == [2, 3, 4]
+    assert registry.select(layer='F_Cu', net='a').tolist() == [0, 3]
+    assert registry.select(net='missing').tolist() == []
+    assert registry.select(within=(4, 4, -1, -1)).tolist() == [0, 2, 3]
+    assert registry.get(registry.select(kind='via')) == ['v1', 'v2']
+
+
+def test_bounding_box_and_summary(registry):
+    assert registry.bounding_box() == (-1, -1, 9, 9)
+    assert registry.bounding_box(registry.select(kind='track')) == \
+        (0, 0, 6, 6)
+    assert ItemRegistry().bounding_box() is None
+
+    assert registry.summary('kind') == {
+        'track': {'count': 2, 'bbox': (0, 0, 6, 6)},
+        'line': {'count': 1, 'bbox': (-1, -1, 2, 0)},
+        'via': {'count': 2, 'bbox': (2, 2, 9, 9)}}
+    assert registry.summary('net') == {
+        'a': {'count': 2, 'bbox': (0, 0, 3, 3)},
+        'b': {'count': 1, 'bbox': (5, 5, 6, 6)},
+        None: {'count': 2, 'bbox': (-1, -1, 9, 9)}}
+
+    with pytest.raises(ValueError, match='Unknown summary'):
+        registry.summary('width')
+
+
+def test_remove(registry):
+    selection = registry.select(kind='track')
+    registry.remove([0])
+
+    assert len(registry) == 4
+    assert registry.select(kind='track').tolist() == [1]
+    assert registry.live(selection).tolist() == [1]
+    assert registry.get(selection) == ['t2']
+    assert registry.summary('kind')['track']['count'] == 1
+
+
+def test_offset_and_set_bboxes(registry):
+    registry.offset(registry.select(kind='via'), 1, -1)
+    assert registry.bounding_box(registry.select(kind='via')) == \
+        (3, 1, 10, 8)
+
+    registry.set_bboxes([0], [[10, 10, 11, 11]])
+    assert registry.summary('kind')['track']['bbox'] == (5, 5, 11, 11)
+
+
+def test_copy_is_independent(registry):
+    copied = registry.copy()
+    copied.add('t3', 'track', 'In1_Cu', 'c', (0, 0, 1, 1))
+    copied.remove([1])
+    copied.offset([0], 1, 1)
+
+    assert len(registry) == 5
+    assert registry.get([0, 1]) == ['t1', 't2']
+    assert registry.bounding_box([0]) == (0, 0, 1, 1)
+    assert 'In1_Cu' not in registry.layer_names
+    assert copied.get(copied.select(kind='track')) == ['t1', 't3']
+
+
+def test_release(registry):
+    registry.release()
+    index = registry.add('t3', 'track', 'F_Cu', 'a', (0, 0, 1, 1))
+
+    assert index == 5
+    assert registry.objects == ['t3']
+    assert registry.get(registry.select(kind='track')) == [None, None, 't3']
+    assert registry.summary('kind')['track']['count'] == 3
+
+    # Released items can still be marked as deleted
+    registry.remove([0, 5])
+    assert registry.select(kind='track').tolist() == [1]
@@ -0,0 +1,55 @@
+import pytest
+from circuitpainter.sexpr import QuotedString, dumps, find, format_number, \
+    parse
+
+
+def test_parse():
+    expression = parse('(pad "1" smd (at -1.4 0 90) (layers "F.Cu" F.Mask))')
+
+    assert expression == ['pad', '1', 'smd', ['at', '-1.4', '0', '90'],
+                          ['layers', 'F.Cu', 'F.Mask']]
+    assert isinstance(expression[1], QuotedString)
+    assert not isinstance(expression[2], QuotedString)
+    assert find(expression, 'at') == ['at', '-1.4', '0', '90']
+    assert find(expression, 'net') is None
+
+
+def test_escapes():
+    expression = parse(r'(text "say \"hi\"\nC:\\path")')
+    assert expression[1] == 'say "hi"\nC:\\path'
+    assert parse(dumps(expression)) == expression
+
+
+@pytest.mark.parametrize('text', [
+    '(kicad_pcb (version 20221018) (generator pcbnew))',
+    '(net 1 "GND")',
+    '(fp_text reference "REF**" (at 0 -1.82) (layer "F.SilkS") hide)',
+    '(layers "F.Cu" "F.Paste" "F.Mask")',
+    '(name "")',
+    '(a (b (c (d))) () e)',
+])
+def test_round_trip(text):
+    assert dumps(parse(text)) == text
+
+
+def test_dump_values():
+    assert dumps(['at', 1.5, 2, -0.0, 1e-7]) == '(at 1.5 2 0 0)'
+    assert dumps(['locked', True, False]) == '(locked yes no)'
+    assert dumps([QuotedString('a b'), 'a']) == '("a b" a)'
+
+
+@pytest.mark.parametrize('value, expected', [
+    (1, '1'),
+    (1.0, '1'),
+    (0.1 + 0.2, '0.3'),
+    (-1.2345678, '-1.234568'),
+    (-0.0000001, '0'),
+])
+def test_format_number(value, expected):
+    assert format_number(value) == expected
+
+
+@pytest.mark.parametrize('text', ['(a (b)', '(a))', '', '(a "b)'])
+def test_invalid(text):
+    with pytest.raises(ValueError):
+        parse(text)
@@ -0,0 +1,162 @@
+import sys
+from pathlib import Path
+import pytest
+from circuitpainter.sexpr import find, parse
+from circuitpainter.sexpr_painter import SexprCircuitPainter
+
+LIBRARY_PATH = str(Path(__file__).parent / 'data' / 'footprints')
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+
+
+def pad_positions(painter, reference):
+    return {pad.options['number']: pad.points[0]
+            for pad in painter.get_pads(reference)}
+
+
+def test_loaded_footprints_are_indexed(tmp_path):
+    painter = SexprCircuitPainter(library_path=LIBRARY_PATH, seed=1)
+    painter.translate(10, 5)
+    painter.rotate(90)
+    painter.footprint(0, 0, 'LED_SMD', 'LED_1206', reference='D1',
+                      nets=['a', 'b'])
+    painter.footprint(5, 0, 'LED_SMD', 'LED_1206', reference='D2', angle=30)
+    painter.save(tmp_path / 'board')
+
+    loaded = SexprCircuitPainter(f"{tmp_path}/board.kicad_pcb",
+                                 library_path=LIBRARY_PATH)
+
+    assert set(loaded.footprints) == {'D1', 'D2'}
+    for reference in ('D1', 'D2'):
+        assert pad_positions(loaded, reference) == \
+            pad_positions(painter, reference)
+    assert loaded.get_pad('D1', 2).net == painter.get_pad('D1', 2).net
+    assert loaded.layer_counts == painter.layer_counts
+
+
+def test_duplicate_references_keep_the_first_footprint():
+    painter = SexprCircuitPainter(library_path=LIBRARY_PATH)
+    first = painter.footprint(0, 0, 'LED_SMD', 'LED_1206', reference='D1')
+
+    with pytest.warns(UserWarning, match='Duplicate reference designator:D1'):
+        painter.footprint(10, 0, 'LED_SMD', 'LED_1206', reference='D1')
+
+    assert painter.footprints['D1'] is first
+    assert painter.get_pads('D1') == first.options['pads']
+    assert painter.get_pad('D1', 1) is first.options['pads'][0]
+
+
+def test_bottom_footprints_are_recorded_on_b_cu():
+    painter = SexprCircuitPainter(library_path=LIBRARY_PATH)
+    painter.layer('B_Cu')
+    bottom = painter.footprint(0, 0, 'LED_SMD', 'LED_1206', reference='D1')
+    painter.layer('F_Cu')
+    painter.footprint(10, 0, 'LED_SMD', 'LED_1206', reference='D2')
+
+    selection = painter.select(kind='footprint', layer='B_Cu')
+    assert painter.get_items(selection) == [bottom]
+    assert painter.bounding_box(selection) == painter._item_bbox(bottom)
+
+    summary = painter.summarize(selection=painter.select(kind='footprint'))
+    assert summary['B_Cu']['count'] == 1
+    assert summary['F_Cu']['count'] == 1
+
+
+@pytest.mark.parametrize('formats, message', [
+    (['svg', 'gerber', 'svg'], 'Duplicate export formats'),
+    (['gerber', 'dxf'], 'Unknown export format:dxf'),
+])
+def test_export_all_checks_formats(tmp_path, formats, message):
+    painter = SexprCircuitPainter(library_path=LIBRARY_PATH)
+    output_dir = tmp_path / 'output'
+    output_dir.mkdir()
+
+    with pytest.raises(ValueError, match=message):
+        painter.export_all('board', formats, output_dir=output_dir)
+    assert list(output_dir.iterdir()) == []
+
+
+def test_boards_can_be_made_without_kicad(tmp_path, monkeypatch):
+    def no_library():
+        raise OSError('no library')
+
+    monkeypatch.setattr(
+        'circuitpainter.sexpr_painter._guess_footprint_library_path',
+        no_library)
+    # Make any attempt to import pcbnew fail
+    monkeypatch.setitem(sys.modules, 'pcbnew', None)
+
+    painter = SexprCircuitPainter(seed=1)
+    assert painter.library_path is None
+
+    painter.layer('Edge_Cuts')
+    painter.rect(0, 0, 20, 10)
+    painter.layer('F_Cu')
+    painter.track(1, 1, 5, 1, net='a')
+    painter.via(5, 1, net='a')
+    painter.save(tmp_path / 'board')
+
+    loaded = SexprCircuitPainter(f"{tmp_path}/board.kicad_pcb")
+    assert loaded.save_bytes() == painter.save_bytes()
+
+    with pytest.raises(OSError, match='footprint library'):
+        painter.footprint(0, 0, 'LED_SMD', 'LED_1206')
+
+
+def test_dimension():
+    painter = SexprCircuitPainter(library_path=LIBRARY_PATH, seed=1,
+                                  preserve_origin=True)
+    painter.layer('Dwgs_User')
+    painter.translate(100, 50)
+    painter.dimension(0, 0, 50, 0, -5)
+
+    expression = parse(painter.save_bytes().decode())
+    dimension = find(expression, 'dimension')
+    assert find(dimension, 'type') == ['type', 'aligned']
+    assert find(dimension, 'pts') == ['pts', ['xy', '100', '50'],
+                                      ['xy', '150', '50']]
+    assert find(dimension, 'height') == ['height', '-5']
+
+    # The text is centered above the crossbar, which is 5mm above the points
+    text = find(dimension, 'gr_text')
+    assert text[1] == '50.00 mm'
+    assert find(text, 'at') == ['at', '125', '43.58']
+
+    assert painter.summarize('kind') == {
+        'dimension': {'count': 1, 'bbox': (100.0, 43.58, 150.0, 50.0)}}
+
+
+def draw_variant(painter, offset):
+    painter.layer('F_Cu')
+    painter.footprint(offset, 0, 'LED_SMD', 'LED_1206', 'D?', nets=['a', 'b'])
+    painter.track(0, offset, 5, offset, net='b')
+
+
+def test_fork():
+    base = SexprCircuitPainter(library_path=LIBRARY_PATH, seed=1)
+    base.layer('Edge_Cuts')
+    base.rect(0, 0, 20, 20)
+    base.translate(2, 3)
+    draw_variant(base, 0)
+
+    first = base.fork()
+    second = base.fork()
+    assert first.filename != base.filename
+    assert first.filename.startswith(first.tempdir.name)
+
+    draw_variant(first, 5)
+    draw_variant(second, 5)
+    assert set(base.footprints) == {'D1'}
+    assert set(first.footprints) == {'D1', 'D2'}
+    assert first.get_pad('D2', 1) is not second.get_pad('D2', 1)
+
+    # Forks of the same design, that draw the same items, are identical
+    assert first.save_bytes() == second.save_bytes()
+
+    # Moving items in a fork doesn't move them in the original
+    first.move_items(first.select(kind='footprint'), 1, 0)
+    assert first.get_pads('D1')[0].points != base.get_pads('D1')[0].points
+    assert second.get_pads('D1')[0].points == base.get_pads('D1')[0].points
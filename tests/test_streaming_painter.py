@@ -0,0 +1,62 @@
+from pathlib import Path
+import pytest
+from circuitpainter.sexpr_painter import SexprCircuitPainter
+from circuitpainter.streaming_painter import StreamingCircuitPainter
+
+LIBRARY_PATH = str(Path(__file__).parent / 'data' / 'footprints')
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+
+
+def draw(painter):
+    painter.layer('Edge_Cuts')
+    painter.circle(0, 0, 20)
+    painter.layer('F_Cu')
+    for angle in range(0, 360, 30):
+        painter.push_matrix()
+        painter.rotate(angle)
+        painter.footprint(10, 0, 'LED_SMD', 'LED_1206', 'D?',
+                          nets=['a', 'b'])
+        painter.track(0, 0, 10, 0, net='a')
+        painter.pop_matrix()
+    painter.vias([[0, 0], [1, 1], [2, 2]], net='b')
+
+
+def test_streamed_board_matches_sexpr_board():
+    painter = SexprCircuitPainter(library_path=LIBRARY_PATH, seed=1)
+    streaming = StreamingCircuitPainter(library_path=LIBRARY_PATH, seed=1,
+                                        chunk_size=5)
+    draw(painter)
+    draw(streaming)
+
+    assert streaming.save_bytes() == painter.save_bytes()
+    assert streaming.layer_counts == painter.layer_counts
+    assert streaming.summarize('kind') == painter.summarize('kind')
+
+
+def test_written_footprints_are_kept_as_records():
+    painter = StreamingCircuitPainter(library_path=LIBRARY_PATH, seed=1,
+                                      chunk_size=5)
+    reference = SexprCircuitPainter(library_path=LIBRARY_PATH, seed=1)
+    draw(painter)
+    draw(reference)
+    painter.flush()
+
+    assert painter.registry.objects == []
+    assert set(painter.footprints) == set(reference.footprints)
+    for name, footprint in painter.footprints.items():
+        assert 'expression' not in footprint.options
+        assert footprint.points == reference.footprints[name].points
+
+        pads = painter.get_pads(name)
+        assert [pad.points for pad in pads] == \
+            [pad.points for pad in reference.get_pads(name)]
+        assert all('expression' not in pad.options for pad in pads)
+        assert painter.get_pad(name, 2) is pads[1]
+        assert painter.get_pad(name, 2).net == painter.nets['b']
+
+    with pytest.raises(ValueError, match='no longer be changed'):
+        painter.delete_items(painter.select(kind='footprint'))
@@ -0,0 +1,51 @@
+import os
+import pytest
+from circuitpainter.sweep import parameter_grid, parse_param, \
+    _load_target, _loaded_scripts
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('radius=15,18,20', ('radius', [15, 18, 20])),
+    ('scale=0.5,1', ('scale', [0.5, 1])),
+    ('color=red,blue', ('color', ['red', 'blue'])),
+    ('leds=6', ('leds', [6])),
+    ('leds=6..9', ('leds', [6, 7, 8, 9])),
+    ('leds=6..12:3', ('leds', [6, 9, 12])),
+    ('leds=6..11:3', ('leds', [6, 9])),
+    ('percent=0.5..1:0.25', ('percent', [0.5, 0.75, 1])),
+    ('x=0..0.3:0.1', ('x', [0, 0.1, 0.2, 0.3])),
+    ('offset=-1..1', ('offset', [-1, 0, 1])),
+])
+def test_parse_param(text, expected):
+    assert parse_param(text) == expected
+
+
+@pytest.mark.parametrize('text', [
+    'radius', '=1,2', 'leds=a..b', 'leds=1..5:0', 'leds=1..5:-1',
+])
+def test_parse_param_errors(text):
+    with pytest.raises(ValueError):
+        parse_param(text)
+
+
+def test_parameter_grid():
+    assert parameter_grid({'a': [1, 2], 'b': ['x', 'y']}) == [
+        {'a': 1, 'b': 'x'}, {'a': 1, 'b': 'y'},
+        {'a': 2, 'b': 'x'}, {'a': 2, 'b': 'y'}]
+    assert parameter_grid({}) == [{}]
+
+
+def test_edited_scripts_replace_the_loaded_module(tmp_path):
+    _loaded_scripts.clear()
+    script = tmp_path / 'generator.py'
+    script.write_text('def value():\n    return 1\n')
+    target = f"{script}:value"
+
+    function = _load_target(target)
+    assert function() == 1
+    assert _load_target(target) is function
+
+    script.write_text('def value():\n    return 2\n')
+    os.utime(script, ns=(0, os.stat(script).st_mtime_ns + 10**9))
+    assert _load_target(target)() == 2
+    assert list(_loaded_scripts) == [str(script)]
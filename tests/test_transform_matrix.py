@@ -0,0 +1,122 @@
+import math
+import numpy
+import pytest
+from circuitpainter.transform_matrix import TransformMatrix
+
+
+def reference_matrix(operations):
+    """ Build the expected 3x3 matrix by multiplying the operations out """
+    matrix = numpy.identity(3)
+    for operation, value in operations:
+        if operation == 'translate':
+            step = numpy.array([[1, 0, value[0]], [0, 1, value[1]], [0, 0, 1]])
+        else:
+            r = math.radians(value)
+            step = numpy.array([[math.cos(r), -math.sin(r), 0],
+                                [math.sin(r), math.cos(r), 0],
+                                [0, 0, 1]])
+        matrix = matrix @ step
+    return matrix
+
+
+OPERATIONS = [('translate', (10, -3)), ('rotate', 30), ('translate', (2, 5)),
+              ('rotate', -75), ('translate', (-1.5, 0.25))]
+
+
+def make_transform(operations):
+    transform = TransformMatrix()
+    for operation, value in operations:
+        if operation == 'translate':
+            transform.translate(*value)
+        else:
+            transform.rotate(value)
+    return transform
+
+
+def test_compositions_match_matrix_product():
+    transform = make_transform(OPERATIONS)
+    numpy.testing.assert_allclose(transform.matrix,
+                                  reference_matrix(OPERATIONS), atol=1e-12)
+
+
+def test_project_and_inverse_project_round_trip():
+    transform = make_transform(OPERATIONS)
+    expected = reference_matrix(OPERATIONS) @ numpy.array([3.0, -7.0, 1.0])
+
+    x, y = transform.project(3, -7)
+    assert (x, y) == pytest.approx(tuple(expected[:2]))
+    assert transform.inverse_project(x, y) == pytest.approx((3, -7))
+
+
+def test_angle_follows_rotations():
+    transform = TransformMatrix()
+    assert transform.get_angle() == 0
+
+    transform.rotate(30)
+    transform.translate(5, 5)
+    transform.rotate(15)
+    assert transform.get_angle() == pytest.approx(-45)
+
+
+def test_push_pop_restores_state_and_caches():
+    transform = TransformMatrix()
+    transform.translate(1, 2)
+    transform.push()
+    transform.rotate(90)
+    assert transform.project(1, 0) == pytest.approx((1, 3))
+
+    transform.pop()
+    assert transform.project(1, 0) == pytest.approx((2, 2))
+    assert transform.get_angle() == 0
+    assert transform.inverse_project(2, 2) == pytest.approx((1, 0))
+
+
+def test_pop_with_empty_stack_resets():
+    transform = TransformMatrix()
+    transform.translate(4, 4)
+    transform.pop()
+    assert transform.coefficients == TransformMatrix.IDENTITY
+
+
+def test_project_many_matches_project():
+    transform = make_transform(OPERATIONS)
+    points = numpy.random.default_rng(1).uniform(-50, 50, (100, 2))
+
+    projected = transform.project_many(points)
+    assert projected.shape == (100, 2)
+    numpy.testing.assert_allclose(
+        projected, [transform.project(x, y) for x, y in points])
+
+    numpy.testing.assert_allclose(
+        transform.inverse_project_many(projected), points, atol=1e-9)
+
+
+def test_project_many_accepts_lists_and_empty_input():
+    transform = TransformMatrix()
+    transform.translate(1, 1)
+
+    assert transform.project_many([[0, 0], [1, 2]]).tolist() == \
+        [[1, 1], [2, 3]]
+    assert transform.project_many([]).shape == (0, 2)
+
+
+def test_copy_is_independent():
+    transform = make_transform(OPERATIONS)
+    transform.push()
+    transform.rotate(15)
+    copied = transform.copy()
+
+    assert copied.coefficients == transform.coefficients
+    assert copied.get_angle() == pytest.approx(transform.get_angle())
+
+    copied.translate(3, 4)
+    copied.pop()
+    copied.pop()
+    assert copied.coefficients == TransformMatrix.IDENTITY
+    assert transform.project(1, 2) == pytest.approx(
+        tuple(reference_matrix(OPERATIONS + [('rotate', 15)])
+              @ (1, 2, 1))[:2])
+
+    transform.pop()
+    assert transform.project(1, 2) == pytest.approx(
+        tuple(reference_matrix(OPERATIONS) @ (1, 2, 1))[:2])